@@ -1,86 +1,278 @@
-import traceback
-from time import sleep, time
+import asyncio
+import re
+import threading
+import warnings
+from collections.abc import Callable
 
-from EV3DriverStation import ControllersManager, ControllerState, Robot, RobotMode, RobotNetwork, Telemetry
+from EV3DriverStation import ControllerState, DriverStationCore, InputTimeline, RobotConnectionError, RobotMode
 
 
-class RobotAPI:
-    def __init__(self, ip: str, refresh_udp=50):
-        self.controllers = ControllersManager()
-        self.robot = Robot(self.controllers.keyboard_controller)   
-        self.telemetry = Telemetry() 
-        print("Connecting to robot")
-        self.network = RobotNetwork(self.robot, self.controllers, self.telemetry, address=ip)
-        while self.network.connectionStatus != "Connected":
-            sleep(.1)
-            if self.network.connectionStatus == "Disconected":
-                raise RuntimeError("Impossible to connect on robot")
-        print("Robot connected")
-        self.robot.mode = RobotMode.TELEOP
-        self.robot.enabled = True
+class AsyncRobotAPI:
+    """
+    Version asyncio de l'API: les mouvements sont des coroutines, que l'on peut attendre les unes après les autres
+    ou lancer en même temps que la lecture des capteurs::
+
+        async with AsyncRobotAPI("192.168.0.172") as robot:
+            await robot.avance(2, .5)
+            await robot.wait_until('touch', 1, timeout=5)
+            robot.abonne('touch', lambda valeur: print("Touché!") if valeur else None)
+            async for t in robot.boucle(.05):
+                robot.pilote(leftY=-.5 if robot.capteurCouleur != 1 else 0)
+                if t > 10:
+                    break
 
+    Chaque mouvement se termine à une échéance absolue de l'horloge monotone: quand les mouvements s'enchaînent,
+    le retard de l'un n'est pas ajouté à la durée des suivants.
+
+    Comme l'application, l'API se connecte en SSH au robot et le verrouille (un seul Driver Station pilote le robot),
+    sauf sur ``localhost`` ou si ``lock=False``. Le programme du robot doit ensuite répondre dans les 10 secondes.
+    """
+    def __init__(self, ip: str, refresh_udp=50, lock: bool | None = None):
         self.refresh_udp = refresh_udp
+        self.ds = DriverStationCore(ip, refresh_period=refresh_udp / 1000, lock=lock)
+        self._last_move_end: float | None = None
 
+    async def connect(self):
+        print("Connecting to robot")
+        try:
+            await self.ds.connect()
+        except RobotConnectionError as e:
+            await self.ds.close()
+            # The messages are formatted for the GUI
+            raise RuntimeError("Impossible to connect on robot: " + re.sub(r'</?i>', '', e.message)) from None
+        except TimeoutError:
+            await self.ds.close()
+            raise RuntimeError("Impossible to connect on robot: its program didn't answer") from None
+        print("Robot connected")
+        self.ds.mode = RobotMode.TELEOP
+        self.ds.enabled = True
         self.send_neutral()
 
+    async def disconnect(self):
+        await self.ds.close()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.disconnect()
+
+    # --- Mouvements --- #
+    def _move_start(self) -> float:
+        # Chain the moves awaited one after the other on the previous deadline
+        now = asyncio.get_running_loop().time()
+        if self._last_move_end is not None and 0 <= now - self._last_move_end < self.ds.refresh_period:
+            return self._last_move_end
+        return now
+
+    async def send_during(self, dt: float, state: ControllerState | None = None):
+        """
+        Envoie l'état ``state`` au robot pendant ``dt`` secondes, puis l'arrête.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = self._move_start() + dt
+        if state is not None:
+            self.ds.set_pilot_state(0, state)
+        try:
+            await asyncio.sleep(deadline - loop.time())
+        finally:
+            self._last_move_end = deadline
+            self.send_neutral()
+
+    async def avance(self, temps: float, puissance:float=1):
+        await self.send_during(temps, ControllerState.from_values(leftY=-puissance))
+
+    async def recule(self, temps: float, puissance:float=1):
+        await self.send_during(temps, ControllerState.from_values(leftY=puissance))
+
+    async def tourne_gauche(self, temps: float=1, puissance:float =.7):
+        await self.send_during(temps, ControllerState.from_values(rightX=-puissance))
+
+    async def tourne_droite(self, temps: float=1, puissance:float =.7):
+        await self.send_during(temps, ControllerState.from_values(rightX=puissance))
+
+    async def joue(self, timeline: InputTimeline):
+        """
+        Joue une séquence d'entrées (scriptée ou enregistrée) en envoyant l'état du pilote au robot.
+        """
+        loop = asyncio.get_running_loop()
+        t0 = self._move_start()
+        try:
+            for event in timeline:
+                await asyncio.sleep(t0 + event.t - loop.time())
+                self.ds.set_pilot_state(0, event.state)
+        finally:
+            self._last_move_end = t0 + timeline.duration
+            self.send_neutral()
+
+    def pilote(self, **valeurs: float | bool):
+        """
+        Change immédiatement l'état du pilote (par exemple ``pilote(leftY=-.5, A=True)``).
+        """
+        self.ds.set_pilot_state(0, ControllerState.from_values(**valeurs))
+
+    def send_neutral(self):
+        self.ds.set_pilot_state(0, ControllerState())
+
+    async def boucle(self, periode: float):
+        """
+        Boucle à cadence fixe: donne le temps écoulé (s) toutes les ``periode`` secondes, à des échéances absolues
+        (les itérations en retard sont sautées).
+        """
+        loop = asyncio.get_running_loop()
+        t0 = deadline = loop.time()
+        while True:
+            yield deadline - t0
+            deadline += periode
+            now = loop.time()
+            if deadline <= now:
+                deadline += periode * ((now - deadline) // periode + 1)
+            await asyncio.sleep(deadline - now)
+
+    # --- Télémétrie --- #
+    def abonne(self, nom: str, fonction: Callable) -> Callable[[], None]:
+        """
+        Appelle ``fonction(valeur)`` à chaque changement de la variable ``nom``, pendant que les mouvements
+        continuent. Renvoie la fonction qui annule l'abonnement.
+        """
+        def listener(changes):
+            if nom in changes:
+                fonction(changes[nom])
+        self.ds.add_telemetry_listener(listener)
+        return lambda: self.ds.remove_telemetry_listener(listener)
+
+    def valeur(self, nom: str):
+        """
+        Valeur actuelle de la variable de télémétrie ``nom``.
+        """
+        return self.ds.value(nom)
+
+    async def wait_until(self, nom: str, condition, timeout: float | None = None) -> bool:
+        """
+        Attend que la variable ``nom`` vérifie ``condition``: une fonction de la valeur (``lambda v: v > 100``) ou
+        la valeur attendue. Le robot n'est pas interrogé en boucle: la condition est vérifiée à chaque changement de
+        la variable. Renvoie False si la condition n'est pas vérifiée après ``timeout`` secondes.
+        """
+        predicate = condition if callable(condition) else lambda valeur: valeur == condition
+        try:
+            await self.ds.wait_until(nom, predicate, timeout)
+        except TimeoutError:
+            return False
+        return True
+
+    @property
+    def positionMoteur1(self):
+        return self.ds.value('moteurL')
+
+    @property
+    def positionMoteur2(self):
+        return self.ds.value('moteurR')
+
+    @property
+    def capteurCouleur(self):
+        return self.ds.value('color')
+
+    @property
+    def capteurTactile(self):
+        return self.ds.value('touch') == 1
+
+
+class RobotAPI:
+    """
+    Version bloquante de l'API: chaque méthode attend la fin du mouvement. Les coroutines de :class:`AsyncRobotAPI`
+    tournent sur une boucle asyncio dans un thread en arrière-plan.
+    """
+    def __init__(self, ip: str, refresh_udp=50, lock: bool | None = None):
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, name="RobotAPI", daemon=True)
+        self._loop_thread.start()
+
+        self.api = AsyncRobotAPI(ip, refresh_udp, lock)
+        try:
+            self._run(self.api.connect())
+        except BaseException:
+            self.disconnect()
+            raise
+
     def __del__(self):
         self.disconnect()
 
     def disconnect(self):
-        self.send_neutral()
-        self.network.disconnectRobot()
+        if self._loop.is_closed():
+            return
+        self._run(self.api.disconnect())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join()
+        self._loop.close()
 
-    def send_during(self, dt: float, repeat_ms: int = None):
+    def _run(self, coroutine):
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
         try:
-            if repeat_ms is None:
-                self.network.send_udp()
-                sleep(dt)
-            else:
-                t0 = time()
-                while t0 + dt > time():
-                    self.network.send_udp()
-                    sleep(min(repeat_ms / 1000, (t0 + dt)-time()))
-        except:
-            traceback.print_exc()
-        self.send_neutral()
+            return future.result()
+        except KeyboardInterrupt:
+            # Interrupted by the user: stop the move (the robot is stopped when the coroutine is cancelled)
+            future.cancel()
+            raise
+
+    def _call(self, f, *args, **kwargs):
+        async def call():
+            return f(*args, **kwargs)
+        return self._run(call())
+
+    def send_during(self, dt: float, repeat_ms: int | None = None):
+        """
+        Envoie l'état actuel du pilote au robot pendant ``dt`` secondes, puis l'arrête.
+        ``repeat_ms`` est obsolète: les paquets sont envoyés toutes les ``refresh_udp`` ms.
+        """
+        if repeat_ms is not None:
+            warnings.warn("send_during(): repeat_ms is deprecated, packets are sent every refresh_udp ms.",
+                          DeprecationWarning, stacklevel=2)
+        self._run(self.api.send_during(dt))
 
     def avance(self, temps: float, puissance:float=1):
-        self.controllers._pilot1State = ControllerState(leftY=-puissance)
-        self.controllers._pilot2State = ControllerState()
-        self.send_during(temps, self.refresh_udp)
+        self._run(self.api.avance(temps, puissance))
 
     def recule(self, temps: float, puissance:float=1):
-        self.controllers._pilot1State = ControllerState(leftY=puissance)
-        self.controllers._pilot2State = ControllerState()
-        self.send_during(temps, self.refresh_udp)
+        self._run(self.api.recule(temps, puissance))
 
     def tourne_gauche(self, temps: float=1, puissance:float =.7):
-        self.controllers._pilot1State = ControllerState(rightX=-puissance)
-        self.controllers._pilot2State = ControllerState()
-        self.send_during(temps, self.refresh_udp)
+        self._run(self.api.tourne_gauche(temps, puissance))
 
     def tourne_droite(self, temps: float=1, puissance:float =.7):
-        self.controllers._pilot1State = ControllerState(rightX=puissance)
-        self.controllers._pilot2State = ControllerState()
-        self.send_during(temps, self.refresh_udp)
+        self._run(self.api.tourne_droite(temps, puissance))
+
+    def joue(self, timeline: InputTimeline):
+        """
+        Joue une séquence d'entrées (scriptée ou enregistrée) en envoyant l'état du pilote au robot.
+        """
+        self._run(self.api.joue(timeline))
 
     def send_neutral(self):
-        self.controllers._pilot1State = ControllerState()
-        self.controllers._pilot2State = ControllerState()
-        self.network.send_udp()
+        self._call(self.api.send_neutral)
+
+    def valeur(self, nom: str):
+        return self._call(self.api.valeur, nom)
+
+    def wait_until(self, nom: str, condition, timeout: float | None = None) -> bool:
+        """
+        Attend que la variable ``nom`` vérifie ``condition`` (une fonction de la valeur, ou la valeur attendue).
+        Renvoie False si la condition n'est pas vérifiée après ``timeout`` secondes.
+        """
+        return self._run(self.api.wait_until(nom, condition, timeout))
 
     @property
     def positionMoteur1(self):
-        return self.telemetry._telemetry_data['moteurL']
+        return self._call(lambda: self.api.positionMoteur1)
 
     @property
     def positionMoteur2(self):
-        return self.telemetry._telemetry_data['moteurR']
+        return self._call(lambda: self.api.positionMoteur2)
 
     @property
     def capteurCouleur(self):
-        return self.telemetry._telemetry_data['color']
+        return self._call(lambda: self.api.capteurCouleur)
 
     @property
     def capteurTactile(self):
-        return self.telemetry._telemetry_data['touch'] == 1
+        return self._call(lambda: self.api.capteurTactile)
@@ -1,8 +1,34 @@
+import importlib
 import os
 
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
 
-from .controllers import ControllersManager, ControllerState
-from .network import RobotNetwork
-from .robot import Robot, RobotMode
-from .telemetry import Telemetry
+# Public names and the module defining them. Modules are imported on first access, so that scripts using only the
+# Qt-free core (protocol, timeline, link, ssh, core) don't load PySide6 and pygame.
+_EXPORTS = {
+    'ControllersManager': 'controllers',
+    'ControllerState': 'protocol',
+    'DriverStationCore': 'core',
+    'InputRecorder': 'timeline',
+    'InputTimeline': 'timeline',
+    'MatchPhase': 'match',
+    'MatchSequencer': 'match',
+    'PerformanceMonitor': 'perf',
+    'ProgramStatus': 'protocol',
+    'Robot': 'robot',
+    'RobotConnectionError': 'ssh',
+    'RobotMode': 'protocol',
+    'RobotNetwork': 'network',
+    'Telemetry': 'telemetry',
+    'VirtualController': 'virtual',
+}
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
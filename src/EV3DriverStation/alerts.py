@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+__all__ = ["AlertEngine", "AlertRule", "AlertAction", "parse_condition"]
+
+import heapq
+import operator
+import re
+import threading
+import time
+from collections.abc import Callable
+from enum import Enum
+from typing import NamedTuple
+
+OPERATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+_TERM_RE = re.compile(r"""
+    ^\s*(?:
+        stuck\(\s*(?P<stuck_var>[\w.]+)\s*,\s*(?P<stuck_s>[\d.]+)\s*\)                     # stuck(var, seconds)
+      | (?:(?P<func>rate|abs)\(\s*(?P<func_var>[\w.]+)\s*\)|(?P<var>[\w.]+))\s*            # var | rate(var) | abs(var)
+        (?P<op><=|>=|==|!=|<|>)\s*(?P<value>[-+]?[\w.]+)                                   # op value
+    )\s*$""", re.VERBOSE)
+
+
+class AlertAction(str, Enum):
+    NOTIFY = 'notify'
+    RUMBLE = 'rumble'
+    LOG = 'log'
+
+
+class AlertRule(NamedTuple):
+    name: str
+    when: str
+    actions: tuple[AlertAction, ...] = (AlertAction.NOTIFY,)
+    message: str = ''
+    cooldown: float = 5     # Minimum time (s) between two firings of the rule
+
+    @classmethod
+    def from_dict(cls, d: dict) -> AlertRule:
+        actions = d.get('actions', d.get('action', 'notify'))
+        if isinstance(actions, str):
+            actions = [actions]
+        return cls(name=str(d.get('name', d['when'])), when=str(d['when']),
+                   actions=tuple(AlertAction(a) for a in actions),
+                   message=str(d.get('message', '')), cooldown=float(d.get('cooldown', 5)))
+
+
+#====================#
+#== Compiled Terms ==#
+#====================#
+class _VarState:
+    __slots__ = ('value', 't', 'prev_value', 'prev_t', 'changed_t')
+
+    def __init__(self, value, t: float):
+        self.value = value
+        self.t = t
+        self.prev_value = None
+        self.prev_t = None
+        self.changed_t = t
+
+
+class _Compare:
+    __slots__ = ('var', 'op', 'threshold')
+    timed = False
+
+    def __init__(self, var: str, op: Callable, threshold):
+        self.var, self.op, self.threshold = var, op, threshold
+
+    def __call__(self, states: dict[str, _VarState], t: float) -> bool:
+        s = states.get(self.var)
+        return s is not None and self.op(s.value, self.threshold)
+
+
+class _AbsCompare(_Compare):
+    __slots__ = ()
+
+    def __call__(self, states: dict[str, _VarState], t: float) -> bool:
+        s = states.get(self.var)
+        return s is not None and self.op(abs(s.value), self.threshold)
+
+
+class _RateCompare(_Compare):
+    __slots__ = ()
+
+    def __call__(self, states: dict[str, _VarState], t: float) -> bool:
+        s = states.get(self.var)
+        if s is None or s.prev_t is None or s.t <= s.prev_t:
+            return False
+        return self.op((s.value - s.prev_value) / (s.t - s.prev_t), self.threshold)
+
+
+class _Stuck:
+    __slots__ = ('var', 'duration')
+    timed = True
+
+    def __init__(self, var: str, duration: float):
+        self.var, self.duration = var, duration
+
+    def __call__(self, states: dict[str, _VarState], t: float) -> bool:
+        s = states.get(self.var)
+        return s is not None and t - s.changed_t >= self.duration
+
+
+def _parse_value(v: str):
+    if v in ('true', 'True'):
+        return True
+    if v in ('false', 'False'):
+        return False
+    try:
+        return int(v)
+    except ValueError:
+        pass
+    try:
+        return float(v)
+    except ValueError:
+        return v
+
+
+def parse_condition(when: str) -> tuple[list[list], set[str]]:
+    """
+    Compile a rule condition into a disjunction of conjunctions of terms, and return it with the variables it
+    depends on. Terms are ``var <op> value``, ``abs(var) <op> value``, ``rate(var) <op> value`` (change per second)
+    and ``stuck(var, seconds)``, combined with ``and``/``or`` (``and`` binds tighter).
+    """
+    disjunction = []
+    deps = set()
+    for conjunction_str in re.split(r'\s+or\s+', when.strip()):
+        conjunction = []
+        for term_str in re.split(r'\s+and\s+', conjunction_str):
+            m = _TERM_RE.match(term_str)
+            if m is None:
+                raise ValueError(f"Invalid alert condition: '{term_str}'")
+            if m['stuck_var']:
+                term = _Stuck(m['stuck_var'], float(m['stuck_s']))
+            else:
+                op = OPERATORS[m['op']]
+                value = _parse_value(m['value'])
+                if m['func'] == 'rate':
+                    term = _RateCompare(m['func_var'], op, value)
+                elif m['func'] == 'abs':
+                    term = _AbsCompare(m['func_var'], op, value)
+                else:
+                    term = _Compare(m['var'], op, value)
+            conjunction.append(term)
+            deps.add(term.var)
+        disjunction.append(conjunction)
+    return disjunction, deps
+
+
+class _CompiledRule:
+    __slots__ = ('rule', 'condition', 'deps', 'timed_terms', 'active', 'last_fired', 'scheduled')
+
+    def __init__(self, rule: AlertRule):
+        self.rule = rule
+        self.condition, self.deps = parse_condition(rule.when)
+        self.timed_terms = [term for conj in self.condition for term in conj if term.timed]
+        self.active = False
+        self.last_fired = None
+        self.scheduled = None   # Earliest deadline at which the rule is already scheduled to be re-evaluated
+
+    def evaluate(self, states: dict[str, _VarState], t: float) -> bool:
+        return any(all(term(states, t) for term in conj) for conj in self.condition)
+
+
+#============#
+#== Engine ==#
+#============#
+class AlertEngine:
+    """
+    Evaluate alert rules against telemetry updates.
+
+    Rules are compiled once and indexed by the variables they depend on: an update only re-evaluates the rules
+    referencing the updated variables. ``stuck`` conditions are scheduled in a deadline heap checked by :meth:`tick`.
+    Rules are edge-triggered: ``on_fire(rule)`` is called when a condition becomes true (at most once per
+    ``cooldown``), and not again until it has been false.
+    """
+    def __init__(self, rules: list[AlertRule] = (), on_fire: Callable[[AlertRule], None] | None = None):
+        self.on_fire = on_fire
+        self._lock = threading.Lock()
+        self._rules: list[_CompiledRule] = []
+        self._index: dict[str, list[_CompiledRule]] = {}
+        self._states: dict[str, _VarState] = {}
+        self._deadlines: list[tuple[float, int, _CompiledRule]] = []
+        self._deadline_counter = 0
+        self.set_rules(rules)
+
+    @classmethod
+    def load(cls, path: str, on_fire: Callable[[AlertRule], None] | None = None) -> AlertEngine:
+        """
+        Load rules from a YAML file containing a list of ``{name, when, actions, message, cooldown}``.
+        """
+        import yaml
+
+        with open(path) as f:
+            data = yaml.safe_load(f) or []
+        return cls([AlertRule.from_dict(d) for d in data], on_fire)
+
+    @property
+    def rules(self) -> list[AlertRule]:
+        return [r.rule for r in self._rules]
+
+    @property
+    def is_active(self) -> bool:
+        return bool(self._rules)
+
+    def set_rules(self, rules: list[AlertRule]):
+        compiled = [_CompiledRule(rule) for rule in rules]
+        index: dict[str, list[_CompiledRule]] = {}
+        for rule in compiled:
+            for var in rule.deps:
+                index.setdefault(var, []).append(rule)
+        with self._lock:
+            self._rules = compiled
+            self._index = index
+            self._deadlines.clear()
+
+    def clear(self):
+        """
+        Forget the variables state (e.g. when the robot program restarts).
+        """
+        with self._lock:
+            self._states.clear()
+            self._deadlines.clear()
+            for rule in self._rules:
+                rule.active = False
+                rule.scheduled = None
+
+    def update(self, values: list[tuple[str, bool | int | float | str]], t: float | None = None):
+        """
+        Update variables from a list of ``(name, value)`` and evaluate the rules depending on them.
+        """
+        if t is None:
+            t = time.monotonic()
+        fired = []
+        with self._lock:
+            index, states = self._index, self._states
+            affected = {}
+            for name, value in values:
+                rules = index.get(name)
+                if rules is None:
+                    continue
+                s = states.get(name)
+                if s is None:
+                    states[name] = _VarState(value, t)
+                else:
+                    s.prev_value, s.prev_t = s.value, s.t
+                    if value != s.value:
+                        s.changed_t = t
+                    s.value, s.t = value, t
+                for rule in rules:
+                    affected[id(rule)] = rule
+            for rule in affected.values():
+                self._evaluate(rule, t, fired)
+            self._check_deadlines(t, fired)
+        self._fire(fired)
+
+    def tick(self, t: float | None = None):
+        """
+        Evaluate the time-dependent rules whose deadline has passed.
+        """
+        if not self._deadlines:
+            return
+        if t is None:
+            t = time.monotonic()
+        fired = []
+        with self._lock:
+            self._check_deadlines(t, fired)
+        self._fire(fired)
+
+    def _evaluate(self, rule: _CompiledRule, t: float, fired: list):
+        try:
+            triggered = rule.evaluate(self._states, t)
+        except TypeError:
+            triggered = False   # Variable type doesn't match the condition
+        if triggered:
+            if not rule.active and (rule.last_fired is None or t - rule.last_fired >= rule.rule.cooldown):
+                rule.active = True
+                rule.last_fired = t
+                fired.append(rule.rule)
+        else:
+            rule.active = False
+            # Schedule the time-dependent terms to be checked when they could become true
+            # (at most one pending deadline per rule: when reached, the rule is re-evaluated and re-scheduled)
+            for term in rule.timed_terms:
+                s = self._states.get(term.var)
+                if s is None:
+                    continue
+                deadline = s.changed_t + term.duration
+                if rule.scheduled is None or deadline < rule.scheduled:
+                    rule.scheduled = deadline
+                    self._deadline_counter += 1
+                    heapq.heappush(self._deadlines, (deadline, self._deadline_counter, rule))
+
+    def _check_deadlines(self, t: float, fired: list):
+        deadlines = self._deadlines
+        due = {}
+        while deadlines and deadlines[0][0] <= t:
+            deadline, _, rule = heapq.heappop(deadlines)
+            if rule.scheduled == deadline:
+                rule.scheduled = None
+            due[id(rule)] = rule
+        for rule in due.values():
+            self._evaluate(rule, t, fired)
+
+    def _fire(self, fired: list[AlertRule]):
+        if self.on_fire is not None:
+            for rule in fired:
+                self.on_fire(rule)
@@ -2,19 +2,24 @@ __all__ = ['GuiApp']
 import os
 import sys
 
-from PySide6.QtCore import Property, QObject, Signal, Slot
+from PySide6.QtCore import Property, QObject, Qt, QUrl, Signal, Slot
 from PySide6.QtGui import QGuiApplication, QIcon
 from PySide6.QtQml import QQmlApplicationEngine
 from PySide6.QtQuickControls2 import QQuickStyle
 
+from .bundle import install_ui
 from .controllers import ControllersManager
+from .match import MatchSequencer
 from .network import RobotNetwork
+from .perf import PerformanceMonitor
 from .robot import Robot
 from .telemetry import Telemetry
+from .utils import protect_bool_refcounts
 
 
 class GuiApp(QGuiApplication):
     def __init__(self):
+        protect_bool_refcounts()
         super().__init__(sys.argv)
 
         self.setWindowIcon(QIcon(self.ui_path('icon.png')))
@@ -25,6 +30,11 @@ class GuiApp(QGuiApplication):
         self.robot = Robot(self.controllersManager.keyboard_controller)
         self.telemetry = Telemetry()
         self.robot_network = RobotNetwork(self.robot, self.controllersManager, self.telemetry)
+        # Alerts are raised on the UDP receive thread: the rumble is handed over directly to the input thread
+        self.telemetry.rumbleRequested.connect(self.controllersManager.rumble, Qt.DirectConnection)
+        self.match = MatchSequencer(self.robot)
+        self.match.rumbleRequested.connect(self.controllersManager.rumble)
+        self.performance = PerformanceMonitor(self.robot_network)
 
         os.environ["QT_QUICK_CONTROLS_STYLE"] = "Material"
         os.environ["QT_QUICK_CONTROLS_MATERIAL_VARIANT"] = "Dense"
@@ -32,6 +42,8 @@ class GuiApp(QGuiApplication):
         os.environ["QT_QUICK_CONTROLS_MATERIAL_ACCENT"] = "LightBlue"
         os.environ["QT_QUICK_CONTROLS_MATERIAL_PRIMARY"] = "Indigo"
 
+        # Load the UI from the precompiled resource bundle if it was built, from the ui folder otherwise
+        self.ui_url = install_ui()
         self.engine = QQmlApplicationEngine()
         self.ctx = self.engine.rootContext()
         QQuickStyle.setStyle('Material')
@@ -44,19 +56,25 @@ class GuiApp(QGuiApplication):
         self.ctx.setContextProperty('telemetry', self.telemetry)
         self.ctx.setContextProperty('controllers', self.controllersManager)
         self.ctx.setContextProperty('network', self.robot_network)
+        self.ctx.setContextProperty('match', self.match)
+        self.ctx.setContextProperty('performance', self.performance)
 
         self.aknowledge_panel_changed(self.app_status.panel)
 
-        self.engine.load(self.ui_path('main.qml'))
+        self.engine.load(QUrl(self.ui_url + 'main.qml'))
 
         r = super().exec_()
         # Delete the engine to avoid type errors when closing the program
         del self.engine
 
+        self.match.stopMatch()
+        self.performance.close()
         self.robot_network.mute_udp_refresh = True
         self.robot.enabled = False
         self.robot_network.send_neutral_udp()
         self.robot_network.close()
+        self.telemetry.stop_recording()
+        self.telemetry.stop_streaming()
         self.controllersManager.quit_pygame()
         return r
 
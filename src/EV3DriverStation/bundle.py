@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+__all__ = ["build_bundle", "install_ui", "BUNDLE_PATH", "QML_CACHE_DIR", "UI_DIR"]
+
+import os
+import shutil
+import subprocess
+import sys
+from xml.sax.saxutils import escape
+
+from PySide6.QtCore import QLibraryInfo, QResource
+
+_PACKAGE_DIR = os.path.abspath(os.path.dirname(__file__))
+UI_DIR = os.path.join(_PACKAGE_DIR, 'ui')
+BUNDLE_PATH = os.path.join(_PACKAGE_DIR, 'ui.rcc')         # Binary Qt resource holding the QML files and assets
+QML_CACHE_DIR = os.path.join(_PACKAGE_DIR, 'qmlcache')     # Bytecode of the QML files, compiled by build_bundle()
+_RESOURCE_ROOT = '/EV3DriverStation'
+
+
+def _ui_files() -> list[str]:
+    files = []
+    for root, dirs, names in os.walk(UI_DIR):
+        dirs.sort()
+        files.extend(os.path.relpath(os.path.join(root, n), UI_DIR).replace(os.sep, '/') for n in sorted(names))
+    return files
+
+
+def _bundle_is_stale() -> bool:
+    if not os.path.isdir(UI_DIR):
+        # Frozen distribution: only the bundle is shipped
+        return False
+    bundle_mtime = os.path.getmtime(BUNDLE_PATH)
+    return any(os.path.getmtime(os.path.join(UI_DIR, f)) > bundle_mtime for f in _ui_files())
+
+
+def install_ui() -> str:
+    """
+    Register the UI resource bundle if it was built and is up to date with the ``ui`` folder, and return the base URL
+    of the UI: ``qrc:/EV3DriverStation/ui/`` or, as a fallback, the ``file:`` URL of the ``ui`` folder.
+
+    Must be called before the QML engine is created, so that it uses the precompiled QML cache.
+    """
+    if os.path.isdir(QML_CACHE_DIR) and 'QML_DISK_CACHE_PATH' not in os.environ:
+        os.environ['QML_DISK_CACHE_PATH'] = QML_CACHE_DIR
+
+    if os.path.exists(BUNDLE_PATH):
+        if _bundle_is_stale():
+            print("The UI bundle is older than the QML files, they are loaded from the ui folder instead. "
+                  "Run 'python -m EV3DriverStation.bundle' to rebuild it.")
+        elif QResource.registerResource(BUNDLE_PATH):
+            return f'qrc:{_RESOURCE_ROOT}/ui/'
+        else:
+            print(f"Invalid UI bundle {BUNDLE_PATH}, the QML files are loaded from the ui folder instead.")
+    return 'file:' + UI_DIR.replace(os.sep, '/') + '/'
+
+
+#================#
+#== Build Step ==#
+#================#
+def _rcc() -> list[str]:
+    rcc = os.path.join(QLibraryInfo.path(QLibraryInfo.LibraryPath.LibraryExecutablesPath), 'rcc')
+    for exe in (rcc, rcc + '.exe'):
+        if os.path.isfile(exe):
+            return [exe]
+    rcc = shutil.which('pyside6-rcc')
+    if rcc is None:
+        raise RuntimeError("Qt resource compiler not found (rcc or pyside6-rcc).")
+    return [rcc]
+
+
+def build_bundle(precompile: bool = True):
+    """
+    Pack the ``ui`` folder into the binary resource ``ui.rcc``, then compile every QML file of the bundle into the
+    ``qmlcache`` folder so the first launch doesn't parse and compile them.
+    """
+    files = _ui_files()
+    qrc_path = os.path.join(_PACKAGE_DIR, 'ui.qrc')
+    with open(qrc_path, 'w') as f:
+        f.write(f'<RCC>\n  <qresource prefix="{_RESOURCE_ROOT}">\n')
+        for file in files:
+            f.write(f'    <file alias="ui/{escape(file)}">ui/{escape(file)}</file>\n')
+        f.write('  </qresource>\n</RCC>\n')
+    try:
+        subprocess.run([*_rcc(), '--binary', qrc_path, '-o', BUNDLE_PATH], check=True)
+    finally:
+        os.remove(qrc_path)
+    print(f"UI bundle written to {BUNDLE_PATH} ({len(files)} files, {os.path.getsize(BUNDLE_PATH) // 1024} kB)")
+
+    if precompile:
+        # The cache path is read by the QML engine of the child process: precompile in a fresh interpreter
+        env = dict(os.environ, QML_DISK_CACHE_PATH=QML_CACHE_DIR)
+        subprocess.run([sys.executable, '-m', 'EV3DriverStation.bundle', '--precompile-child'], check=True, env=env,
+                       cwd=os.path.dirname(_PACKAGE_DIR))
+
+
+def _precompile_child() -> int:
+    from PySide6.QtCore import QUrl
+    from PySide6.QtGui import QGuiApplication
+    from PySide6.QtQml import QQmlComponent, QQmlEngine
+    from PySide6.QtQuickControls2 import QQuickStyle
+
+    shutil.rmtree(QML_CACHE_DIR, ignore_errors=True)
+    os.makedirs(QML_CACHE_DIR)
+    app = QGuiApplication(sys.argv)  # noqa: F841
+    QQuickStyle.setStyle('Material')
+    base_url = install_ui()
+    engine = QQmlEngine()
+    errors = 0
+    qml_files = [f for f in _ui_files() if f.endswith('.qml')]
+    for file in qml_files:
+        component = QQmlComponent(engine, QUrl(base_url + file))
+        for error in component.errors():
+            print(error.toString())
+            errors += 1
+    print(f"{len(qml_files)} QML files compiled to {QML_CACHE_DIR}")
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pack the UI into a Qt resource bundle and precompile its QML.")
+    parser.add_argument('--no-precompile', action='store_true', help="Only build the resource bundle")
+    parser.add_argument('--precompile-child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.precompile_child:
+        sys.exit(_precompile_child())
+    build_bundle(precompile=not args.no_precompile)
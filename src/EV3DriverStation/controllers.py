@@ -1,210 +1,386 @@
 from __future__ import annotations
 
-__all__ = ["ControllersManager", "Controller", "ControllerState"]
+__all__ = ["ControllersManager", "PilotsModel", "Controller", "ControllerState", "AxisCurve", "ResponseProfile"]
 
-from typing import NamedTuple
+import math
+import threading
+import time
+import traceback
+from typing import TYPE_CHECKING, NamedTuple
 
 import pygame
-from PySide6.QtCore import Property, QObject, Qt, QTimer, Signal, Slot
+from PySide6.QtCore import Property, QAbstractListModel, QModelIndex, QObject, QSettings, Qt, Signal, Slot
 from PySide6.QtGui import QKeyEvent
 
+from .mappings import DEFAULT_USER_MAPPINGS, ControllerMapping, MappingDatabase
+from .protocol import AXES, AXIS_SCALE, ControllerState, quantize_axis
+
+if TYPE_CHECKING:
+    from .latency import LatencyProbe
+    from .virtual import InputRecorder
+
+INPUT_EVENTS = (pygame.JOYAXISMOTION, pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP, pygame.JOYHATMOTION)
+DEVICE_EVENTS = (pygame.JOYDEVICEADDED, pygame.JOYDEVICEREMOVED)
+DEFAULT_PILOT_SLOTS = 2
+MAX_PILOT_SLOTS = 8
+
 
 class ControllersManager(QObject):
-    def __init__(self, list_refresh_rate=1000):
+    """
+    Track the connected controllers and the state of the pilots controllers.
+
+    Joysticks are read by a dedicated input thread blocking on SDL events: the pilots states are only rebuilt
+    when one of their axes, buttons or hats changes. Controllers are kept in a registry indexed by SDL instance ID,
+    updated when a device is added or removed.
+
+    Pilots are ``slots`` entries of parallel arrays (assigned controller ID, controller, state, response profile),
+    exposed to QML through the :class:`PilotsModel`. While the input thread runs, it is the only one updating them:
+    slot changes from QML and the state changes of the software controllers are posted to it.
+    """
+    def __init__(self, slots: int | None = None):
         super().__init__()
+        if slots is None:
+            slots = QSettings('EV3DriverStation').value('pilotSlots', DEFAULT_PILOT_SLOTS, int)
+        slots = max(1, min(MAX_PILOT_SLOTS, slots))
         self.keyboard_controller = Keyboard()
+        self.keyboard_controller.on_state_changed = self._software_state_changed
         self.controllers = []
-        self._pilot1ControllerId = None
-        self._pilot2ControllerId = None
-        self._pilot1State = ControllerState()
-        self._pilot1StateDict = None
-        self._pilot2State = ControllerState()
-        self._pilot2StateDict = None
-
-        self.list_refresh_timer = QTimer(self)
-        self.list_refresh_timer.timeout.connect(self.refresh_controllers_list)
-        self.state_refresh_timer = QTimer(self)
-        self.state_refresh_timer.setInterval(10)
-        self.state_refresh_timer.timeout.connect(self.refresh_pilot_controllers_state)
-
-        self._list_refresh_rate = list_refresh_rate
-        self._states = None
-        self._states_dirty = False
+        self._controllers_by_instance: dict[int, Controller] = {}
+        self.mappings = MappingDatabase.load(QSettings('EV3DriverStation').value('controllerMappings',
+                                                                                  DEFAULT_USER_MAPPINGS))
+        self.response_profiles = [ResponseProfile.load(i) for i in range(slots)]
+        self._pilot_controller_ids: list[int | None] = [None] * slots
+        self._pilot_controllers: list[Controller | None] = [None] * slots
+        self._pilot_states: list[ControllerState | None] = [None] * slots   # None when no controller is assigned
+        self._pilots_model = PilotsModel(self)
+        self.latency_probe: LatencyProbe | None = None
+        self.input_recorder: InputRecorder | None = None
+
+        self._input_thread: threading.Thread = None
+        self._wake_event_type = None
+        self._refresh_list_requested = threading.Event()
 
     def init_pygame(self):
+        if self._input_thread is not None:
+            return
+        ready = threading.Event()
+        self._input_thread = threading.Thread(target=self._input_run, args=(ready,), name="ControllersInput",
+                                              daemon=True)
+        self._input_thread.start()
+        ready.wait()
+
+    def quit_pygame(self):
+        thread = self._input_thread
+        if thread is None:
+            return
+        self._input_thread = None
+        self._wake_input_thread()
+        thread.join()
+
+    #==================#
+    #== Input Thread ==#
+    #==================#
+    def _input_run(self, ready: threading.Event):
+        # SDL events are read from the thread which initialized pygame
         pygame.init()
         pygame.joystick.init()
-        self.list_refresh_timer.start(self._list_refresh_rate)
-        self.state_refresh_timer.start()
+        self._wake_event_type = pygame.event.custom_type()
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed([*INPUT_EVENTS, *DEVICE_EVENTS, self._wake_event_type])
+        ready.set()
+
+        try:
+            self._refresh_controllers_list()
+            while self._input_thread is threading.current_thread():
+                event = pygame.event.wait()
+                if self._refresh_list_requested.is_set():
+                    self._refresh_list_requested.clear()
+                    self._refresh_controllers_list()
+                try:
+                    self._dispatch_input_events([event, *pygame.event.get()], time.monotonic())
+                except Exception:
+                    print("Error while reading controllers input")
+                    traceback.print_exc()
+        finally:
+            pygame.quit()
+
+    def _wake_input_thread(self, **attributes):
+        if self._wake_event_type is not None:
+            pygame.event.post(pygame.event.Event(self._wake_event_type, **attributes))
+
+    def _dispatch_input_events(self, events: list[pygame.event.Event], t: float):
+        """
+        Apply a batch of SDL events to the controllers raw state, then rebuild the state of the updated ones.
+        """
+        updated = {}
+        registry = None
+        # Applied once the registry is updated, in the order they were posted
+        pilot_changes = []
+        software_updated = []
+        sync_pilots = False
+        for event in events:
+            if event.type in INPUT_EVENTS:
+                controller = (self._controllers_by_instance if registry is None else registry).get(event.instance_id)
+                if controller is not None and controller.handle_event(event):
+                    updated[event.instance_id] = controller
+            elif event.type == pygame.JOYDEVICEADDED:
+                if registry is None:
+                    registry = dict(self._controllers_by_instance)
+                controller = self._open_controller(event.device_index)
+                if controller is not None:
+                    registry[controller.instance_id] = controller
+            elif event.type == pygame.JOYDEVICEREMOVED:
+                if registry is None:
+                    registry = dict(self._controllers_by_instance)
+                registry.pop(event.instance_id, None)
+            elif event.type == self._wake_event_type and hasattr(event, 'attach'):
+                if registry is None:
+                    registry = dict(self._controllers_by_instance)
+                if event.attach:
+                    registry[event.controller.instance_id] = event.controller
+                else:
+                    registry.pop(event.controller.instance_id, None)
+            elif event.type == self._wake_event_type and hasattr(event, 'rumble'):
+                self._rumble(*event.rumble)
+            elif event.type == self._wake_event_type and hasattr(event, 'pilot'):
+                pilot_changes.append(event.pilot)
+            elif event.type == self._wake_event_type and hasattr(event, 'state_changed'):
+                software_updated.append(event.state_changed)
+            elif event.type == self._wake_event_type and hasattr(event, 'sync'):
+                sync_pilots = True
+        if registry is not None:
+            self._set_controllers(registry)
+        for pilot, controller in pilot_changes:
+            self._set_pilot_controller(pilot, controller)
+        if sync_pilots:
+            self._sync_pilot_states()
+        for controller in updated.values():
+            controller.last_event_t = t
+            if controller.update_state():
+                self._controller_state_changed(controller)
+        for controller in software_updated:
+            self._controller_state_changed(controller)
+
+    def _software_state_changed(self, controller: Controller):
+        # State change callback of the keyboard and the virtual controllers, called from the GUI or their own thread
+        if self._input_thread is not None and threading.current_thread() is not self._input_thread:
+            self._wake_input_thread(state_changed=controller)
+        else:
+            self._controller_state_changed(controller)
+
+    def _controller_state_changed(self, controller: Controller):
+        probe, recorder = self.latency_probe, self.input_recorder
+        for pilot, pilot_controller in enumerate(self._pilot_controllers):
+            if pilot_controller is not controller:
+                continue
+            state = self.response_profiles[pilot].apply(controller.state)
+            if state != self._pilot_states[pilot]:
+                self._set_pilot_state(pilot, state)
+                if probe is not None:
+                    probe.input_changed(pilot, state, controller.last_event_t)
+                if recorder is not None:
+                    # Recorded before shaping: a replay goes through the response curves of its pilot again
+                    recorder.input_changed(pilot, controller.state, controller.last_event_t)
+
+    def _request_pilot_states_sync(self):
+        if self._input_thread is not None:
+            self._wake_input_thread(sync=True)
+        else:
+            self._sync_pilot_states()
 
-    def quit_pygame(self):
-        pygame.quit()
+    def _sync_pilot_states(self):
+        for pilot, controller in enumerate(self._pilot_controllers):
+            state = None if controller is None else self.response_profiles[pilot].apply(controller.state)
+            if state != self._pilot_states[pilot]:
+                self._set_pilot_state(pilot, state)
+
+    def _set_pilot_state(self, pilot: int, state: ControllerState | None):
+        self._pilot_states[pilot] = state
+        self._pilots_model.mark_rows_dirty((pilot,))
 
     #===================#
     #== Refresh Slots ==#
     #===================#
     @Slot()
     def refresh_controllers_list(self):
-        # Remember previous controllers guid
-        previousGuid = {j.guid for j in self.controllers}
-        pilotsGuid = self.get_pilot_controllers_guid()
-
-        # Update detected controllers
-        joysticks = []
-        for i in range(pygame.joystick.get_count()):
-            try:
-                joystick = pygame.joystick.Joystick(i)
-                joystick.init()
-                joystick.get_name() 
-                # I had a weird crash here when hibernating the computer with a controller plugged in
-                # and then waking it up with the controller unplugged.
-                # Pygame still register the controller but get_name() crashes without exception...
-            except pygame.error:
-                pass
+        if self._input_thread is not None:
+            # Joysticks are only accessed from the input thread
+            self._refresh_list_requested.set()
+            self._wake_input_thread()
+        else:
+            self._refresh_controllers_list()
+
+    def attach_controller(self, controller: Controller):
+        """
+        Add a controller which is not enumerated by SDL (e.g. backed by a :class:`VirtualJoystick`, or a
+        ``VirtualController``) to the registry.
+        """
+        if hasattr(controller, 'on_state_changed'):
+            # Software controllers notify their state changes themselves
+            controller.on_state_changed = self._software_state_changed
+        self._update_registry(controller, attach=True)
+
+    def detach_controller(self, controller: Controller):
+        self._update_registry(controller, attach=False)
+
+    def _update_registry(self, controller: Controller, attach: bool):
+        if self._input_thread is not None:
+            # Sent through the SDL queue to stay ordered with the input events of the controller
+            self._wake_input_thread(attach=attach, controller=controller)
+        else:
+            registry = dict(self._controllers_by_instance)
+            if attach:
+                registry[controller.instance_id] = controller
             else:
-                joysticks.append(Controller(joystick))
+                registry.pop(controller.instance_id, None)
+            self._set_controllers(registry)
+
+    def _refresh_controllers_list(self):
+        """
+        Enumerate all the joysticks (on startup and when requested from QML: device events keep the list up to date).
+        """
+        registry = {}
+        for i in range(pygame.joystick.get_count()):
+            controller = self._open_controller(i)
+            if controller is not None:
+                registry[controller.instance_id] = controller
+        self._set_controllers(registry)
+
+    def _open_controller(self, device_index: int) -> Controller | None:
+        try:
+            joystick = pygame.joystick.Joystick(device_index)
+            controller = self._controllers_by_instance.get(joystick.get_instance_id())
+            if controller is not None:
+                return controller
+            joystick.init()
+            joystick.get_name()
+            # I had a weird crash here when hibernating the computer with a controller plugged in
+            # and then waking it up with the controller unplugged.
+            # Pygame still register the controller but get_name() crashes without exception...
+        except pygame.error:
+            return None
+        return Controller(joystick, self.mappings.resolve(joystick, device_index))
+
+    def _set_controllers(self, registry: dict[int, Controller]):
+        """
+        Replace the controllers registry: lost pilot controllers are unassigned and new ones fill the empty slots.
+        """
+        previous = self._controllers_by_instance
+        lost = [c for instance_id, c in previous.items() if instance_id not in registry]
+        new = sorted((c for instance_id, c in registry.items() if instance_id not in previous),
+                     key=lambda c: (c.guid, c.instance_id))
+        names_changed = bool(lost or new)
+        for controller in lost:
+            controller.close()
+
+        # Remove lost controllers and assign new ones to empty slots
+        pilots = [None if c is None or (c is not self.keyboard_controller and c.instance_id not in registry) else c
+                  for c in self._pilot_controllers]
+        for i, c in enumerate(pilots):
+            if c is None and new:
+                pilots[i] = new.pop(0)
 
         # Sort by GUID to keep the same order
-        self.controllers = sorted(joysticks, key=lambda j: j.guid) 
-
-        # Update current controllers
-        currentGuid = [j.guid for j in self.controllers]
-        lostGuid = previousGuid - set(currentGuid)
-        newGuid = set(currentGuid) - previousGuid
-
-        if lostGuid or newGuid:
+        self._controllers_by_instance = registry
+        self.controllers = sorted(registry.values(), key=lambda c: (c.guid, c.instance_id))
+        if names_changed:
             self.namesChanged.emit()
 
-        # Remove lost controllers
-        pilotsGuid = [None if guid in lostGuid else guid for guid in pilotsGuid]
-
-        # Assign new controllers to empty slots
-        for i, guid in enumerate(pilotsGuid):
-            if not newGuid:
-                break
-            if guid is None:
-                pilotsGuid[i] = newGuid.pop()
-
-        # Translate pilot guid back to controller index
-        def guid2index(guid):
-            if guid is None:
-                return None
-            elif guid == "KEYBOARD":
-                return 0
-            try:
-                return currentGuid.index(guid) + 1
-            except ValueError:
-                return None
-
-        p1_id = guid2index(pilotsGuid[0])
-        p2_id = guid2index(pilotsGuid[1])
-
-        self.list_refresh_timer.start()
-
-        # Update QML
-        if self._pilot1ControllerId != p1_id:
-            self._pilot1ControllerId = p1_id
-            self.pilot1ControllerIdChanged.emit()
-        if self._pilot2ControllerId != p2_id:
-            self._pilot2ControllerId = p2_id
-            self.pilot2ControllerIdChanged.emit()
-
-    @Slot()
-    def refresh_pilot_controllers_state(self):
-        p1 = self.pilot1Controller
-        p2 = self.pilot2Controller
-        if p1 is None and p2 is None:
-            return
+        # Controllers indexes may have shifted even if the pilots kept their controller
+        self._set_pilot_controller_ids([self._controller_index(c) for c in pilots], all_rows=names_changed)
 
-        p1LastState = self._pilot1State
-        p2LastState = self._pilot2State
-
-        pygame.event.pump()
-        if p1 is not None:
-            p1State = p1.get_state(pump_event=False)
-            if p1State != p1LastState:
-                self._setPilot1State(p1State)
-        if p2 is not None:
-            p2State = p2.get_state(pump_event=False)
-            if p2State != p2LastState:
-                self._setPilot2State(p2State)
-        
-        self.state_refresh_timer.start()
+    def _controller_index(self, controller: Controller | None) -> int | None:
+        # Translate a pilot controller back to its controller ID
+        if controller is None:
+            return None
+        elif controller is self.keyboard_controller:
+            return 0
+        return self.controllers.index(controller) + 1
 
     @Slot(int, int)
     def set_pilot_controllerId(self, pilotId: int, controllerId: int):
-        if controllerId == -1:
-            controllerId = None
-        p1, p2 = self._pilot1ControllerId, self._pilot2ControllerId
+        if not 0 <= pilotId < self.slots:
+            return
+        # Resolved now, from the list displayed by QML: the IDs shift if a controller is plugged before it is applied
+        controller = None if controllerId == -1 else self.get_controller_by_id(controllerId)
+        if controller is None and controllerId != -1:
+            return
+        if self._input_thread is not None:
+            self._wake_input_thread(pilot=(pilotId, controller))
+        else:
+            self._set_pilot_controller(pilotId, controller)
+
+    def _set_pilot_controller(self, pilotId: int, controller: Controller | None):
+        if (controller is not None and controller is not self.keyboard_controller
+                and controller.instance_id not in self._controllers_by_instance):
+            # Unplugged in the meantime
+            return
+        controllers = list(self._pilot_controllers)
 
         # Swap controllers logic
-        if pilotId == 0:
-            if self._pilot2ControllerId == controllerId:
-                self._pilot2ControllerId = self._pilot1ControllerId
-            self._pilot1ControllerId = controllerId
-        elif pilotId == 1:
-            if self._pilot1ControllerId == controllerId:
-                self._pilot1ControllerId = self._pilot2ControllerId
-            self._pilot2ControllerId = controllerId
-
-        # Notify QML
-        if p1 != self._pilot1ControllerId:
-            self.pilot1ControllerIdChanged.emit()
-        if p2 != self._pilot2ControllerId:
-            self.pilot2ControllerIdChanged.emit()
+        current = next((i for i, c in enumerate(controllers) if c is controller), None)
+        if controller is not None and current is not None:
+            controllers[current] = controllers[pilotId]
+        controllers[pilotId] = controller
+        self._set_pilot_controller_ids([self._controller_index(c) for c in controllers])
+
+    def _set_pilot_controller_ids(self, ids: list[int | None], all_rows: bool = False):
+        changed = [i for i, (old, new) in enumerate(zip(self._pilot_controller_ids, ids, strict=True)) if old != new]
+        self._pilot_controller_ids = ids
+        self._pilot_controllers = [self.get_controller_by_id(i) for i in ids]
+        self._sync_pilot_states()
+        self._pilots_model.mark_rows_dirty(range(len(ids)) if all_rows else changed)
 
     #===========================#
     #== Controllers Accessors ==#
     #===========================#
     @property
-    def pilot1Controller(self) -> Controller | None:
-        return self.get_controller_by_id(self._pilot1ControllerId)
-
-    @property
-    def pilot2Controller(self) -> Controller | None:
-        return self.get_controller_by_id(self._pilot2ControllerId)
-
-    def get_pilot_controllers_states(self, refresh=True) -> tuple[ControllerState, ControllerState]:
-        if refresh:
-            self.refresh_pilot_controllers_state()
-        return (self._pilot1State, self._pilot2State)
+    def slots(self) -> int:
+        return len(self._pilot_controller_ids)
+
+    def get_pilot_controller(self, pilot: int) -> Controller | None:
+        return self._pilot_controllers[pilot]
+
+    def get_pilot_controllers_states(self) -> tuple[ControllerState | None, ...]:
+        """
+        Return the state of each pilot slot (None for the slots without controller).
+        """
+        return tuple(self._pilot_states)
+
+    def get_pilot_controllers_guid(self) -> list[str | None]:
+        return [None if c is None else c.guid for c in self._pilot_controllers]
+
+    @Slot(float, int)
+    def rumble(self, strength: float = 1., duration_ms: int = 500):
+        """
+        Rumble the pilots controllers (if they support it). Can be called from any thread.
+        """
+        if self._input_thread is not None:
+            # Joysticks are only accessed from the input thread
+            self._wake_input_thread(rumble=(strength, duration_ms))
+        else:
+            self._rumble(strength, duration_ms)
 
-    def get_pilot_controllers_guid(self) -> list[str, str]:
-        p1, p2 = self.pilot1Controller, self.pilot2Controller
-        p1_guid = None if p1 is None else p1.guid
-        p2_guid = None if p2 is None else p2.guid
-        return [p1_guid, p2_guid]
+    def _rumble(self, strength: float, duration_ms: int):
+        for controller in self._pilot_controllers:
+            if controller is not None:
+                controller.rumble(strength, duration_ms)
 
     def get_controller_by_id(self, controllerId: int | None) -> Controller | None:
-        if controllerId is None or  not (0 <= controllerId <= len(self.controllers)):
+        controllers = self.controllers     # Replaced, never modified, by the input thread
+        if controllerId is None or not (0 <= controllerId <= len(controllers)):
             return None
         if controllerId == 0:
             return self.keyboard_controller
-        return self.controllers[controllerId - 1]
+        return controllers[controllerId - 1]
 
     #====================#
     #== QML PROPERTIES ==#
     #====================#
-    # --- Pilot 1 controller --- #
-    pilot1ControllerIdChanged = Signal()
-    @Property(int, notify=pilot1ControllerIdChanged)
-    def pilot1ControllerId(self) -> int:
-        return self._pilot1ControllerId if self._pilot1ControllerId is not None else -1
-
-    @pilot1ControllerId.setter
-    def pilot1ControllerId(self, controllerId: int):
-        self.update_pilot_controller(0, controllerId)
-    
-
-    # --- Pilot 2 controller --- #
-    pilot2ControllerIdChanged = Signal()
-    @Property(int, notify=pilot2ControllerIdChanged)
-    def pilot2ControllerId(self)-> int:
-        return self._pilot2ControllerId if self._pilot2ControllerId is not None else -1
-
-    @pilot2ControllerId.setter
-    def pilot2ControllerId(self, controllerId: int):
-        self.update_pilot_controller(1, controllerId)
+    # --- Pilots --- #
+    @Property(QObject, constant=True)
+    def pilots(self) -> PilotsModel:
+        return self._pilots_model
 
     # --- Controllers names --- #
     namesChanged = Signal()
@@ -212,118 +388,236 @@ class ControllersManager(QObject):
     def names(self) ->list[str]:
         return [j.name for j in self.controllers]
 
-    # --- Controllers states --- #
-    pilot1StateChanged = Signal()
-    @Property(dict, notify=pilot1StateChanged)
-    def pilot1State(self):
-        if self._pilot1StateDict is None:
-            self._pilot1StateDict = self._pilot1State.as_dict()
-        return self._pilot1StateDict
-
-    def _setPilot1State(self, state: ControllerState):
-        self._pilot1State = state
-        self._pilot1StateDict = None
-        self.pilot1StateChanged.emit()
-
-    pilot2StateChanged = Signal()
-    @Property(dict, notify=pilot2StateChanged)
-    def pilot2State(self):
-        if self._pilot2StateDict is None:
-            self._pilot2StateDict = self._pilot2State.as_dict()
-        return self._pilot2StateDict
-
-    def _setPilot2State(self, state: ControllerState):
-        self._pilot2State = state
-        self._pilot2StateDict = None
-        self.pilot2StateChanged.emit()
-
-    @Property(bool, notify=pilot1StateChanged)
-    def isPilot1ControllerActive(self):
-        return not self._pilot1State.is_neutral()
-
-    @Property(bool, notify=pilot2StateChanged)
-    def isPilot2ControllerActive(self):
-        return not self._pilot2State.is_neutral()
-
-
-class ControllerState(NamedTuple):
-    leftX: float = 0
-    leftY: float = 0
-    rightX: float = 0
-    rightY: float = 0
-    leftTrigger: float = -1
-    rightTrigger: float = -1
-
-    A: bool = False
-    B: bool = False
-    X: bool = False
-    Y: bool = False
-    LeftBumper: bool = False
-    RightBumper: bool = False
-    Back: bool = False
-    Start: bool = False
-    LeftStick: bool = False
-    RightStick: bool = False
-    Left: bool = False
-    Right: bool = False
-    Up: bool = False
-    Down: bool = False
-
-    @property
-    def axis(self) -> tuple[float, ...]:
-        return self[:6]
+    # --- Response curves --- #
+    responseCurvesChanged = Signal()
+    @Property(list, notify=responseCurvesChanged)
+    def responseCurves(self) -> list[dict[str, dict]]:
+        return [profile.to_dict() for profile in self.response_profiles]
+
+    @Slot(int, str, "QVariantMap")
+    def setAxisCurve(self, pilotId: int, axis: str, curve: dict):
+        """
+        Set the response curve of an axis of a pilot (missing parameters keep their current value).
+        """
+        profile = self.response_profiles[pilotId]
+        current = profile.curves[AXES.index(axis)]
+        profile = profile.with_curve(axis, AxisCurve.from_dict({**current.to_dict(), **curve}))
+        profile.save(pilotId)
+        self.response_profiles[pilotId] = profile
+        self.responseCurvesChanged.emit()
+        self._request_pilot_states_sync()
+        self._pilots_model.mark_rows_dirty((pilotId,))
+
+    @Slot(int)
+    def resetResponseCurves(self, pilotId: int):
+        profile = ResponseProfile()
+        profile.save(pilotId)
+        self.response_profiles[pilotId] = profile
+        self.responseCurvesChanged.emit()
+        self._request_pilot_states_sync()
+        self._pilots_model.mark_rows_dirty((pilotId,))
+
+
+class PilotsModel(QAbstractListModel):
+    """
+    List model of the pilot slots. Rows can be marked dirty from any thread (e.g. the controllers input thread):
+    ``dataChanged`` is emitted once per event loop iteration on the GUI thread.
+    """
+    ControllerIdRole = Qt.UserRole + 1
+    ControllerNameRole = Qt.UserRole + 2
+    StateRole = Qt.UserRole + 3
+    ActiveRole = Qt.UserRole + 4
+    IsKeyboardRole = Qt.UserRole + 5
+
+    ROLE_NAMES = {
+        ControllerIdRole: b'controllerId',
+        ControllerNameRole: b'controllerName',
+        StateRole: b'state',
+        ActiveRole: b'active',
+        IsKeyboardRole: b'isKeyboard',
+    }
+
+    def __init__(self, manager: ControllersManager):
+        super().__init__(manager)
+        self._manager = manager
+        self._state_dicts: dict[int, dict] = {}     # Cache of the QML state of each pilot, cleared when it changes
+        self._dirty_rows: set[int] = set()
+        self._dirty_lock = threading.Lock()
+        self._flushDirtyRows.connect(self.flush_dirty_rows, Qt.QueuedConnection)
+
+    def rowCount(self, parent: QModelIndex | None = None) -> int:
+        return 0 if parent is not None and parent.isValid() else self._manager.slots
+
+    def roleNames(self) -> dict[int, bytes]:
+        return self.ROLE_NAMES
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        manager = self._manager
+        pilot = index.row()
+        if not index.isValid() or not (0 <= pilot < manager.slots):
+            return None
+        controller_id = manager._pilot_controller_ids[pilot]
+        if role == self.ControllerIdRole:
+            return -1 if controller_id is None else controller_id
+        elif role == self.ControllerNameRole or role == Qt.DisplayRole:
+            controller = manager.get_pilot_controller(pilot)
+            return '' if controller is None else controller.name
+        elif role == self.StateRole:
+            state_dict = self._state_dicts.get(pilot)
+            if state_dict is None:
+                state = manager._pilot_states[pilot]
+                state_dict = (manager.response_profiles[pilot].neutral if state is None else state).as_dict()
+                self._state_dicts[pilot] = state_dict
+            return state_dict
+        elif role == self.ActiveRole:
+            state = manager._pilot_states[pilot]
+            return state is not None and not manager.response_profiles[pilot].is_neutral(state)
+        elif role == self.IsKeyboardRole:
+            return controller_id == 0
+        return None
+
+    _flushDirtyRows = Signal()
+    def mark_rows_dirty(self, rows):
+        """
+        Schedule a ``dataChanged`` notification for ``rows``. Thread-safe.
+        """
+        if not rows:
+            return
+        with self._dirty_lock:
+            schedule_flush = not self._dirty_rows
+            self._dirty_rows.update(rows)
+        if schedule_flush:
+            self._flushDirtyRows.emit()
 
-    @property
-    def buttons(self) -> tuple[bool, ...]:
-        return self[6:]
-
-    def buttons_as_int(self) -> int:
-        b = 0
-        b |= self.A << 0
-        b |= self.B << 1
-        b |= self.X << 2
-        b |= self.Y << 3
-
-        b |= self.LeftBumper << 4
-        b |= self.RightBumper << 5
-        b |= self.Back << 6
-        b |= self.Start << 7
-
-        b |= self.LeftStick << 9
-        b |= self.RightStick << 10
-
-        b |= self.Left << 16
-        b |= self.Right << 17
-        b |= self.Up << 18
-        b |= self.Down << 19
-
-        return b
-
-
-    def is_neutral(self) -> bool:
-        return self == ControllerState()
-
-    def with_deadzone(self, deadzone=.1) -> ControllerState:
-        return self._replace(
-            leftX=self.leftX if abs(self.leftX) > deadzone else 0,
-            leftY=self.leftY if abs(self.leftY) > deadzone else 0,
-            rightX=self.rightX if abs(self.rightX) > deadzone else 0,
-            rightY=self.rightY if abs(self.rightY) > deadzone else 0,
-            leftTrigger=self.leftTrigger if self.leftTrigger > deadzone-1 else -1,
-            rightTrigger=self.rightTrigger if self.rightTrigger > deadzone-1 else -1,
-        )
-
-    def is_same(self, other: ControllerState, axis_tolerance=.05) -> bool:
-        return  self.buttons == other.buttons and \
-                all(abs(a - b) <= axis_tolerance for a, b in zip(self.axis, other.axis, strict=True))
-
-    def as_dict(self) -> dict[str, float | bool]:
+    @Slot()
+    def flush_dirty_rows(self):
+        with self._dirty_lock:
+            rows, self._dirty_rows = sorted(self._dirty_rows), set()
+        if not rows:
+            return
+        for row in rows:
+            self._state_dicts.pop(row, None)
+        self.dataChanged.emit(self.index(rows[0]), self.index(rows[-1]))
+
+
+TRIGGERS = ('leftTrigger', 'rightTrigger')
+LUT_OFFSET = 128    # Quantized axis value -> index in the response curves lookup tables
+
+
+#=====================#
+#== Response Curves ==#
+#=====================#
+class AxisCurve(NamedTuple):
+    """
+    Response curve of an axis. Sticks are shaped around their center, triggers from their rest position (-1).
+    """
+    deadzone: float = .1    # Inputs closer than this to the rest position are sent as the rest position
+    expo: float = 0.        # Blend between a linear (0) and a cubic (1) response
+    scale: float = 1.       # Output gain (the result is clamped to the axis range)
+    invert: bool = False
+    remap: bool = False     # Triggers only: send [0, 1] instead of [-1, 1] (the rest position becomes 0)
+
+    @classmethod
+    def from_dict(cls, d: dict) -> AxisCurve:
+        return cls(deadzone=float(d.get('deadzone', .1)), expo=float(d.get('expo', 0.)),
+                   scale=float(d.get('scale', 1.)), invert=_to_bool(d.get('invert', False)),
+                   remap=_to_bool(d.get('remap', False)))
+
+    def to_dict(self) -> dict:
         return self._asdict()
 
+    def shape(self, x: float, trigger: bool = False) -> float:
+        """
+        Shape an axis value in [-1, 1].
+        """
+        if trigger:
+            t = 0. if x + 1 <= self.deadzone else (x + 1) / 2      # Trigger course in [0, 1]
+            t = (1 - self.expo) * t + self.expo * t ** 3
+            t = max(0., min(1., t * self.scale))
+            if self.invert:
+                t = 1 - t
+            return t if self.remap else 2 * t - 1
+        if abs(x) <= self.deadzone:
+            return 0.
+        x = (1 - self.expo) * x + self.expo * x ** 3
+        x = max(-1., min(1., x * self.scale))
+        return -x if self.invert else x
+
+    def compile(self, trigger: bool = False) -> tuple[int, ...]:
+        """
+        Compile the curve into a 256 entries lookup table indexed by ``quantized_value + LUT_OFFSET``.
+        """
+        return tuple(quantize_axis(self.shape(max(-AXIS_SCALE, min(AXIS_SCALE, i - LUT_OFFSET)) / AXIS_SCALE,
+                                              trigger))
+                     for i in range(256))
+
+
+def _to_bool(v) -> bool:
+    # QSettings may return booleans as strings
+    return v in (True, 'true', 'True', 1, '1')
+
+
+class ResponseProfile:
+    """
+    Response curves of the 6 axes of a pilot, precompiled into lookup tables: shaping a state costs one table
+    index per axis.
+    """
+    __slots__ = ('curves', 'luts', 'neutral')
+
+    def __init__(self, curves: dict[str, AxisCurve] | None = None):
+        curves = curves or {}
+        self.curves = tuple(curves.get(axis, AxisCurve()) for axis in AXES)
+        self.luts = tuple(curve.compile(axis in TRIGGERS) for axis, curve in zip(AXES, self.curves, strict=True))
+        self.neutral = self.apply(ControllerState())
+
+    def __repr__(self):
+        return f"ResponseProfile({self.to_dict()})"
+
+    @classmethod
+    def from_dict(cls, d: dict) -> ResponseProfile:
+        return cls({axis: AxisCurve.from_dict(curve) for axis, curve in d.items() if axis in AXES})
+
+    def to_dict(self) -> dict[str, dict]:
+        return {axis: curve.to_dict() for axis, curve in zip(AXES, self.curves, strict=True)}
+
+    @classmethod
+    def load(cls, pilot: int) -> ResponseProfile:
+        saved = QSettings('EV3DriverStation').value('responseCurves', {}) or {}
+        return cls.from_dict(saved.get(str(pilot), {}))
+
+    def save(self, pilot: int):
+        settings = QSettings('EV3DriverStation')
+        saved = settings.value('responseCurves', {}) or {}
+        saved[str(pilot)] = self.to_dict()
+        settings.setValue('responseCurves', saved)
+
+    def with_curve(self, axis: str, curve: AxisCurve) -> ResponseProfile:
+        curves = dict(zip(AXES, self.curves, strict=True))
+        curves[axis] = curve
+        return ResponseProfile(curves)
+
+    def apply(self, state: ControllerState) -> ControllerState:
+        o = LUT_OFFSET
+        lx, ly, rx, ry, lt, rt = state.axes
+        l0, l1, l2, l3, l4, l5 = self.luts
+        axes = (l0[lx + o], l1[ly + o], l2[rx + o], l3[ry + o], l4[lt + o], l5[rt + o])
+        return state if axes == state.axes else ControllerState(axes, state.buttons)
+
+    def is_neutral(self, state: ControllerState) -> bool:
+        return state == self.neutral
+
 
 class Controller:
-    def __init__(self, joystick: pygame.joystick.Joystick):
+    def __init__(self, joystick: pygame.joystick.Joystick, mapping: ControllerMapping | None = None):
         self.joystick = joystick
+        self.last_event_t: float | None = None     # time.monotonic() of the last input event
+        if joystick is not None:
+            self.mapping = mapping if mapping is not None else MappingDatabase().resolve(joystick)
+            self.instance_id = joystick.get_instance_id()
+            self._axes = [joystick.get_axis(i) for i in range(joystick.get_numaxes())]
+            self._buttons = [bool(joystick.get_button(i)) for i in range(joystick.get_numbuttons())]
+            self._hats = [joystick.get_hat(i) for i in range(joystick.get_numhats())]
+            self.state = self.get_state()
 
     @property
     def name(self) -> str:
@@ -332,93 +626,56 @@ class Controller:
     @property
     def guid(self) -> str:
         return self.joystick.get_guid()
+
+    def rumble(self, strength: float, duration_ms: int):
+        try:
+            self.joystick.rumble(strength, strength, duration_ms)
+        except pygame.error:
+            pass
+
+    def close(self):
+        try:
+            self.joystick.quit()
+        except pygame.error:
+            pass
     
-    def get_state(self, pump_event=True) -> ControllerState:
-        if pump_event:
-            pygame.event.pump()
-
-        hats = [self.joystick.get_hat(i) for i in range(self.joystick.get_numhats())]
-        buttons = [self.joystick.get_button(i) for i in range(self.joystick.get_numbuttons())]
-        axes = [self.joystick.get_axis(i) for i in range(self.joystick.get_numaxes())]
-
-        if len(buttons) in (16, 17) and len(hats) == 0:
-            # PS5 / PS4 controller
-            state = ControllerState(
-                leftX=axes[0],
-                leftY=axes[1],
-                rightX=axes[2],
-                rightY=axes[3],
-                leftTrigger=axes[4],
-                rightTrigger=axes[5],
-                
-                A=buttons[0],
-                B=buttons[1],
-                X=buttons[2],
-                Y=buttons[3],
-                LeftBumper=buttons[9],
-                RightBumper=buttons[10],
-                Back=buttons[4],
-                Start=buttons[6],
-                LeftStick=buttons[7],
-                RightStick=buttons[8],
-                Left=buttons[13],
-                Right=buttons[14],
-                Up=buttons[11],
-                Down=buttons[12],
-            )
-        elif hats:
-            # Default Xbox controller
-            state = ControllerState(
-                leftX=axes[0],
-                leftY=axes[1],
-                rightX=axes[2],
-                rightY=axes[3],
-                leftTrigger=axes[4],
-                rightTrigger=axes[5],
-
-                A=buttons[0],
-                B=buttons[1],
-                X=buttons[2],
-                Y=buttons[3],
-                LeftBumper=buttons[4],
-                RightBumper=buttons[5],
-                Back=buttons[6],
-                Start=buttons[7],
-                LeftStick=buttons[8],
-                RightStick=buttons[9],
-                Left=hats[0][0]<0,
-                Right=hats[0][0]>0,
-                Up=hats[0][1]>0,
-                Down=hats[0][1]<0,
-            )
-        else:
-            state = ControllerState(
-                    leftX=axes[0],
-                    leftY=axes[1],
-                    rightX=axes[2],
-                    rightY=axes[3],
-                    leftTrigger=axes[4],
-                    rightTrigger=axes[5],
-
-                    A=buttons[0],
-                    B=buttons[1],
-                    X=buttons[2],
-                    Y=buttons[3],
-                    LeftBumper=buttons[4],
-                    RightBumper=buttons[5],
-                    Back=buttons[6],
-                    Start=buttons[7],
-                    LeftStick=buttons[8],
-                    RightStick=buttons[9],
-                )
-        return state.with_deadzone()
+    def handle_event(self, event: pygame.event.Event) -> bool:
+        """
+        Update the raw axes, buttons and hats from an SDL input event of this joystick.
+        """
+        try:
+            if event.type == pygame.JOYAXISMOTION:
+                self._axes[event.axis] = event.value
+            elif event.type == pygame.JOYHATMOTION:
+                self._hats[event.hat] = event.value
+            else:
+                self._buttons[event.button] = event.type == pygame.JOYBUTTONDOWN
+        except IndexError:
+            return False
+        return True
+
+    def update_state(self) -> bool:
+        """
+        Rebuild the controller state from its raw inputs. Return True if it changed.
+        """
+        state = self.get_state()
+        if state == self.state:
+            return False
+        self.state = state
+        return True
+
+    def get_state(self) -> ControllerState:
+        # Deadzones are applied by the pilots response curves
+        return ControllerState.from_fields(self.mapping.read(self._axes, self._buttons, self._hats))
 
 
 class Keyboard(Controller):
     def __init__(self, axes_strength=1):
         super().__init__(None)
+        self.instance_id = None
         self.axes_strength = axes_strength
         self.state = ControllerState()
+        self.on_state_changed = None
 
     @property
     def name(self) -> str:
@@ -427,8 +684,14 @@ class Keyboard(Controller):
     @property
     def guid(self) -> str:
         return "KEYBOARD"
+
+    def rumble(self, strength: float, duration_ms: int):
+        pass
+
+    def close(self):
+        pass
     
-    def get_state(self, pump_event=True) -> ControllerState:
+    def get_state(self) -> ControllerState:
         return self.state
 
     def key_event(self, event: QKeyEvent):
@@ -442,7 +705,7 @@ class Keyboard(Controller):
             v = getattr(s, axis)
             v += self.axes_strength * (1 if positiveKey else -1) * (1 if press else -1)
             v = max(-self.axes_strength, min(self.axes_strength, v))
-            return s._replace(**{axis: v})
+            return s.with_values(**{axis: v})
 
         match event.key():
             case Qt.Key_Right | Qt.Key_Left:
@@ -455,43 +718,132 @@ class Keyboard(Controller):
                 s = update_axis('leftY', event.key() == Qt.Key_S)
 
             case Qt.Key_Z:
-                s = s._replace(leftTrigger=self.axes_strength if press else -1)
+                s = s.with_values(leftTrigger=self.axes_strength if press else -1)
             case Qt.Key_C:
-                s = s._replace(rightTrigger=self.axes_strength if press else -1)
+                s = s.with_values(rightTrigger=self.axes_strength if press else -1)
             
             case Qt.Key_B:
-                s = s._replace(A=press)
+                s = s.with_values(A=press)
             case Qt.Key_H:
-                s = s._replace(B=press)
+                s = s.with_values(B=press)
             case Qt.Key_G:
-                s = s._replace(X=press)
+                s = s.with_values(X=press)
             case Qt.Key_Y:
-                s = s._replace(Y=press)
+                s = s.with_values(Y=press)
             case Qt.Key_Q:
-                s = s._replace(LeftBumper=press)
+                s = s.with_values(LeftBumper=press)
             case Qt.Key_E:
-                s = s._replace(RightBumper=press)
+                s = s.with_values(RightBumper=press)
             case Qt.Key_Insert:
-                s = s._replace(Back=press)
+                s = s.with_values(Back=press)
             case Qt.Key_Delete:
-                s = s._replace(Start=press)
+                s = s.with_values(Start=press)
             case Qt.Key_X:
-                s = s._replace(LeftStick=press)
+                s = s.with_values(LeftStick=press)
             case Qt.Key_M:
-                s = s._replace(RightStick=press)
+                s = s.with_values(RightStick=press)
 
             case Qt.Key_J:
-                s = s._replace(Left=press)
+                s = s.with_values(Left=press)
             case Qt.Key_L:
-                s = s._replace(Right=press)
+                s = s.with_values(Right=press)
             case Qt.Key_I:
-                s = s._replace(Up=press)
+                s = s.with_values(Up=press)
             case Qt.Key_K:
-                s = s._replace(Down=press)
+                s = s.with_values(Down=press)
                 
             case _:
                 return False
 
-        self.state = s
+        if s != self.state:
+            self.state = s
+            self.last_event_t = time.monotonic()
+            if self.on_state_changed is not None:
+                self.on_state_changed(self)
         return True
-        
\ No newline at end of file
+        
+
+
+class VirtualJoystick:
+    """
+    Stand-in for a ``pygame.joystick.Joystick`` whose inputs are set programmatically (benchmarks, virtual pilots).
+    """
+    def __init__(self, name: str = "Virtual Joystick", guid: str = "virtual", instance_id: int = -1,
+                 num_axes: int = 6, num_buttons: int = 11, num_hats: int = 1):
+        self.name, self.guid, self.instance_id = name, guid, instance_id
+        self.axes = [0.] * 4 + [-1.] * (num_axes - 4)
+        self.buttons = [False] * num_buttons
+        self.hats = [(0, 0)] * num_hats
+
+    def get_name(self) -> str:
+        return self.name
+
+    def get_guid(self) -> str:
+        return self.guid
+
+    def get_instance_id(self) -> int:
+        return self.instance_id
+
+    def get_numaxes(self) -> int:
+        return len(self.axes)
+
+    def get_numbuttons(self) -> int:
+        return len(self.buttons)
+
+    def get_numhats(self) -> int:
+        return len(self.hats)
+
+    def get_axis(self, i: int) -> float:
+        return self.axes[i]
+
+    def get_button(self, i: int) -> bool:
+        return self.buttons[i]
+
+    def get_hat(self, i: int) -> tuple[int, int]:
+        return self.hats[i]
+
+    def rumble(self, low_frequency: float, high_frequency: float, duration: int) -> bool:
+        return False
+
+    def quit(self):
+        pass
+
+
+#===============#
+#== Benchmark ==#
+#===============#
+def benchmark_state_loop(duration: float = 60, poll_rate: int = 100, send_rate: int = 50):
+    """
+    Measure the CPU cost of the controller hot path: ``poll_rate`` state updates per second (an SDL axis event
+    applied, the state rebuilt and shaped by the response curves) and ``send_rate`` sends per second (tolerance
+    comparison and packet encoding), over ``duration`` seconds of simulated input.
+    """
+    controller = Controller(VirtualJoystick())
+    profile = ResponseProfile({'leftY': AxisCurve(expo=.5), 'rightTrigger': AxisCurve(remap=True)})
+    polls = int(duration * poll_rate)
+    send_every = max(1, poll_rate // send_rate)
+    events = [pygame.event.Event(pygame.JOYAXISMOTION, instance_id=-1, axis=i % 4, value=math.sin(i / 50))
+              for i in range(polls)]
+
+    state = profile.neutral
+    last_sent = None
+    sent = 0
+    t0 = time.perf_counter()
+    for i, event in enumerate(events):
+        controller.handle_event(event)
+        if controller.update_state():
+            state = profile.apply(controller.state)
+        if i % send_every == 0:
+            if last_sent is None or not state.is_same(last_sent):
+                state.encode()
+                sent += 1
+            last_sent = state
+    elapsed = time.perf_counter() - t0
+
+    print(f"{polls} polls, {polls // send_every} send checks ({sent} packets encoded) in {elapsed * 1000:.1f} ms")
+    print(f"{elapsed / polls * 1e6:.2f} us per poll (including sends): {elapsed / duration * 100:.3f}% of one core")
+    return elapsed
+
+
+if __name__ == '__main__':
+    benchmark_state_loop()
@@ -0,0 +1,430 @@
+from __future__ import annotations
+
+__all__ = ["DriverStationCore"]
+
+import asyncio
+import traceback
+from collections.abc import Callable
+
+from .link import RefreshRates, SendSchedule, TelemetryLink, TelemetryRetryPolicy
+from .protocol import (
+    FULL_SCHEMA_FLAG,
+    HELLO_MESSAGE,
+    SCHEMA_DELTA_MARKER,
+    SCHEMA_MARKER,
+    UDP_RESPONSE_TIMEOUT,
+    UDP_ROBOT_PORT,
+    ControllerState,
+    DriverStationState,
+    ProgramStatus,
+    RobotMode,
+    RobotResponse,
+    RobotStatus,
+    TelemetryStore,
+)
+from .ssh import RobotConnectionError, RobotSSH
+
+SSH_REFRESH_PERIOD = 2  # s between two runs of DS.sh on the robot, which refresh its lock
+
+
+class DriverStationCore:
+    """
+    Qt-free driver station: the robot state, the pilots states and the telemetry, exchanged with the robot program
+    over UDP from an asyncio loop::
+
+        async with DriverStationCore('192.168.0.1') as ds:
+            ds.mode = RobotMode.TELEOP
+            ds.enabled = True
+            ds.set_pilot_state(0, ControllerState.from_values(leftY=-1))
+            await asyncio.sleep(2)
+
+    The packets follow the same :class:`RefreshRates` as the GUI (``refresh_period`` overrides the period while
+    enabled): they are sent at absolute deadlines of the loop monotonic clock, enable and mode changes immediately,
+    and pilot changes and telemetry edits ``min`` ms after the previous packet. Telemetry edits and resync requests
+    are handled by the same :class:`TelemetryLink` as the GUI.
+
+    If ``lock`` is true (the default for a remote robot), :meth:`connect` first opens the SSH link with the robot and
+    locks it like the GUI does, so that no other Driver Station drives it at the same time. The link is kept alive
+    (which refreshes the lock and ``robot_status``) until :meth:`close`.
+    """
+    def __init__(self, address: str = 'localhost', slots: int = 1, refresh_period: float | None = None,
+                 port: int = UDP_ROBOT_PORT, rates: RefreshRates | None = None,
+                 retry_policy: TelemetryRetryPolicy | None = None, lock: bool | None = None):
+        if lock is None:
+            lock = address not in ('localhost', '127.0.0.1')
+        self.address = address
+        self.port = port
+        self.program_status = ProgramStatus.IDLE
+        self.pilot_states: list[ControllerState | None] = [ControllerState()] + [None] * (slots - 1)
+        self.link = TelemetryLink(retry_policy)
+        self.robot_status: dict[str, str] = {}  # Status lines of DS.sh by code (V: voltage, C: current, L: CPU load)
+        self.skipped_frames = 0
+        self.frame_exec_time = 0
+        self.last_response_t: float | None = None
+        self._mode = RobotMode.TELEOP
+        self._enabled = False
+
+        self._schedule = SendSchedule(rates)
+        if refresh_period is not None:
+            self.refresh_period = refresh_period
+
+        self._telemetry_listeners: list[Callable[[dict[str, object]], None]] = []
+        self._telemetry_waiters: list[asyncio.Future] = []
+        self._value_waiters: dict[str, list[tuple[Callable, asyncio.Future]]] = {}    # name -> (predicate, waiter)
+
+        self._ssh = RobotSSH(address) if lock else None
+        self.host = address if self._ssh is None else self._ssh.host
+        self._ssh_task: asyncio.Task | None = None
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._transport: asyncio.DatagramTransport | None = None
+        self._program_running = asyncio.Event()
+        self._send_handle: asyncio.TimerHandle | None = None
+        self._next_send_t = 0.
+        self._watchdog_handle: asyncio.TimerHandle | None = None
+
+    @property
+    def telemetry(self) -> TelemetryStore:
+        return self.link.store
+
+    #===============#
+    #== Lifecycle ==#
+    #===============#
+    async def start(self):
+        """
+        Open the UDP socket and start sending (hello messages until the robot program answers).
+        """
+        if self._transport is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._transport, _ = await self._loop.create_datagram_endpoint(lambda: _CoreProtocol(self),
+                                                                       remote_addr=(self.host, self.port))
+        self._schedule_send(self._loop.time())
+
+    async def connect(self, timeout: float | None = 10):
+        """
+        Lock the robot if required, start the core and wait for the robot program to run.
+        Raise :class:`RobotConnectionError` if the robot can't be locked, TimeoutError if the program doesn't answer
+        in time.
+        """
+        if self._ssh is not None and self._ssh_task is None:
+            await asyncio.get_running_loop().run_in_executor(None, self._ssh.connect)
+            self._ssh_task = asyncio.create_task(self._ssh_keep_alive())
+        await self.start()
+        try:
+            await asyncio.wait_for(self._program_running.wait(), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"The robot program at {self.address} didn't answer.") from None
+
+    async def close(self):
+        """
+        Disable the robot, send a last neutral packet, close the socket and release the robot lock.
+        """
+        if self._transport is not None:
+            self._enabled = False
+            self.pilot_states = [None if s is None else ControllerState() for s in self.pilot_states]
+            self._send()
+            for handle in (self._send_handle, self._watchdog_handle):
+                if handle is not None:
+                    handle.cancel()
+            self._transport.close()
+            self._transport = None
+        if self._ssh_task is not None:
+            self._ssh_task.cancel()
+            await asyncio.gather(self._ssh_task, return_exceptions=True)
+            self._ssh_task = None
+            await asyncio.get_running_loop().run_in_executor(None, self._ssh.close)
+
+    async def __aenter__(self) -> DriverStationCore:
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _ssh_keep_alive(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                # The program status is read from the UDP responses
+                _, self.robot_status = await loop.run_in_executor(None, self._ssh.refresh_status)
+            except TimeoutError as e:
+                print(e)
+            except RobotConnectionError as e:
+                print(f"Connection with the robot lost: {e.message}")
+                return
+            await asyncio.sleep(SSH_REFRESH_PERIOD)
+
+    #=================#
+    #== Robot State ==#
+    #=================#
+    @property
+    def mode(self) -> RobotMode:
+        return self._mode
+
+    @mode.setter
+    def mode(self, value: RobotMode):
+        if value != self._mode:
+            self._enabled = False
+            self._mode = RobotMode(value)
+            self.send_now()
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value: bool):
+        if value != self._enabled:
+            self._enabled = value
+            self.send_now()
+
+    def set_pilot_state(self, slot: int, state: ControllerState | None):
+        if state != self.pilot_states[slot]:
+            self.pilot_states[slot] = state
+            self._state_changed()
+
+    async def wait_program_running(self, timeout: float | None = None):
+        await asyncio.wait_for(self._program_running.wait(), timeout)
+
+    #=============#
+    #== Sending ==#
+    #=============#
+    @property
+    def refresh_period(self) -> float:
+        """
+        Period (s) of the packets while the robot is enabled.
+        """
+        return self._schedule.rates.teleop.max / 1000
+
+    @refresh_period.setter
+    def refresh_period(self, value: float):
+        period = round(value * 1000)
+        self._schedule.rates = self._schedule.rates.set('auto', max=period).set('teleop', max=period)
+
+    @property
+    def period(self) -> float:
+        """
+        Period (s) of the packets in the current robot state.
+        """
+        return self._schedule.current.max / 1000
+
+    def send_now(self):
+        """
+        Send the current state now, and restart the periodic schedule from this packet.
+        """
+        if self._transport is None:
+            return
+        # The refresh rates depend on the program status, the mode and whether the robot is enabled
+        if self.program_status != ProgramStatus.RUNNING:
+            robot_status = RobotStatus.IDLE
+        else:
+            robot_status = RobotStatus.ENABLED if self._enabled else RobotStatus.DISABLED
+        self._schedule.update_mode(robot_status, self._mode)
+        now = self._loop.time()
+        self._send()
+        self._schedule.sent(now)
+        self._schedule_send(self._schedule.heartbeat_deadline(now))
+
+    def _state_changed(self):
+        """
+        Send a pilot state change or a telemetry edit as soon as the refresh rates allow.
+        """
+        if self._transport is None:
+            return
+        deadline = self._schedule.change_deadline(self._loop.time())
+        if deadline is not None and deadline < self._next_send_t:
+            self._schedule_send(deadline)
+
+    def _schedule_send(self, deadline: float | None):
+        if self._send_handle is not None:
+            self._send_handle.cancel()
+        if deadline is None:
+            self._next_send_t, self._send_handle = float('inf'), None
+        else:
+            self._next_send_t = deadline
+            self._send_handle = self._loop.call_at(deadline, self._send_tick)
+
+    def _send_tick(self):
+        self._send()
+        # Next deadline on the absolute schedule (the send cost doesn't accumulate), skipping the missed ones
+        self._schedule.sent(self._next_send_t)
+        self._schedule_send(self._schedule.heartbeat_deadline(self._loop.time()))
+
+    def _send(self):
+        try:
+            self._transport.sendto(self.encode_packet())
+        except OSError as e:
+            print(f"Impossible to send UDP message: {e}")
+
+    def encode_packet(self) -> bytes:
+        if self.program_status == ProgramStatus.IDLE:
+            return HELLO_MESSAGE
+        state = DriverStationState(tuple(self.pilot_states), self._enabled, self._mode)
+        mode = state.encode_mode()
+        if self.link.take_full_schema_request():
+            mode |= FULL_SCHEMA_FLAG
+        return bytes((mode,)) + state.encode_controllers() + self.link.encode_update()[0]
+
+    #===============#
+    #== Receiving ==#
+    #===============#
+    def handle_response(self, data: bytes):
+        self.last_response_t = self._loop.time()
+        if self._watchdog_handle is not None:
+            self._watchdog_handle.cancel()
+        self._watchdog_handle = self._loop.call_later(UDP_RESPONSE_TIMEOUT, self._response_timed_out)
+
+        response = RobotResponse.decode(data)
+        if response.starting:
+            self._set_program_status(ProgramStatus.STARTING)
+        else:
+            if self.program_status != ProgramStatus.RUNNING:
+                # The robot program starts disabled
+                self._mode = response.mode or self._mode
+                self._enabled = False
+            self._set_program_status(ProgramStatus.RUNNING)
+
+        self.skipped_frames = response.skipped_frames
+        self.frame_exec_time = response.frame_exec_time
+        if response.telemetry:
+            try:
+                self._parse_telemetry(response.telemetry)
+            except Exception:
+                print("Error while parsing UDP telemetry data")
+                traceback.print_exc()
+                self.link.request_full_schema()
+        if self.link.has_pending_edits:
+            self.link.age_edits()
+
+    def _set_program_status(self, status: ProgramStatus):
+        if status == self.program_status:
+            return
+        self.program_status = status
+        if status == ProgramStatus.RUNNING:
+            self._program_running.set()
+        else:
+            self._program_running.clear()
+            self._enabled = False
+            self.link.set_store(TelemetryStore())
+        self.send_now()
+
+    def _response_timed_out(self):
+        self._watchdog_handle = None
+        self._set_program_status(ProgramStatus.IDLE)
+
+    #===============#
+    #== Telemetry ==#
+    #===============#
+    def _parse_telemetry(self, data: bytes):
+        link = self.link
+        if data[0] == SCHEMA_MARKER:
+            store = TelemetryLink.parse_schema(data[1:].decode('ascii'))
+            if store is not None:
+                link.set_store(store)
+                self._notify_telemetry(dict(zip(store.names, store.values, strict=True)))
+        elif data[0] == SCHEMA_DELTA_MARKER:
+            update = link.parse_delta(data[1:].decode('ascii'))
+            if update is not None:
+                link.set_store(*update)
+                store, redefined = update
+                self._notify_telemetry({store.names[i]: store.values[i] for i in redefined})
+        else:
+            store = link.store
+            received = link.receive_values(data, store)
+            if received.changed:
+                names, values = store.names, store.values
+                self._notify_telemetry({names[varID]: values[varID] for varID in received.changed})
+
+    def _notify_telemetry(self, changes: dict[str, object]):
+        for listener in list(self._telemetry_listeners):
+            try:
+                listener(changes)
+            except Exception:
+                traceback.print_exc()
+        waiters, self._telemetry_waiters = self._telemetry_waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(changes)
+        if self._value_waiters:
+            for name in self._value_waiters.keys() & changes.keys():
+                value = changes[name]
+                for predicate, waiter in self._value_waiters[name]:
+                    if waiter.done():
+                        continue
+                    try:
+                        if predicate(value):
+                            waiter.set_result(value)
+                    except Exception as e:
+                        waiter.set_exception(e)
+
+    def add_telemetry_listener(self, listener: Callable[[dict[str, object]], None]):
+        """
+        Call ``listener`` with the ``{name: value}`` of the variables changed by each robot response.
+        """
+        self._telemetry_listeners.append(listener)
+
+    def remove_telemetry_listener(self, listener: Callable[[dict[str, object]], None]):
+        self._telemetry_listeners.remove(listener)
+
+    async def wait_telemetry(self) -> dict[str, object]:
+        """
+        Wait for the next robot response changing some telemetry variables and return their ``{name: value}``.
+        """
+        waiter = asyncio.get_running_loop().create_future()
+        self._telemetry_waiters.append(waiter)
+        return await waiter
+
+    async def wait_until(self, name: str, predicate: Callable[[object], bool], timeout: float | None = None):
+        """
+        Wait until ``predicate(value)`` is true for the telemetry variable ``name`` and return its value.
+        The predicate is evaluated on the current value, then only when the robot reports a change of the variable.
+        Raise TimeoutError if the condition isn't met after ``timeout`` seconds.
+        """
+        store = self.telemetry
+        varID = store.ids.get(name)
+        if varID is not None and predicate(store.values[varID]):
+            return store.values[varID]
+
+        entry = (predicate, asyncio.get_running_loop().create_future())
+        self._value_waiters.setdefault(name, []).append(entry)
+        try:
+            return await asyncio.wait_for(entry[1], timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Timeout while waiting for the telemetry variable '{name}'.") from None
+        finally:
+            waiters = self._value_waiters[name]
+            waiters.remove(entry)
+            if not waiters:
+                del self._value_waiters[name]
+
+    def value(self, name: str):
+        store = self.telemetry
+        return store.values[store.ids[name]]
+
+    def send_value(self, name: str, value) -> bool:
+        """
+        Edit an editable telemetry variable. Return False if the variable is unknown, not editable, or if the value
+        is invalid (in which case the closest valid value is sent if any).
+        """
+        store = self.telemetry
+        varID = store.ids.get(name)
+        if varID is None:
+            return False
+        changed, valid = self.link.edit(varID, value, store)
+        if changed:
+            self._state_changed()
+        return valid
+
+
+class _CoreProtocol(asyncio.DatagramProtocol):
+    def __init__(self, core: DriverStationCore):
+        self.core = core
+
+    def datagram_received(self, data: bytes, addr):
+        if len(data) >= 3:
+            self.core.handle_response(data)
+
+    def error_received(self, exc: Exception):
+        # The robot port is closed (e.g. the robot program is not started yet): the watchdog handles it
+        pass
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+__all__ = ["LatencyProbe", "run_headless"]
+
+import collections
+import csv
+import json
+import random
+import socket
+import threading
+import time
+
+from .utils import WindowedStats, protect_bool_refcounts
+
+HISTOGRAM_BIN_MS = 2        # Width of the histogram bins
+HISTOGRAM_BINS = 50         # Number of bins (the last one also counts the latencies above the histogram range)
+MAX_SAMPLES = 100_000       # Samples kept for the exported report
+
+
+class LatencyProbe:
+    """
+    Measure the input-to-wire latency: the delay between an input event changing a pilot state and the first UDP
+    packet carrying that state (or a newer one).
+
+    :meth:`input_changed` is called with the time the input event was received (by the SDL input thread or the
+    keyboard handler) and :meth:`packet_sent` right after a packet left the socket. Both are thread-safe.
+    """
+    def __init__(self, window: float = 60, bin_ms: float = HISTOGRAM_BIN_MS, bins: int = HISTOGRAM_BINS):
+        self.bin_ms = bin_ms
+        self.stats = WindowedStats(window)
+        self.histogram = [0] * bins
+        self.samples: collections.deque[tuple[float, int, float]] = collections.deque(maxlen=MAX_SAMPLES)
+        self._lock = threading.Lock()
+        self._pending: dict[int, float] = {}    # Pilot -> time of the oldest input not sent yet
+        self._states: dict[int, object] = {}    # Pilot -> latest input state
+
+    def __len__(self):
+        return sum(self.histogram)
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+            self._states.clear()
+            self.stats.clear()
+            self.histogram = [0] * len(self.histogram)
+            self.samples.clear()
+
+    def input_changed(self, pilot: int, state, t: float):
+        with self._lock:
+            self._states[pilot] = state
+            self._pending.setdefault(pilot, t)
+
+    def packet_sent(self, states: tuple, t: float | None = None) -> bool:
+        """
+        Match a sent packet carrying the pilots ``states`` with the pending inputs. Return True if a latency was
+        measured.
+        """
+        if not self._pending:
+            return False
+        if t is None:
+            t = time.monotonic()
+        measured = False
+        with self._lock:
+            for pilot, t_input in list(self._pending.items()):
+                if pilot < len(states) and states[pilot] == self._states[pilot]:
+                    del self._pending[pilot]
+                    self._record(pilot, (t - t_input) * 1000, t)
+                    measured = True
+        return measured
+
+    def _record(self, pilot: int, latency_ms: float, t: float):
+        self.stats.put(latency_ms, t)
+        self.histogram[min(int(latency_ms / self.bin_ms), len(self.histogram) - 1)] += 1
+        self.samples.append((t, pilot, latency_ms))
+
+    #=============#
+    #== Reports ==#
+    #=============#
+    def report(self) -> dict:
+        return {
+            'count': len(self),
+            'window': self.stats.summary(0),
+            'histogram': {'bin_ms': self.bin_ms, 'counts': list(self.histogram)},
+        }
+
+    def export(self, path: str):
+        """
+        Export the report as JSON, or the raw samples (``time,pilot,latency_ms``) if ``path`` ends with ``.csv``.
+        """
+        with open(path, 'w', newline='') as f:
+            if path.endswith('.csv'):
+                writer = csv.writer(f)
+                writer.writerow(('time', 'pilot', 'latency_ms'))
+                writer.writerows(list(self.samples))
+            else:
+                json.dump(self.report(), f, indent=1)
+
+    def format_histogram(self, width: int = 40) -> str:
+        counts = self.histogram
+        last = max((i for i, c in enumerate(counts) if c), default=-1)
+        if last < 0:
+            return "No latency measured yet"
+        peak = max(counts)
+        lines = []
+        for i, count in enumerate(counts[:last + 1]):
+            label = f"{i * self.bin_ms:>4g}-{(i + 1) * self.bin_ms:<4g}ms"
+            if i == len(counts) - 1:
+                label = f"{i * self.bin_ms:>4g}+     ms"
+            lines.append(f"{label} {'#' * round(count / peak * width):<{width}} {count}")
+        s = self.stats.summary(0)
+        lines.append(f"p50: {s['p50']:.1f}ms   p95: {s['p95']:.1f}ms   p99: {s['p99']:.1f}ms   max: {s['max']:.1f}ms")
+        return "\n".join(lines)
+
+
+#===================#
+#== Headless Mode ==#
+#===================#
+class _RobotStub(threading.Thread):
+    """
+    Minimal robot answering the driver station UDP messages on localhost (running in teleop, no telemetry).
+    """
+    def __init__(self, port: int):
+        super().__init__(name="RobotStub", daemon=True)
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(('127.0.0.1', port))
+        self.socket.settimeout(.1)
+        self.running = True
+        self.received: collections.deque[tuple[float, int]] = collections.deque(maxlen=MAX_SAMPLES)  # (t, mode)
+
+    def run(self):
+        while self.running:
+            try:
+                data, addr = self.socket.recvfrom(2048)
+            except socket.timeout:
+                continue
+            self.received.append((time.monotonic(), data[0]))
+            self.socket.sendto(b'\x02\x00\x00', addr)
+
+    def stop(self):
+        self.running = False
+        self.join()
+        self.socket.close()
+
+
+def run_headless(duration: float = 10, input_rate: float = 20, report_path: str | None = None) -> LatencyProbe:
+    """
+    Measure the latency without GUI nor physical controller: a virtual joystick moved ``input_rate`` times per
+    second feeds the SDL input thread, and the driver station sends to a robot stub on localhost.
+
+    Raise RuntimeError if the robot couldn't be enabled: the packets of a disabled robot are only sent at the idle
+    rate, which would be reported as latency.
+    """
+    import pygame
+    from PySide6.QtCore import QCoreApplication, QSettings, QTimer
+
+    from .controllers import Controller, ControllersManager, VirtualJoystick
+    from .network import UDP_ROBOT_PORT, RobotNetwork
+    from .robot import ProgramStatus, Robot, RobotMode
+    from .telemetry import Telemetry
+
+    protect_bool_refcounts()
+    owns_app = QCoreApplication.instance() is None
+    app = QCoreApplication([]) if owns_app else QCoreApplication.instance()
+    robot_stub = _RobotStub(UDP_ROBOT_PORT)
+    robot_stub.start()
+
+    probe = LatencyProbe(window=duration + 1)
+    controllers = ControllersManager()
+    controllers.latency_probe = probe
+    controllers.init_pygame()
+    joystick = VirtualJoystick(name="Latency probe")
+    controllers.attach_controller(Controller(joystick))
+
+    settings = QSettings('EV3DriverStation')
+    saved_address = settings.value('robotAddress', '')
+    robot = Robot(controllers.keyboard_controller)
+    network = RobotNetwork(robot, controllers, Telemetry(), address='localhost')
+    settings.setValue('robotAddress', saved_address)
+    robot.mode = RobotMode.TELEOP
+
+    def start_measure():
+        # The stub answers the hello message from the UDP listener thread: the program status is polled on the main
+        # thread, and the robot is enabled once the program is running and measured from there
+        if robot.programStatus == ProgramStatus.RUNNING:
+            start_timer.stop()
+            robot.enabled = True
+            probe.clear()
+
+    start_timer = QTimer()
+    start_timer.timeout.connect(start_measure)
+    start_timer.start(10)
+
+    def move_stick():
+        value = random.uniform(-1, 1)
+        pygame.event.post(pygame.event.Event(pygame.JOYAXISMOTION, instance_id=joystick.instance_id, axis=0,
+                                             value=value))
+
+    input_timer = QTimer()
+    input_timer.timeout.connect(move_stick)
+    input_timer.start(round(1000 / input_rate))
+    QTimer.singleShot(round(duration * 1000), app.quit)
+    try:
+        app.exec()
+        enabled = robot.enabled
+    finally:
+        # Stop every thread before shutting the application down, so the interpreter exits cleanly
+        start_timer.stop()
+        input_timer.stop()
+        network.close()
+        controllers.quit_pygame()
+        robot_stub.stop()
+        if owns_app:
+            app.shutdown()
+
+    if not enabled:
+        raise RuntimeError("The robot was not enabled during the measure: no latency reported.")
+    print(probe.format_histogram())
+    if report_path is not None:
+        probe.export(report_path)
+    return probe
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure the input-to-wire latency with a virtual joystick.")
+    parser.add_argument('--duration', type=float, default=10, help="Duration of the measure (s)")
+    parser.add_argument('--rate', type=float, default=20, help="Virtual stick movements per second")
+    parser.add_argument('--report', help="Export the report to this file (.json or .csv)")
+    args = parser.parse_args()
+    run_headless(args.duration, args.rate, args.report)
@@ -0,0 +1,377 @@
+from __future__ import annotations
+
+__all__ = ["TelemetryLink", "TelemetryRetryPolicy", "ReceivedValues", "SendSchedule", "Rates", "RefreshRates"]
+
+import struct
+import threading
+import time
+from typing import NamedTuple
+
+from .protocol import (
+    SCHEMA_DELTA_MARKER,
+    SCHEMA_MARKER,
+    RobotMode,
+    RobotStatus,
+    TelemetryStore,
+    TelemetryVarTransmissionState,
+    TelemetryVarType,
+    _array_equal,
+)
+
+RESYNC_RETRY_DELAY = 0.5    # Delay (s) before requesting again the definition of missing variables
+
+
+#===============#
+#== Telemetry ==#
+#===============#
+class TelemetryRetryPolicy(NamedTuple):
+    retry_after: int = 2    # Robot responses without acknowledgement before an edit is sent again
+    max_attempts: int = 5   # Transmissions before giving up on an edit (0: retry forever)
+
+
+class PendingEdit:
+    __slots__ = ('attempts', 'responses')
+
+    def __init__(self):
+        self.attempts = 0
+        self.responses = 0
+
+
+class ReceivedValues(NamedTuple):
+    values: list[tuple[int, object]]    # (varID, value) of each variable received (edits not acknowledged excluded)
+    changed: list[int]                  # Variables whose value changed
+    states: list[int]                   # Variables whose transmission state changed
+
+
+class TelemetryLink:
+    """
+    Telemetry state exchanged with the robot program, shared by the GUI :class:`Telemetry` and the
+    :class:`DriverStationCore`: the store, the edits waiting for the robot acknowledgement, and the resync requests
+    of the variables received but not defined yet.
+
+    Edits go through CHANGED -> IN_TRANSMISSION -> TRANSMITTED, and back to CHANGED when the robot doesn't
+    acknowledge them after ``retry_policy.retry_after`` responses (TRANSMISSION_MISSED once ``max_attempts`` is
+    reached). Methods are thread-safe. They take the store they apply to (the current one by default), so a caller
+    holding a snapshot of the store never mixes two schemas; they return the variables whose transmission state
+    changed.
+    """
+    def __init__(self, retry_policy: TelemetryRetryPolicy | None = None):
+        self.retry_policy = retry_policy if retry_policy is not None else TelemetryRetryPolicy()
+        self.store = TelemetryStore()
+        self._lock = threading.Lock()
+        self._dirty_edits: dict[int, PendingEdit] = {}       # varID -> edit waiting to be sent
+        self._in_flight_edits: dict[int, PendingEdit] = {}   # varID -> edit sent but not acknowledged yet
+        self._missing_ids: set[int] = set()
+        self._resync_requested_at: float | None = None
+        self._full_schema_requested = False
+
+    # --- Schema --- #
+    @staticmethod
+    def parse_schema(text: str) -> TelemetryStore | None:
+        """
+        Build a store from the YAML schema sent by the robot (None if the schema is empty).
+        """
+        if not text:
+            return TelemetryStore()
+        # Loaded with the first schema
+        import yaml
+        schema = yaml.safe_load(text)
+        return None if schema is None else TelemetryStore.from_schema(schema)
+
+    def parse_delta(self, text: str) -> tuple[TelemetryStore, list[int]] | None:
+        """
+        Apply the YAML schema delta sent by the robot in answer to a resync request to the current store. Return the
+        updated store and the redefined variables, or None if the delta is empty or doesn't apply to the current
+        schema version (in which case the full schema is requested).
+        """
+        if not text:
+            return None
+        import yaml
+        delta = yaml.safe_load(text)
+        if not delta:
+            return None
+        try:
+            return self.store.apply_delta(delta)
+        except ValueError as e:
+            print(f"Invalid telemetry schema delta ({e}), requesting the full schema.")
+            self.request_full_schema()
+            return None
+
+    def set_store(self, store: TelemetryStore, redefined: list[int] | None = None):
+        """
+        Replace the telemetry schema. If ``redefined`` is given, ``store`` is an update of the current schema where
+        only these variables changed: the pending edits and resync requests of the other variables are kept.
+        """
+        with self._lock:
+            if redefined is None:
+                self._dirty_edits.clear()
+                self._in_flight_edits.clear()
+                self._missing_ids.clear()
+            else:
+                n = len(store)
+                self._dirty_edits = {i: e for i, e in self._dirty_edits.items() if i < n and i not in redefined}
+                self._in_flight_edits = {i: e for i, e in self._in_flight_edits.items()
+                                         if i < n and i not in redefined}
+                self._missing_ids.difference_update(redefined)
+            self._resync_requested_at = None
+            self.store = store
+
+    def request_full_schema(self):
+        self._full_schema_requested = True
+
+    def take_full_schema_request(self) -> bool:
+        """
+        Return True once if the full schema must be requested (with the mode byte of the next packet).
+        """
+        requested, self._full_schema_requested = self._full_schema_requested, False
+        return requested
+
+    # --- Receiving --- #
+    def receive_values(self, data: bytes, store: TelemetryStore | None = None) -> ReceivedValues:
+        """
+        Decode the telemetry values of a robot response into ``store``. The value received for a variable with a
+        pending edit is ignored, unless it acknowledges an edit in transmission.
+
+        A variable unknown or not decodable stops the decoding (the size of its value is unknown): its definition
+        is requested with the next packets, or the full schema if the robot doesn't support targeted resync.
+        """
+        if store is None:
+            store = self.store
+        types, lengths, values, states = store.types, store.lengths, store.values, store.states
+        received, changed, state_changed = [], [], []
+        data = bytes(data)
+        pos, size, n = 0, len(data), len(types)
+        missing = ()
+        with self._lock:
+            dirty, in_flight = self._dirty_edits, self._in_flight_edits
+            while pos < size and data[pos] < SCHEMA_DELTA_MARKER:
+                varID = data[pos]
+                if varID >= n:
+                    missing = range(n, varID + 1)
+                    break
+                length = lengths[varID]
+                try:
+                    value, pos = TelemetryVarType.decode(data, pos + 1, types[varID], length)
+                except (struct.error, ValueError, IndexError):
+                    # The robot definition of the variable probably changed
+                    missing = (varID,)
+                    break
+                unchanged = _array_equal(value, values[varID]) if length else value == values[varID]
+                if varID in dirty or varID in in_flight:
+                    # Don't overwrite a pending edit with the value the robot had before receiving it
+                    if varID not in in_flight or not unchanged:
+                        continue
+                    del in_flight[varID]
+                elif not unchanged:
+                    values[varID] = value
+                    changed.append(varID)
+                if states[varID] is not TelemetryVarTransmissionState.TRANSMITTED:
+                    states[varID] = TelemetryVarTransmissionState.TRANSMITTED
+                    state_changed.append(varID)
+                received.append((varID, value))
+            if missing:
+                if store.version is None:
+                    self._full_schema_requested = True
+                else:
+                    self._missing_ids.update(missing)
+        return ReceivedValues(received, changed, state_changed)
+
+    def age_edits(self, store: TelemetryStore | None = None) -> list[int]:
+        """
+        Count one more robot response for each unacknowledged edit and reschedule the ones that timed out.
+        """
+        if not self._in_flight_edits:
+            return []
+        if store is None:
+            store = self.store
+        policy = self.retry_policy
+        aged = []
+        with self._lock:
+            for varID, edit in list(self._in_flight_edits.items()):
+                edit.responses += 1
+                if edit.responses < policy.retry_after:
+                    continue
+                del self._in_flight_edits[varID]
+                if policy.max_attempts and edit.attempts >= policy.max_attempts:
+                    # Give up: the next value received from the robot will overwrite the edit
+                    store.states[varID] = TelemetryVarTransmissionState.TRANSMISSION_MISSED
+                else:
+                    self._dirty_edits[varID] = edit
+                    store.states[varID] = TelemetryVarTransmissionState.CHANGED
+                aged.append(varID)
+        return aged
+
+    # --- Sending --- #
+    def edit(self, varID: int, value, store: TelemetryStore | None = None) -> tuple[bool, bool]:
+        """
+        Edit the value of the variable ``varID`` and schedule its transmission to the robot. Return whether the
+        value changed, and whether it was valid (if not, the closest valid value is used if any).
+        """
+        if store is None:
+            store = self.store
+        if not (0 <= varID < len(store)) or not store.editable[varID]:
+            return False, False
+        try:
+            value, valid = TelemetryVarType.validate(value, store.types[varID], store.lengths[varID])
+        except ValueError:
+            return False, False
+        if _array_equal(value, store.values[varID]) if store.lengths[varID] else value == store.values[varID]:
+            return False, valid
+
+        with self._lock:
+            store.values[varID] = value
+            store.states[varID] = TelemetryVarTransmissionState.CHANGED
+            self._in_flight_edits.pop(varID, None)
+            self._dirty_edits[varID] = PendingEdit()
+        return True, valid
+
+    def encode_update(self, store: TelemetryStore | None = None) -> tuple[bytes, list[int]]:
+        """
+        Encode the telemetry part of the next packet: the pending edits, followed by a resync request if some
+        variables received from the robot are unknown. Return it with the edited variables it sends.
+        """
+        if not self._dirty_edits and not self._missing_ids:
+            return b'', []
+        if store is None:
+            store = self.store
+        packet = bytearray()
+        with self._lock:
+            sent = list(self._dirty_edits)
+            for varID, edit in self._dirty_edits.items():
+                packet.append(varID)
+                packet.extend(TelemetryVarType.encode(store.values[varID], store.types[varID]))
+                store.states[varID] = TelemetryVarTransmissionState.IN_TRANSMISSION
+                edit.attempts += 1
+                edit.responses = 0
+                self._in_flight_edits[varID] = edit
+            self._dirty_edits.clear()
+            if self._missing_ids:
+                packet.extend(self._encode_resync_request(store))
+        return bytes(packet), sent
+
+    def _encode_resync_request(self, store: TelemetryStore) -> bytes:
+        """
+        Request the definition of the missing variables: ``255``, the known schema version (H), the number of
+        variables (B) and their IDs. The robot answers with a schema delta. Requests are repeated every
+        ``RESYNC_RETRY_DELAY`` seconds until the variables are defined.
+        """
+        now = time.monotonic()
+        if self._resync_requested_at is not None and now - self._resync_requested_at < RESYNC_RETRY_DELAY:
+            return b''
+        self._resync_requested_at = now
+        ids = sorted(self._missing_ids)[:255]
+        return bytes((SCHEMA_MARKER,)) + struct.pack('<HB', (store.version or 0) & 0xFFFF, len(ids)) + bytes(ids)
+
+    def clear_edits(self):
+        with self._lock:
+            self._dirty_edits.clear()
+            self._in_flight_edits.clear()
+
+    @property
+    def has_pending_edits(self) -> bool:
+        return bool(self._dirty_edits or self._in_flight_edits)
+
+
+#=====================#
+#== Send Scheduling ==#
+#=====================#
+class Rates(NamedTuple):
+    max: int = 30   # Longest interval (ms) between two packets, even if nothing changed (0: no periodic packet)
+    min: int = 0    # Interval (ms) after a packet from which state changes are sent (0: with the periodic packet)
+
+
+class RefreshRates(NamedTuple):
+    idle: Rates = Rates(1000, 1000)
+    disabled: Rates = Rates(200, 200)
+    auto: Rates = Rates(40)
+    teleop: Rates = Rates(50, 30)
+
+    def to_dict(self):
+        return {
+            'idle': (self.idle.max, self.idle.min),
+            'disabled': (self.disabled.max, self.disabled.min),
+            'auto': (self.auto.max, self.auto.min),
+            'teleop': (self.teleop.max, self.teleop.min)
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict):
+        d = {k: Rates(*v) for k, v in d.items()}
+        return cls(**d)
+
+    def set(self, mode, max=None, min=None):
+        d = dict()
+        if max is not None:
+            d['max'] = max
+        if min is not None:
+            d['min'] = min
+        if d:
+            return self._replace(**{mode: getattr(self, mode)._replace(**d)})
+        return self
+
+    @staticmethod
+    def mode_of(robot_status: RobotStatus, mode: RobotMode) -> str:
+        """
+        Name of the rates used for a robot state: ``idle`` (no program running), ``disabled``, ``auto`` or ``teleop``.
+        """
+        if robot_status == RobotStatus.ENABLED:
+            return 'auto' if mode == RobotMode.AUTO else 'teleop'
+        elif robot_status == RobotStatus.DISABLED:
+            return 'disabled'
+        return 'idle'
+
+
+class SendSchedule:
+    """
+    Deadlines of the packets sent to the robot, on the monotonic clock (s): a packet at least every ``max`` ms of
+    the rates of the current robot state, and the state changes sent no sooner than ``min`` ms after the previous
+    packet. Used by the QTimers of the GUI and by the asyncio loop of the core.
+    """
+    def __init__(self, rates: RefreshRates | None = None):
+        self.rates = rates if rates is not None else RefreshRates()
+        self.mode = 'idle'
+        self.last_sent_t: float | None = None
+
+    @property
+    def current(self) -> Rates:
+        return getattr(self.rates, self.mode)
+
+    def update_mode(self, robot_status: RobotStatus, mode: RobotMode) -> bool:
+        """
+        Select the rates of the robot state. Return True if they changed.
+        """
+        rates_mode = RefreshRates.mode_of(robot_status, mode)
+        if rates_mode == self.mode:
+            return False
+        self.mode = rates_mode
+        return True
+
+    def sent(self, t: float | None):
+        self.last_sent_t = t
+
+    def heartbeat_deadline(self, now: float) -> float | None:
+        """
+        Deadline of the next packet if nothing changes, on the absolute schedule of the previous packets (the missed
+        deadlines are skipped). None if no periodic packet is sent.
+        """
+        interval = self.current.max / 1000
+        if interval <= 0:
+            return None
+        if self.last_sent_t is None:
+            return now
+        deadline = self.last_sent_t + interval
+        if deadline < now:
+            deadline += interval * ((now - deadline) // interval + 1)
+        return deadline
+
+    def change_deadline(self, now: float) -> float | None:
+        """
+        Time from which a state change is sent ahead of the periodic packet, or None if the rates don't allow it
+        (``min`` is 0 or not shorter than ``max``).
+        """
+        rates = self.current
+        if not 0 < rates.min < rates.max:
+            return None
+        if self.last_sent_t is None:
+            return now
+        return max(now, self.last_sent_t + rates.min / 1000)
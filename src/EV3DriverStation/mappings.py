@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+__all__ = ["ControllerMapping", "MappingDatabase"]
+
+import os
+import platform
+import re
+
+import pygame
+
+DEFAULT_USER_MAPPINGS = os.path.join(os.path.expanduser('~'), 'EV3DriverStation', 'gamecontrollerdb.txt')
+
+# SDL GameController element -> ControllerState field, in ControllerState order
+SDL_ELEMENTS = {
+    'leftx': 'leftX',
+    'lefty': 'leftY',
+    'rightx': 'rightX',
+    'righty': 'rightY',
+    'lefttrigger': 'leftTrigger',
+    'righttrigger': 'rightTrigger',
+    'a': 'A',
+    'b': 'B',
+    'x': 'X',
+    'y': 'Y',
+    'leftshoulder': 'LeftBumper',
+    'rightshoulder': 'RightBumper',
+    'back': 'Back',
+    'start': 'Start',
+    'leftstick': 'LeftStick',
+    'rightstick': 'RightStick',
+    'dpleft': 'Left',
+    'dpright': 'Right',
+    'dpup': 'Up',
+    'dpdown': 'Down',
+}
+TRIGGERS = ('lefttrigger', 'righttrigger')
+AXES_COUNT = 6
+
+# Layouts used for joysticks unknown to SDL and to the user mappings
+_AXES_LAYOUT = 'leftx:a0,lefty:a1,rightx:a2,righty:a3,lefttrigger:a4,righttrigger:a5'
+_PLAYSTATION_LAYOUT = (_AXES_LAYOUT + ',a:b0,b:b1,x:b2,y:b3,back:b4,start:b6,leftstick:b7,rightstick:b8,'
+                       'leftshoulder:b9,rightshoulder:b10,dpup:b11,dpdown:b12,dpleft:b13,dpright:b14')
+_XBOX_LAYOUT = (_AXES_LAYOUT + ',a:b0,b:b1,x:b2,y:b3,leftshoulder:b4,rightshoulder:b5,back:b6,start:b7,'
+                'leftstick:b8,rightstick:b9')
+_XBOX_HAT_LAYOUT = _XBOX_LAYOUT + ',dpup:h0.1,dpright:h0.2,dpdown:h0.4,dpleft:h0.8'
+
+_SDL_PLATFORMS = {'Windows': 'Windows', 'Darwin': 'Mac OS X', 'Linux': 'Linux'}
+_BINDING_RE = re.compile(r'^(?P<half>[+-]?)'
+                         r'(?:(?P<kind>[ab])(?P<index>\d+)|h(?P<hat>\d+)\.(?P<mask>\d+))'
+                         r'(?P<invert>~?)$')
+
+# Compiled sources: (kind, index, arg)
+CONST, BUTTON, HAT, AXIS_BUTTON, AXIS, HALF_AXIS, HALF_AXIS_TRIGGER, BUTTON_AXIS = range(8)
+_HAT_DIRECTIONS = {1: (1, 1), 2: (0, 1), 4: (1, -1), 8: (0, -1)}     # SDL hat mask -> (hat tuple index, sign)
+
+
+class ControllerMapping:
+    """
+    Mapping of a joystick raw inputs to the :class:`ControllerState` fields, compiled from an SDL GameController
+    mapping into a flat table of ``(kind, index, arg)`` sources, one per field.
+    """
+    __slots__ = ('name', 'source', 'table')
+
+    def __init__(self, name: str, source: str, table: tuple[tuple[int, int, float], ...]):
+        self.name = name
+        self.source = source    # 'user', 'sdl' or 'default'
+        self.table = table
+
+    def __repr__(self):
+        return f"ControllerMapping({self.name!r}, {self.source})"
+
+    @classmethod
+    def compile(cls, mapping: dict[str, str], num_axes: int, num_buttons: int, num_hats: int,
+                name: str = '', source: str = 'user') -> ControllerMapping:
+        """
+        Compile an SDL mapping (``{'a': 'b0', 'leftx': 'a0', 'dpup': 'h0.1', ...}``). Bindings to inputs the joystick
+        doesn't have are ignored.
+        """
+        table = []
+        for i, element in enumerate(SDL_ELEMENTS):
+            is_axis = i < AXES_COUNT
+            rest = -1 if element in TRIGGERS else 0
+            table.append(cls._compile_binding(mapping.get(element, ''), is_axis, rest,
+                                              num_axes, num_buttons, num_hats))
+        return cls(name, source, tuple(table))
+
+    @staticmethod
+    def _compile_binding(binding: str, is_axis: bool, rest: int, num_axes: int, num_buttons: int, num_hats: int):
+        default = (CONST, 0, rest if is_axis else False)
+        m = _BINDING_RE.match(binding.strip())
+        if m is None:
+            return default
+        sign = -1 if (m['half'] == '-') != (m['invert'] == '~') else 1
+        if m['hat'] is not None:
+            hat, direction = int(m['hat']), _HAT_DIRECTIONS.get(int(m['mask']))
+            if hat >= num_hats or direction is None:
+                return default
+            j, hat_sign = direction
+            return (HAT, hat, j * 2 + (hat_sign > 0)) if not is_axis else default
+        index = int(m['index'])
+        if m['kind'] == 'b':
+            if index >= num_buttons:
+                return default
+            return (BUTTON_AXIS, index, rest) if is_axis else (BUTTON, index, 0)
+        if index >= num_axes:
+            return default
+        if not is_axis:
+            return (AXIS_BUTTON, index, sign)
+        if m['half']:
+            return (HALF_AXIS_TRIGGER if rest else HALF_AXIS, index, sign)
+        return (AXIS, index, sign)
+
+    def read(self, axes: list[float], buttons: list[bool], hats: list[tuple[int, int]]) -> list[float | bool]:
+        """
+        Return the values of the ControllerState fields read from the joystick raw inputs.
+        """
+        values = []
+        append = values.append
+        for kind, index, arg in self.table:
+            if kind == AXIS:
+                append(axes[index] * arg)
+            elif kind == BUTTON:
+                append(buttons[index])
+            elif kind == CONST:
+                append(arg)
+            elif kind == HAT:
+                v = hats[index][arg >> 1]
+                append(v > 0 if arg & 1 else v < 0)
+            elif kind == AXIS_BUTTON:
+                append(axes[index] * arg > .5)
+            elif kind == HALF_AXIS_TRIGGER:
+                append(2 * max(0., axes[index] * arg) - 1)
+            elif kind == HALF_AXIS:
+                append(max(0., axes[index] * arg))
+            else:   # BUTTON_AXIS
+                append(1. if buttons[index] else float(arg))
+        return values
+
+
+class MappingDatabase:
+    """
+    Resolve the mapping of each joystick from its GUID, once: the user mappings file takes precedence over SDL's
+    GameController database, and joysticks unknown to both use a default layout guessed from their inputs.
+    Compiled mappings are cached by GUID so a joystick plugged again is not resolved twice.
+    """
+    def __init__(self, user_mappings: dict[str, tuple[str, dict[str, str]]] | None = None):
+        self.user_mappings = user_mappings if user_mappings is not None else {}
+        self._cache: dict[str, ControllerMapping] = {}
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_USER_MAPPINGS) -> MappingDatabase:
+        """
+        Load the user mappings from a file in the SDL ``gamecontrollerdb.txt`` format (missing files are ignored).
+        """
+        try:
+            with open(path) as f:
+                return cls(cls.parse_mappings(f.read()))
+        except FileNotFoundError:
+            return cls()
+
+    @staticmethod
+    def parse_mappings(text: str) -> dict[str, tuple[str, dict[str, str]]]:
+        """
+        Parse SDL mapping lines (``GUID,name,element:binding,...``) for the current platform.
+        Return a dictionary ``{guid: (name, {element: binding})}``.
+        """
+        current_platform = _SDL_PLATFORMS.get(platform.system())
+        mappings = {}
+        for line in text.splitlines():
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            guid, name, *bindings = line.split(',')
+            mapping = dict(b.split(':', 1) for b in bindings if ':' in b)
+            mapping_platform = mapping.pop('platform', None)
+            if mapping_platform is None or mapping_platform == current_platform:
+                mappings[guid.lower()] = (name, mapping)
+        return mappings
+
+    def resolve(self, joystick: pygame.joystick.JoystickType, device_index: int | None = None) -> ControllerMapping:
+        guid = joystick.get_guid()
+        mapping = self._cache.get(guid)
+        if mapping is None:
+            mapping = self._compile(joystick, device_index)
+            self._cache[guid] = mapping
+        return mapping
+
+    def _compile(self, joystick: pygame.joystick.JoystickType, device_index: int | None) -> ControllerMapping:
+        counts = (joystick.get_numaxes(), joystick.get_numbuttons(), joystick.get_numhats())
+
+        user_mapping = self.user_mappings.get(joystick.get_guid().lower())
+        if user_mapping is not None:
+            name, mapping = user_mapping
+            return ControllerMapping.compile(mapping, *counts, name=name, source='user')
+
+        sdl_mapping = self._sdl_mapping(joystick, device_index)
+        if sdl_mapping is not None:
+            return ControllerMapping.compile(sdl_mapping, *counts, name=joystick.get_name(), source='sdl')
+
+        num_axes, num_buttons, num_hats = counts
+        if num_buttons in (16, 17) and num_hats == 0:
+            layout = _PLAYSTATION_LAYOUT
+        elif num_hats:
+            layout = _XBOX_HAT_LAYOUT
+        else:
+            layout = _XBOX_LAYOUT
+        mapping = dict(b.split(':', 1) for b in layout.split(','))
+        return ControllerMapping.compile(mapping, *counts, name=joystick.get_name(), source='default')
+
+    @staticmethod
+    def _sdl_mapping(joystick: pygame.joystick.JoystickType, device_index: int | None) -> dict[str, str] | None:
+        if device_index is None:
+            return None
+        # pygame._sdl2 is private: any missing module, missing function or unexpected result falls back to the
+        # default layouts instead of failing the hot-plug
+        try:
+            from pygame._sdl2 import controller
+            if not controller.get_init():
+                controller.init()
+                controller.set_eventstate(False)
+            if not controller.is_controller(device_index):
+                return None
+            mapping = controller.Controller(device_index).get_mapping()
+        except (ImportError, AttributeError, TypeError, ValueError, pygame.error):
+            return None
+        if not isinstance(mapping, dict) or not all(isinstance(v, str) for v in mapping.values()):
+            return None
+        return mapping
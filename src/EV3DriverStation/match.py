@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+__all__ = ["MatchPhase", "MatchSequencer", "MatchTransition", "DEFAULT_MATCH", "run_headless"]
+
+import time
+from typing import NamedTuple
+
+from PySide6.QtCore import Property, QObject, QSettings, Qt, QTimer, Signal, Slot
+
+from .robot import Robot, RobotMode, RobotStatus
+
+
+class MatchPhase(NamedTuple):
+    name: str
+    duration: float                         # Seconds
+    mode: RobotMode = RobotMode.TELEOP
+    enabled: bool = True
+    warnings: tuple[float, ...] = ()        # Seconds before the end of the phase at which a warning is raised
+
+    @classmethod
+    def from_dict(cls, d: dict) -> MatchPhase:
+        warnings = d.get('warnings', ())
+        if isinstance(warnings, (int, float, str)):
+            warnings = (warnings,)
+        return cls(name=str(d['name']), duration=float(d['duration']), mode=RobotMode(d.get('mode', 'Teleoperated')),
+                   enabled=str(d.get('enabled', True)).lower() not in ('false', '0'),
+                   warnings=tuple(float(w) for w in warnings))
+
+    def to_dict(self) -> dict:
+        return {'name': self.name, 'duration': self.duration, 'mode': self.mode.value, 'enabled': self.enabled,
+                'warnings': list(self.warnings)}
+
+
+DEFAULT_MATCH = (
+    MatchPhase("Autonomous", 30, RobotMode.AUTO),
+    MatchPhase("Transition", 8, RobotMode.TELEOP, enabled=False),
+    MatchPhase("Teleoperated", 120, RobotMode.TELEOP, warnings=(30, 10)),
+)
+
+
+class MatchTransition(NamedTuple):
+    name: str               # Name of the phase entered, of the warning raised, or "End"
+    t: float                # Scheduled time since the start of the match (s)
+    lateness_ms: float      # Delay between the scheduled time and the robot state actually changed
+
+
+class _MatchEvent(NamedTuple):
+    t: float
+    phase: int                      # Index of the phase entered (len(phases) for the end of the match)
+    warning: float | None = None    # Remaining time of the phase if the event is a warning
+
+
+class MatchSequencer(QObject):
+    """
+    Run a practice match: switch the robot mode and enable state at each phase of the timeline.
+
+    Every event is scheduled at an absolute deadline on the monotonic clock (so the errors don't accumulate from one
+    phase to the next), and armed as a single precise timer. The robot state changes trigger an immediate UDP send.
+    The lateness of each transition is logged and kept in :attr:`transitions`.
+    """
+    def __init__(self, robot: Robot, phases: tuple[MatchPhase, ...] | None = None):
+        super().__init__()
+        self.robot = robot
+        self._phases = tuple(phases) if phases is not None else self.load_phases()
+        self._events: list[_MatchEvent] = []
+        self._next_event = 0
+        self._t0: float | None = None
+        self.start_time: float | None = None     # Monotonic time of the start of the last match
+        self._phase_index: int | None = None
+        self.transitions: list[MatchTransition] = []
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._process_events)
+
+        self.robot.programStatus_changed.connect(self._program_status_changed)
+
+    @staticmethod
+    def load_phases() -> tuple[MatchPhase, ...]:
+        phases = QSettings('EV3DriverStation').value('matchPhases', None)
+        if not phases:
+            return DEFAULT_MATCH
+        try:
+            return tuple(MatchPhase.from_dict(p) for p in phases)
+        except (KeyError, TypeError, ValueError):
+            print("Invalid match phases in the settings, the default match is used.")
+            return DEFAULT_MATCH
+
+    @property
+    def phases(self) -> tuple[MatchPhase, ...]:
+        return self._phases
+
+    @phases.setter
+    def phases(self, phases: tuple[MatchPhase, ...]):
+        self.stopMatch()
+        self._phases = tuple(phases)
+        QSettings('EV3DriverStation').setValue('matchPhases', [p.to_dict() for p in self._phases])
+        self.duration_changed.emit(self.duration)
+
+    #====================#
+    #== QML PROPERTIES ==#
+    #====================#
+    running_changed = Signal(bool)
+    @Property(bool, notify=running_changed)
+    def running(self) -> bool:
+        return self._t0 is not None
+
+    phase_changed = Signal(str)
+    @Property(str, notify=phase_changed)
+    def phase(self) -> str:
+        if self._phase_index is None or self._phase_index >= len(self._phases):
+            return ""
+        return self._phases[self._phase_index].name
+
+    duration_changed = Signal(float)
+    @Property(float, notify=duration_changed)
+    def duration(self) -> float:
+        return sum(p.duration for p in self._phases)
+
+    alertRaised = Signal(str, str)
+    rumbleRequested = Signal(float, int)
+
+    @Slot()
+    def startMatch(self):
+        if self.robot.robotStatus == RobotStatus.IDLE or not self._phases:
+            return
+        self.stopMatch()
+        self._events = self._build_events()
+        self._next_event = 0
+        self.transitions = []
+        self.robot.suspend_auto_disable(True)
+        self._t0 = self.start_time = time.monotonic()
+        self.running_changed.emit(True)
+        self._process_events()
+
+    @Slot()
+    def stopMatch(self):
+        if self._t0 is None:
+            return
+        self._timer.stop()
+        self._t0 = None
+        self._set_phase(None)
+        self.robot.enabled = False
+        self.robot.suspend_auto_disable(False)
+        self.running_changed.emit(False)
+
+    #===================#
+    #== Match events ==#
+    #===================#
+    def _build_events(self) -> list[_MatchEvent]:
+        events = []
+        t = 0.
+        for i, phase in enumerate(self._phases):
+            events.append(_MatchEvent(t, i))
+            events.extend(_MatchEvent(t + phase.duration - w, i, w) for w in phase.warnings if 0 < w < phase.duration)
+            t += phase.duration
+        events.append(_MatchEvent(t, len(self._phases)))
+        events.sort(key=lambda e: (e.t, e.warning is not None))
+        return events
+
+    def _process_events(self):
+        if self._t0 is None:
+            return
+        # Run every event whose deadline is reached, then arm the timer for the next one
+        while self._next_event < len(self._events):
+            event = self._events[self._next_event]
+            deadline = self._t0 + event.t
+            remaining = deadline - time.monotonic()
+            if remaining > 0:
+                self._timer.start(max(0, int(remaining * 1000)))
+                return
+            self._next_event += 1
+            self._run_event(event, deadline)
+
+    def _run_event(self, event: _MatchEvent, deadline: float):
+        if event.phase >= len(self._phases):
+            self.robot.enabled = False
+            self._log_transition("End", event.t, deadline)
+            self.stopMatch()
+            self._log_summary()
+            return
+
+        phase = self._phases[event.phase]
+        if event.warning is not None:
+            message = f"{event.warning:g} s left"
+            self.alertRaised.emit(phase.name, message)
+            self.rumbleRequested.emit(1., 500)
+            self._log_transition(f"{phase.name} warning ({message})", event.t, deadline)
+            return
+
+        if self.robot.mode != phase.mode:
+            self.robot.mode = phase.mode
+        else:
+            self.robot.reset_timer()
+        self.robot.enabled = phase.enabled
+        self._set_phase(event.phase)
+        self._log_transition(phase.name, event.t, deadline)
+
+    def _set_phase(self, index: int | None):
+        if index != self._phase_index:
+            self._phase_index = index
+            self.phase_changed.emit(self.phase)
+
+    def _program_status_changed(self, status):
+        if self.robot.robotStatus == RobotStatus.IDLE:
+            self.stopMatch()
+
+    def _log_transition(self, name: str, t: float, deadline: float):
+        transition = MatchTransition(name, t, (time.monotonic() - deadline) * 1000)
+        self.transitions.append(transition)
+        print(f"Match: {name} at {t:.3f} s ({transition.lateness_ms:+.2f} ms)")
+
+    def _log_summary(self):
+        lateness = [abs(t.lateness_ms) for t in self.transitions]
+        if lateness:
+            print(f"Match: {len(lateness)} transitions, mean error {sum(lateness) / len(lateness):.2f} ms, "
+                  f"max error {max(lateness):.2f} ms")
+
+
+#===================#
+#== Headless Mode ==#
+#===================#
+def run_headless(phases: tuple[MatchPhase, ...] = DEFAULT_MATCH) -> list[tuple[MatchTransition, float | None]]:
+    """
+    Run a match without GUI against a robot stub on localhost. Return each transition with the delay (ms) between
+    its deadline and the first packet carrying the new robot mode received by the stub (None for warnings).
+    """
+    from PySide6.QtCore import QCoreApplication
+
+    from .controllers import ControllersManager
+    from .latency import _RobotStub
+    from .network import UDP_ROBOT_PORT, RobotNetwork
+    from .telemetry import Telemetry
+    from .utils import protect_bool_refcounts
+
+    protect_bool_refcounts()
+    owns_app = QCoreApplication.instance() is None
+    app = QCoreApplication([]) if owns_app else QCoreApplication.instance()
+    robot_stub = _RobotStub(UDP_ROBOT_PORT)
+    robot_stub.start()
+
+    controllers = ControllersManager()
+    settings = QSettings('EV3DriverStation')
+    saved_address = settings.value('robotAddress', '')
+    robot = Robot(controllers.keyboard_controller)
+    network = RobotNetwork(robot, controllers, Telemetry(), address='localhost')
+    settings.setValue('robotAddress', saved_address)
+    sequencer = MatchSequencer(robot, phases)
+
+    # Start the match once the stub answered the hello message, and quit when it ends
+    robot.programStarted.connect(sequencer.startMatch, Qt.QueuedConnection)
+    sequencer.running_changed.connect(lambda running: running or app.quit())
+    try:
+        app.exec()
+    finally:
+        # Stop every thread before shutting the application down, so the interpreter exits cleanly
+        network.close()
+        robot_stub.stop()
+        if owns_app:
+            app.shutdown()
+
+    # Match every phase transition with the first packet received after its deadline carrying the expected mode
+    modes = {RobotMode.AUTO: 1, RobotMode.TELEOP: 2, RobotMode.TEST: 3}
+    phases_by_name = {p.name: p for p in phases}
+    results = []
+    for transition in sequencer.transitions:
+        if transition.name == "End":
+            expected = 0
+        elif transition.name in phases_by_name:
+            phase = phases_by_name[transition.name]
+            expected = modes[phase.mode] if phase.enabled else 0
+        else:
+            results.append((transition, None))
+            continue
+        deadline = sequencer.start_time + transition.t
+        t = next((t for t, mode in robot_stub.received if t >= deadline and mode & 0x03 == expected), None)
+        results.append((transition, None if t is None else (t - deadline) * 1000))
+    return results
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a practice match against a robot stub on localhost.")
+    parser.add_argument('--scale', type=float, default=1, help="Scale the duration of the default match phases")
+    args = parser.parse_args()
+    results = run_headless(tuple(p._replace(duration=p.duration * args.scale,
+                                            warnings=tuple(w * args.scale for w in p.warnings))
+                                 for p in DEFAULT_MATCH))
+    for transition, wire_ms in results:
+        wire = "" if wire_ms is None else f", on the wire after {wire_ms:.2f} ms"
+        print(f"{transition.name:<40} {transition.t:8.3f} s  lateness {transition.lateness_ms:+.2f} ms{wire}")
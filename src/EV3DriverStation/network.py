@@ -2,35 +2,35 @@ from __future__ import annotations
 
 import ctypes
 import socket
-import struct
 import sys
 import threading
 import time
 import traceback
-from enum import Enum
-from os import path
-from typing import NamedTuple
-
-from fabric import Config as SSHConfig
-from fabric import Connection as SSHConnection
-from icmplib import ping
-from invoke.exceptions import CommandTimedOut
-from paramiko.ssh_exception import AuthenticationException, NoValidConnectionsError
-from PySide6.QtCore import Property, QObject, QSettings, QTimer, Signal, Slot
-
-from .controllers import ControllersManager, ControllerState
-from .robot import ProgramStatus, Robot, RobotMode, RobotStatus
-from .telemetry import Telemetry
+from datetime import datetime
+from os import makedirs, path
+from typing import TYPE_CHECKING
 
-UDP_ROBOT_PORT = 5005
+from PySide6.QtCore import Property, QObject, QSettings, QTimer, Signal, Slot
 
-WINDOWS_LINE_ENDING = b'\r\n'
-UNIX_LINE_ENDING = b'\n'
-LOCK_PATH = "robot.lock"
-SCRIPT_CWD = "/run/user/1000/"
+from .controllers import ControllersManager
+from .link import RefreshRates, SendSchedule
+from .protocol import (
+    FULL_SCHEMA_FLAG,
+    HELLO_MESSAGE,
+    UDP_RESPONSE_TIMEOUT,
+    UDP_ROBOT_PORT,
+    DriverStationState,
+    ProgramStatus,
+    RobotResponse,
+)
+from .robot import Robot
+from .ssh import ConnectionStatus, RobotConnectionError, RobotSSH, signal_strength
+from .telemetry import DEFAULT_RECORDINGS_DIR, Telemetry
+from .utils import RateCounter, WindowedStats
+
+if TYPE_CHECKING:
+    from .latency import LatencyProbe
 
-PING_TIMEOUT = 5 # s before robot is considered disconnected
-UDP_RESPONSE_TIMEOUT = 6 # s before program is considered crashed
 
 class RobotNetwork(QObject):
     def __init__(self, robot: Robot, controllers: ControllersManager, telemetry: Telemetry, 
@@ -52,7 +52,7 @@ class RobotNetwork(QObject):
 
         # SSH Communication
         self._ssh_thread: threading.Thread = None
-        self._ssh: SSHConnection = None
+        self._ssh: RobotSSH = None
         self._request_program_date = threading.Event()
         
         self.connectionFailed.connect(self.disconnectRobot)
@@ -61,10 +61,16 @@ class RobotNetwork(QObject):
 
         # Udp Communication
         self.udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._udp_listener_thread: threading.Thread | None = None
         self._mute_udp_refresh = False
 
-        self._last_udp_t = None
-        self._udp_avg_dt = 0
+        self._udp_dt_stats = WindowedStats(5)
+
+        # Packet and thread loop rates, displayed by the performance overlay
+        self.udp_sent_rate = RateCounter()
+        self.udp_received_rate = RateCounter()
+        self.udp_listener_rate = RateCounter()
+        self.ssh_loop_rate = RateCounter(window=20)
 
         self._min_udp_refresh_timer = QTimer(self)
         self._min_udp_refresh_timer.setSingleShot(True)
@@ -79,13 +85,16 @@ class RobotNetwork(QObject):
         self._udp_response_watchdog.timeout.connect(self._udp_response_watchdog_timedout)
         self._udp_response_watchdog.setInterval(UDP_RESPONSE_TIMEOUT*1000)
         self.clearUdpResponseWatchdog.connect(self._udp_response_watchdog.stop)
-        self._ask_full_telemetry = threading.Event()
 
-        self._udp_refresh_rates = RefreshRates()
-        self._udp_refresh_mode = None
-        self._update_udp_refresh_mode()
+        # Deadlines of the packets, shared with the DriverStationCore
+        self._udp_schedule = SendSchedule(RefreshRates())
+        self._udp_schedule.update_mode(self.robot.robotStatus, self.robot.mode)
+        self._set_udp_refresh_timers_intervals()
         self.robot.robotStatus_changed.connect(self._update_udp_refresh_mode)
         self.robot.mode_changed.connect(self._update_udp_refresh_mode)
+        # Send enable/disable and mode transitions (e.g. the auto-disable deadline) without waiting for the next tick
+        self.robot.robotStatus_changed.connect(self.udp_refresh)
+        self.robot.mode_changed.connect(self.udp_refresh)
 
         # Initialize connection
         if address is None:
@@ -102,29 +111,19 @@ class RobotNetwork(QObject):
 
         if self.robot.programStatus != ProgramStatus.IDLE:
             if udp_state is None:
-                udp_state = self.fetch_ds_state(refresh=False)
+                udp_state = self.fetch_ds_state()
             
-            mode = 0 if not udp_state.enabled else {
-                RobotMode.AUTO: 1,
-                RobotMode.TELEOP: 2,
-                RobotMode.TEST: 3
-            }[udp_state.mode]
+            mode = udp_state.encode_mode()
+            if self.telemetry.link.take_full_schema_request():
+                mode |= FULL_SCHEMA_FLAG
 
-            if self._ask_full_telemetry.is_set():
-                self._ask_full_telemetry.clear()
-                mode |= 0x80
-
-            message = mode.to_bytes(1, sys.byteorder)
-
-            for state in udp_state.contollers:
-                axis_msg = struct.pack("b"*6, *[int(a*125) for a in state.axis])
-                message += axis_msg + struct.pack("i", state.buttons_as_int())
+            message = mode.to_bytes(1, sys.byteorder) + udp_state.encode_controllers()
 
             message += self.telemetry.generate_udp_telemetry_update()
 
         else:
             # If no program is running, send a hello message asking for the full telemetry
-            message = b'\x88'
+            message = HELLO_MESSAGE
 
         try:
             self.udp_socket.sendto(message, (host, UDP_ROBOT_PORT))
@@ -133,6 +132,9 @@ class RobotNetwork(QObject):
             traceback.print_exc()
             return False
         else:
+            probe = self.controllers.latency_probe
+            if probe is not None and udp_state is not None and probe.packet_sent(udp_state.controllers):
+                self.inputLatency_changed.emit()
             if not self._udp_response_watchdog.isActive():
                 self._udp_response_watchdog.start()
             return True
@@ -142,36 +144,23 @@ class RobotNetwork(QObject):
         self.send_udp(udp_state)
 
     def parse_udp_response(self, response):
-        mode = response[0]
-        starting = (mode & 0x04) != 0
-
-        mode = mode & 0x03
-        if mode == 0:
-            enabled = False
-            mode = self.robot.mode
-        else:
-            enabled = True
-            mode = RobotMode.from_index(mode)
+        response = RobotResponse.decode(response)
 
-        if starting:
+        if response.starting:
             self.robot.set_program_status(ProgramStatus.STARTING)
         else:
             if self.robot.programStatus == ProgramStatus.IDLE:
-                self.robot.mode = mode
-                self.robot.enabled = enabled
+                self.robot.mode = response.mode or self.robot.mode
+                self.robot.enabled = response.enabled
             self.robot.set_program_status(ProgramStatus.RUNNING)
 
-        skipped_frame = int(response[1])
-        self.telemetry.put_skipped_frame(skipped_frame)
+        self.telemetry.put_skipped_frame(response.skipped_frames)
+        if response.frame_exec_time > 0:
+            self.telemetry.put_frame_exec_time(response.frame_exec_time)
 
-        frame_exec_time = int(response[2])
-        if frame_exec_time > 0:
-            self.telemetry.put_frame_exec_time(frame_exec_time)
-        
-        telemetry_data = response[3:]
+        telemetry_data = response.telemetry
         if telemetry_data:
-            if not self.telemetry.parse_udp_response(telemetry_data):
-                self._ask_full_telemetry.set()
+            self.telemetry.parse_udp_response(telemetry_data)
 
     clearUdpResponseWatchdog = Signal()
     def _udp_response_watchdog_timedout(self):
@@ -199,7 +188,8 @@ class RobotNetwork(QObject):
     def handleConnectionSuccess(self):
         self._set_connection_status(ConnectionStatus.CONNECTED)
         self.connectionSucceed.emit('localhost')
-        threading.Thread(target=self.listen_udp_run).start()
+        self._udp_listener_thread = threading.Thread(target=self.listen_udp_run, name="UdpListener")
+        self._udp_listener_thread.start()
 
 
     connectionFailed = Signal(str, str)
@@ -216,13 +206,17 @@ class RobotNetwork(QObject):
         self._set_signalStrength(0, 0)
         self.robot.set_program_status(ProgramStatus.IDLE)
         self.telemetry.clear()
-        self._udp_avg_dt = 0
-        self._last_udp_t = None
+        self._udp_dt_stats.clear()
+        self._udp_schedule.sent(None)
         self.udpAvgDt_changed.emit(0)
         self.disconnected.emit()
 
     def close(self):
         self.disconnectRobot(save_disconnect=False)
+        # The listener stops within its receive timeout once disconnected: wait for it before closing its socket
+        if self._udp_listener_thread is not None:
+            self._udp_listener_thread.join()
+            self._udp_listener_thread = None
         self.udp_socket.close()
 
     @Slot()
@@ -238,6 +232,7 @@ class RobotNetwork(QObject):
         if not self.muteUdpRefresh:
             self.tick_udp_avg_dt()
             succeed = self.send_udp(udp_state)
+            self.udp_sent_rate.tick()
             self._last_udp_state = udp_state
         else:
             succeed = True
@@ -246,17 +241,17 @@ class RobotNetwork(QObject):
             self.connectionLost.emit(self.robot_host, 'Impossible to send UDP message. See console for more details.')
             self.disconnectRobot()
         
-        self._set_udp_refresh_timers_intervals(minRate=self.minUdpRefreshRate, maxRate=self.maxUdpRefreshRate)
+        self._set_udp_refresh_timers_intervals()
 
 
-    def fetch_ds_state(self, refresh=True) -> DriverStationState:
-        pilot1, pilot2 = self.controllers.get_pilot_controllers_states(refresh=refresh)
-        return DriverStationState(controller1=pilot1, controller2=pilot2, 
-                        enabled=self.robot.enabled, mode=self.robot.mode)
+    def fetch_ds_state(self) -> DriverStationState:
+        return DriverStationState(controllers=self.controllers.get_pilot_controllers_states(),
+                                  enabled=self.robot.enabled, mode=self.robot.mode)
 
     def listen_udp_run(self):
         self.udp_socket.settimeout(0.1)
         while self._connection_status == ConnectionStatus.CONNECTED:
+            self.udp_listener_rate.tick()
             try:
                 data, addr = self.udp_socket.recvfrom(2048)
             except socket.timeout:
@@ -268,6 +263,7 @@ class RobotNetwork(QObject):
                 traceback.print_exc()
             else:
                 if addr[0] == self.robot_host or (addr[0] == '127.0.0.1' and self.robot_host=='localhost'):
+                    self.udp_received_rate.tick()
                     self.clearUdpResponseWatchdog.emit()
                     self.parse_udp_response(data)
 
@@ -298,20 +294,22 @@ class RobotNetwork(QObject):
         self._ssh = None
 
     def ssh_loop(self, address: str):
-        ssh = self.ssh_connect(address)
-
+        ssh = RobotSSH(address, on_status=self._set_connection_status)
         try:
-            if ssh is None:
+            try:
+                strength, avg_ping = ssh.connect()
+            except RobotConnectionError as e:
+                self.connectionFailed.emit(e.reason, e.message)
                 return
+            self._set_signalStrength(strength, avg_ping)
             self._ssh = ssh
 
             self.handleConnectionSuccess()
 
-            self.handleConnectionSuccess()
-
             lostConnexionReason = self.refresh_ssh_status()
 
             while not lostConnexionReason:
+                self.ssh_loop_rate.tick()
                 if not self.refresh_signal_strength():
                     lostConnexionReason = "Robot didn't respond to ping in time."
                     break
@@ -332,242 +330,47 @@ class RobotNetwork(QObject):
                 
                 time.sleep(1)
 
-            self.connectionLost.emit(self._ssh.host, lostConnexionReason)
+            self.connectionLost.emit(ssh.host, lostConnexionReason)
 
-        except SystemError:
+        except SystemExit:
             pass
         except Exception as e:
-            self.connectionLost.emit(self._ssh.host, 
+            self.connectionLost.emit(ssh.host, 
             'An error occured when communicating with the robot. Check the console for more details.')
             print("An error occured when communicating with the robot.", e)
             traceback.print_exc()
         finally:
-            if self._ssh is not None:
-                try:
-                    self._ssh.run('rm -f' + LOCK_PATH, hide=True, warn=True, timeout=5)
-                except Exception:
-                    pass
-                self._ssh.close()
-                self._ssh = None
-
-    def ssh_connect(self, host: str) -> SSHConnection | None:
-        MAX_LOCK_AGE = 10
-
-        # === Parse host address ===
-        if '@' in host:
-            username, host = host.split('@', 1)
-            if ':' in username:
-                username, password = username.split(':', 1)
-            else:
-                password = ''
-        else:
-            username = 'robot'
-            password = 'maker'
-        if ':' in host:
-            host, port = host.split(':', 1)
-        else:
-            port = '22'
-
-        # === Ping robot ===
-        self._set_connection_status(ConnectionStatus.PING)
-        strength, avg_ping = self.get_signal_strength(host)
-        if strength <= 0:
-            self.connectionFailed.emit(ConnectionFailedReason.UNREACHABLE, 
-                                       f"Address <i>{host}</i> doesn't respond to ping. "
-                                       "Check robot address and network quality.")
-            return None
-        else:
-            self._set_signalStrength(strength, avg_ping)
-        
-        # === Initiate SSH Connection ===
-        self._set_connection_status(ConnectionStatus.AUTH)
-        try:
-            config = SSHConfig(overrides={'sudo': {'password': password}})
-            ssh = SSHConnection(f"{username}@{host}:{port}", connect_timeout=30,
-                                connect_kwargs=dict(password= password),
-                                config=config)
-            ssh.open()
-        except TimeoutError:
-            self.connectionFailed.emit(ConnectionFailedReason.UNREACHABLE, 
-                                       f"Connection to <i>{host}</i> timed-out. (Robot might be to busy to respond...)")
-            return None
-        except NoValidConnectionsError:
-            self.connectionFailed.emit(ConnectionFailedReason.UNREACHABLE, 
-                                       f'<i>{host}:{port}</i> is not a EV3 robot. (Or ssh is disabled.)')
-            return None
-        except AuthenticationException:
-            self.connectionFailed.emit(ConnectionFailedReason.AUTH, f'Invalid authentication with credentials:'
-                                                                    f'"{username}:{password}".')
-            return None
-        except Exception:
-            msg = f'Error when connecting to the robot at <i>{username}:{password}@{host}:{port}</i>.'
-            print(msg)
-            traceback.print_exc()
-            self.connectionFailed.emit(ConnectionFailedReason.AUTH, msg+"\nCheck the console for more details.")
-            return None
-
-        def ssh_run(cmd):
-            return ssh.run(cmd, hide=True, warn=True, timeout=5)
-
-
-        try:
-            # === Check if robot is already connected to another Driver Station ===
-            self._set_connection_status(ConnectionStatus.CHECK_AVAILABLE)
-
-            def get_lock_date():
-                """
-                Read the date of the last modification of the lock file on the robot.
-                """
-                lock_stat = ssh_run(f'stat {SCRIPT_CWD+LOCK_PATH} -c %Y')
-                if lock_stat.exited != 0:
-                    return 0
-                return float(lock_stat.stdout)
-
-            # Read lock file and system date on the robot
-            lock_date = get_lock_date()
-            robot_date = float(ssh_run("date +%s").stdout)
-
-            # If the lock file is not older than MAX_LOCK_AGE...
-            if robot_date - lock_date <= MAX_LOCK_AGE:
-                self._set_connection_status(ConnectionStatus.WAIT_AVAILABLE)
-                time.sleep(MAX_LOCK_AGE)            # ...wait for MAX_LOCK_AGE seconds...
-                new_lock_date = get_lock_date()     # ...and check again the lock file date.
-                if new_lock_date != lock_date and new_lock_date != 0:
-                    # If the lock file has been modified, it means that another Driver Station is using the robot.
-                    # then read the hostname of the computer that locked the robot.
-                    lock_host = ssh_run("cat "+SCRIPT_CWD+LOCK_PATH).stdout.strip()
-                    if lock_host == '':
-                        lock_host = 'an unknown device'
-                    elif lock_host == socket.gethostname():
-                        lock_host = 'this computer. Another instance of EV3DriverStation is probably already started.'
-                    else:
-                        lock_host = f'<i>{lock_host}</i>'
-                    # Then, close the SSH connection and emit a signal to inform the user.
-                    ssh.close()
-                    self.connectionFailed.emit(ConnectionFailedReason.LOCKED, 
-                                                    f"The robot is already used by {lock_host}.")
-                    return None
-
-            # === Write lock file ===
-            ssh_run(f'echo "{socket.gethostname()}" > '+SCRIPT_CWD+LOCK_PATH)
-
-            # === Push DS.py script to the robot ===
-            self._set_connection_status(ConnectionStatus.SETUP)
-            if not self.push_ds_script(ssh):
-                ssh.close()
-                return None
-            
-        except SystemExit:
+            self._ssh = None
             ssh.close()
-            return None
-        except Exception as e:
-            ssh.close()
-            print("An error occured when connecting to the robot.")
-            traceback.print_exc()          
-            self.connectionFailed.emit(ConnectionFailedReason.RUNTIME, str(e))
-            return None
-
-        return ssh
-
-    def refresh_ssh_status(self) -> bool:
-        if not self._ssh.is_connected:
-            return "SSH connection with the robot has been lost."
 
+    def refresh_ssh_status(self) -> str | bool:
         try:
-            status = self._ssh.run(SCRIPT_CWD+'DS.sh', hide=True, warn=True, timeout=5)
+            program_status, status = self._ssh.refresh_status()
             if self._request_program_date.is_set():
                 self._request_program_date.clear()
-                program_date = self._ssh.run('cat version.txt 2>/dev/null', hide=True, warn=True, timeout=5)
-                if program_date.stdout:
-                    self.robot.set_program_date(program_date.stdout.strip())
-
-        except CommandTimedOut:
-            print("Timeout when running the SSH script.")
+                program_date = self._ssh.read_program_date()
+                if program_date:
+                    self.robot.set_program_date(program_date)
+        except TimeoutError as e:
+            print(e)
             return False
-        if status.stderr:
-            print("Error when running the SSH script:")
-            print(status.stderr)
-            return "SSH script returned an error."
-
-        telemetry_status = {}
-        for line in status.stdout.splitlines():
-            line = line.strip()
-            if not line:
-                continue
-
-            line_code, line_content = line[0], line[1:]
-            if line_code == 'S':
-                match line_content:
-                    case '0': 
-                        self.robot.set_program_status(ProgramStatus.IDLE)
-                    case '1': 
-                        self.robot.set_program_status(ProgramStatus.STARTING)
-                    case '2': 
-                        self.robot.set_program_status(ProgramStatus.RUNNING)
-            telemetry_status[line_code] = line_content
-
-        self.telemetry.refresh_robot_status(telemetry_status)
+        except RobotConnectionError as e:
+            return e.message
 
+        if program_status is not None:
+            self.robot.set_program_status(program_status)
+        self.telemetry.refresh_robot_status(status)
         return False
 
     def check_java_running(self) -> bool:
-        if self._ssh is None:
-            return False
-        status = self._ssh.run('pgrep java', hide=True, warn=True, timeout=5)
-        return status.stdout != ''
+        ssh = self._ssh
+        return ssh is not None and ssh.check_java_running()
 
     def refresh_signal_strength(self) -> bool:
-        strength, avg_ping = self.get_signal_strength(self._ssh.host)
+        strength, avg_ping = signal_strength(self._ssh.host)
         self._set_signalStrength(strength, avg_ping)
         return strength > 0
 
-    def get_signal_strength(self, host: str) -> bool:
-        ping_result = ping(host, count=3, interval=.1, timeout=PING_TIMEOUT)
-
-        if not ping_result.is_alive:
-            strength = 0
-        elif ping_result.max_rtt <= 30 and ping_result.packet_loss == 0:
-            strength = 5    # No packet loss and max ping < 30ms
-        elif ping_result.avg_rtt <= 30 and ping_result.packet_loss == 0:
-            strength = 4    # No packet loss and mean ping < 30ms
-        elif ping_result.avg_rtt <= 120 and ping_result.packet_loss <= 1:
-            strength = 3    # Packet loss <= 1/3 and mean ping < 120ms
-        elif ping_result.avg_rtt <= 500:
-            strength = 2    # Packet loss <= 2/3 and mean ping < 500ms
-        else:
-            strength = 1    # Packet loss <= 2/3 and mean ping >= 500ms
-        return strength, ping_result.avg_rtt
-
-    def push_ds_script(self, ssh):
-        local_path = path.join(path.abspath(path.dirname(__file__)), 'DS.sh')
-        # Ensure linux end of line
-        with open(local_path, 'rb') as f:
-            content = f.read()
-        content = content.replace(WINDOWS_LINE_ENDING, UNIX_LINE_ENDING)
-        with open(local_path, 'wb') as f:
-            f.write(content)
-
-        ssh.put(local_path, SCRIPT_CWD + 'DS.sh')
-        ssh.run("chmod +x " + SCRIPT_CWD + 'DS.sh', hide=True, warn=True, timeout=5)
-
-        # script_status = ssh.sudo('python '+ SCRIPT_CWD+'DS.sh', hide=True, warn=True, timeout=120)
-        # if script_status.stderr:
-        #     error = '|\t'+script_status.stderr.strip().replace('\n', '\n|\t')
-        #     if 'RuntimeError: Impossible to install dependencies:' in script_status.stderr:
-        #         print("Failed to install dependencies on the robot.")
-        #         print(error)
-        #         self.connectionFailed.emit(ConnectionFailedReason.SETUP, 
-        #                                    "Robot must access internet to install the telemetry script dependencies.")
-        #         return False
-        #     else:
-        #         print("Error when initiating the SSH script:")
-        #         print(error)
-        #         self.connectionFailed.emit(ConnectionFailedReason.SETUP, 
-        #                                    "Failed to initiate telemetry script on the robot. "
-        #                                    "Check the console for more details.")
-        #         return False
-        return True
-
     #====================#
     #== QML PROPERTIES ==#
     #====================#
@@ -653,7 +456,7 @@ class RobotNetwork(QObject):
     maxUdpRefreshRate_changed = Signal(int)
     @Property(int, notify=maxUdpRefreshRate_changed)
     def maxUdpRefreshRate(self) -> int:
-        return getattr(self._udp_refresh_rates, self._udp_refresh_mode).max
+        return self._udp_schedule.current.max
 
     @maxUdpRefreshRate.setter
     def maxUdpRefreshRate(self, value: int):
@@ -661,9 +464,8 @@ class RobotNetwork(QObject):
         if t == self.maxUdpRefreshRate:
             return
 
-        self._udp_refresh_rates = self._udp_refresh_rates.set(self._udp_refresh_mode, max=t)
+        self._set_refresh_rates(max=t)
         self.maxUdpRefreshRate_changed.emit(t)
-        self._set_udp_refresh_timers_intervals(maxRate=t)
 
         if self.minUdpRefreshRate > t:
             self.minUdpRefreshRate = t
@@ -671,7 +473,7 @@ class RobotNetwork(QObject):
     minUdpRefreshRate_changed = Signal(int)
     @Property(int, notify=minUdpRefreshRate_changed)
     def minUdpRefreshRate(self) -> int:
-        return getattr(self._udp_refresh_rates, self._udp_refresh_mode).min
+        return self._udp_schedule.current.min
 
     @minUdpRefreshRate.setter
     def minUdpRefreshRate(self, value: int):
@@ -679,48 +481,36 @@ class RobotNetwork(QObject):
         if t == self.minUdpRefreshRate:
             return
 
-        self._udp_refresh_rates = self._udp_refresh_rates.set(self._udp_refresh_mode, min=t)
+        self._set_refresh_rates(min=t)
         self.minUdpRefreshRate_changed.emit(t)
-        self._set_udp_refresh_timers_intervals(minRate=t)
+
+    def _set_refresh_rates(self, max=None, min=None):
+        schedule = self._udp_schedule
+        schedule.rates = schedule.rates.set(schedule.mode, max=max, min=min)
+        QSettings('EV3DriverStation').setValue('refreshRates', schedule.rates.to_dict())
+        self._set_udp_refresh_timers_intervals()
 
     @Slot()
     def _update_udp_refresh_mode(self):
-        if self.robot.robotStatus == RobotStatus.ENABLED:
-            mode = {
-                RobotMode.AUTO: 'auto',
-                RobotMode.TELEOP: 'teleop',
-                RobotMode.TEST: 'teleop'
-            }[self.robot.mode]
-        elif self.robot.robotStatus == RobotStatus.DISABLED:
-            mode = 'disabled'
+        if self._udp_schedule.update_mode(self.robot.robotStatus, self.robot.mode):
+            self.maxUdpRefreshRate_changed.emit(self.maxUdpRefreshRate)
+            self.minUdpRefreshRate_changed.emit(self.minUdpRefreshRate)
+            self._set_udp_refresh_timers_intervals()
+
+    def _set_udp_refresh_timers_intervals(self):
+        schedule = self._udp_schedule
+        now = time.monotonic()
+
+        deadline = schedule.heartbeat_deadline(now)
+        if deadline is not None:
+            self._max_udp_refresh_timer.start(round((deadline - now) * 1000))
         else:
-            mode = 'idle'
-        
-        if mode != self._udp_refresh_mode:
-            self._udp_refresh_mode = mode
-            minRate, maxRate = self.minUdpRefreshRate, self.maxUdpRefreshRate
-            self.maxUdpRefreshRate_changed.emit(maxRate)
-            self.minUdpRefreshRate_changed.emit(minRate)
-            self._set_udp_refresh_timers_intervals(maxRate, minRate)
-
-    def _set_udp_refresh_timers_intervals(self, maxRate=None, minRate=None):
-        if self._last_udp_t is not None:
-            dt = (time.time() - self._last_udp_t) * 1000
+            self._max_udp_refresh_timer.stop()
+        deadline = schedule.change_deadline(now)
+        if deadline is not None:
+            self._min_udp_refresh_timer.start(round((deadline - now) * 1000))
         else:
-            dt = 0
-
-        if maxRate is not None:
-            if maxRate > 0:
-                self._max_udp_refresh_timer.start(max(maxRate-dt, 0))
-            else:
-                self._max_udp_refresh_timer.stop()
-        if minRate is not None:
-            if maxRate is None:
-                maxRate = self.maxUdpRefreshRate
-            if minRate>0 and minRate < maxRate:
-                self._min_udp_refresh_timer.start(max(minRate-dt, 0))
-            else:
-                self._min_udp_refresh_timer.stop()
+            self._min_udp_refresh_timer.stop()
 
     # --- Mute UDP Refresh --- #
     muteUdpRefresh_changed = Signal(bool)
@@ -740,114 +530,68 @@ class RobotNetwork(QObject):
     udpAvgDt_changed = Signal(int)
     @Property(int, notify=udpAvgDt_changed)
     def udpAvgDt(self) -> int:
-        return self._udp_avg_dt
+        return round(self._udp_dt_stats.mean(0))
+
+    @Property("QVariantMap", notify=udpAvgDt_changed)
+    def udpDtStats(self) -> dict[str, float]:
+        return self._udp_dt_stats.summary(0)
 
     def tick_udp_avg_dt(self) -> None:
-        last_udp_t = self._last_udp_t
-        t = time.time()
-        self._last_udp_t = t
+        last_udp_t = self._udp_schedule.last_sent_t
+        t = time.monotonic()
+        self._udp_schedule.sent(t)
 
         if last_udp_t is None:
             return
 
-        last_dt = (t-last_udp_t) * 1000
-        if self._udp_avg_dt == 0 or abs(last_dt-self._udp_avg_dt) > 1000:
-            self._udp_avg_dt = last_dt
-        else:
-            self._udp_avg_dt = self._udp_avg_dt * 0.9 + last_dt * 0.1
-        self.udpAvgDt_changed.emit(self._udp_avg_dt)
-
-
-class ConnectionStatus(str, Enum):
-    CONNECTED = 'Connected'
-    PING = 'Pinging'
-    AUTH = 'Authenticating'
-    CHECK_AVAILABLE = 'Check Available'
-    WAIT_AVAILABLE = 'Wait Available'
-    SETUP = 'Setuping'
-    DISCONNECTED = 'Disconnected'
-
-    @classmethod
-    def __contains__(cls, item):
-        return item in cls.__members__.values()
-
-
-class ConnectionFailedReason(str, Enum):
-    UNREACHABLE = 'Unreachable'
-    AUTH = 'Authentication'
-    LOCKED = 'Locked'
-    SETUP = 'Setup'
-    RUNTIME = 'Runtime'
+        self._udp_dt_stats.put((t-last_udp_t) * 1000, t)
+        self.udpAvgDt_changed.emit(self.udpAvgDt)
 
-    @classmethod
-    def __contains__(cls, item):
-        return item in cls.__members__.values()
+    # --- Input latency probe --- #
+    inputLatencyProbe_changed = Signal(bool)
+    @Property(bool, notify=inputLatencyProbe_changed)
+    def inputLatencyProbe(self) -> bool:
+        return self.controllers.latency_probe is not None
 
-
-class DriverStationState(NamedTuple):
-    controller1: ControllerState = ControllerState()
-    controller2: ControllerState = ControllerState()
-    enabled: bool = False
-    mode: RobotMode = RobotMode.TELEOP
-
-    @property
-    def contollers(self) -> tuple[ControllerState, ControllerState]:
-        return self.controller1, self.controller2
-
-    def is_same(self, other: DriverStationState, axis_tolerance: float = 0.05) -> bool:
-        if other is None:
-            return False
-        return self.controller1.is_same(other.controller1) \
-           and self.controller2.is_same(other.controller2) \
-           and ((not self.enabled and not other.enabled) or self.mode == other.mode)
-
-
-class Rates(NamedTuple):
-    max: int = 30
-    min: int = 0
-
-
-class RefreshRates(NamedTuple):
-    idle: Rates = Rates(1000, 1000)
-    disabled: Rates = Rates(200, 200)
-    auto: Rates = Rates(40)
-    teleop: Rates = Rates(50,30)
-
-    def save(self):
-        d = self.to_dict()
-        del d['idle']
-        QSettings('EV3DriverStation').setValue('refreshRates', self.to_dict())
-
-    @classmethod
-    def load(cls):
-        saved = QSettings('EV3DriverStation').value('refreshRates', None)
-        if saved is not None:
-            del saved['idle']
-            return cls.from_dict(saved)
-        return cls()
-
-    def to_dict(self):
-        return {
-            'idle': (self.idle.max, self.idle.min),
-            'disabled': (self.disabled.max, self.disabled.min),
-            'auto': (self.auto.max, self.auto.min),
-            'teleop': (self.teleop.max, self.teleop.min)
-        }
-
-    @classmethod
-    def from_dict(cls, d: dict):
-        d = {k: Rates(*v) for k, v in d.items()}
-        return cls(**d)
-
-    def set(self, mode, max=None, min=None, save=True):
-        d = dict()
-        if max is not None:
-            d['max'] = max
-        if min is not None:
-            d['min'] = min
-        if d:
-            d = self._replace(**{mode: getattr(self, mode)._replace(**d)})
-            d.save()
-            return d
+    @inputLatencyProbe.setter
+    def inputLatencyProbe(self, value: bool):
+        probe = self.controllers.latency_probe
+        if value == (probe is not None):
+            return
+        if value:
+            from .latency import LatencyProbe
+            self.controllers.latency_probe = LatencyProbe()
         else:
-            return self
+            self.controllers.latency_probe = None
+            if len(probe):
+                self.export_latency_report(probe)
+        self.inputLatencyProbe_changed.emit(value)
+        self.inputLatency_changed.emit()
+
+    inputLatency_changed = Signal()
+    @Property(int, notify=inputLatency_changed)
+    def inputLatency(self) -> int:
+        probe = self.controllers.latency_probe
+        return 0 if probe is None else round(probe.stats.percentile(50, 0))
+
+    @Property("QVariantMap", notify=inputLatency_changed)
+    def inputLatencyStats(self) -> dict[str, float]:
+        probe = self.controllers.latency_probe
+        return {} if probe is None else probe.stats.summary(0)
+
+    @Property(str, notify=inputLatency_changed)
+    def inputLatencyHistogram(self) -> str:
+        probe = self.controllers.latency_probe
+        return '' if probe is None else probe.format_histogram()
+
+    def export_latency_report(self, probe: LatencyProbe, report_path: str | None = None):
+        """
+        Export the latency report. If ``report_path`` is not provided, it is saved next to the telemetry recordings.
+        """
+        if report_path is None:
+            directory = QSettings('EV3DriverStation').value('recordingsDirectory', DEFAULT_RECORDINGS_DIR)
+            makedirs(directory, exist_ok=True)
+            report_path = path.join(directory, datetime.now().strftime("latency-%Y%m%d-%H%M%S.json"))
+        probe.export(report_path)
+        print(f"Input latency report saved to {report_path}")
+
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+__all__ = ["LagSpike", "PerformanceMonitor"]
+
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import TYPE_CHECKING, NamedTuple
+
+from PySide6.QtCore import Property, QObject, QSettings, Qt, QTimer, Signal, Slot
+
+from .utils import WindowedStats
+
+if TYPE_CHECKING:
+    from .network import RobotNetwork
+
+HEARTBEAT_INTERVAL = 5          # ms between two heartbeats of the main loop
+DISPLAY_INTERVAL = 500          # ms between two refreshes of the overlay figures
+DEFAULT_SPIKE_THRESHOLD = 50    # ms of main loop latency above which the blocked stack is captured
+MAX_SPIKES = 20                 # Spikes kept in memory
+
+
+class LagSpike(NamedTuple):
+    t: float                # Monotonic time of the last heartbeat before the main loop was blocked
+    duration_ms: float      # Time during which the main loop didn't process any event
+    stack: str              # Python stack of the main thread while it was blocked ('' if it couldn't be sampled)
+
+
+class PerformanceMonitor(QObject):
+    """
+    Measure the latency of the Qt main loop, the loop rates of the network threads, the UDP packet rates and the
+    telemetry update rate.
+
+    A precise timer beats every :data:`HEARTBEAT_INTERVAL` ms on the main loop: the lag is the delay of each beat
+    over its expected time. A watchdog thread samples the stack of the main thread as soon as no beat was seen for
+    ``spikeThreshold`` ms, so the stack shows what is blocking the loop, not what runs after it resumes. Each spike is
+    printed with its stack when the loop resumes, and kept in :attr:`spikes`.
+    """
+    def __init__(self, network: RobotNetwork):
+        super().__init__()
+        self.network = network
+        self.telemetry = network.telemetry
+        settings = QSettings('EV3DriverStation')
+        self._spike_threshold = int(settings.value('lagSpikeThreshold', DEFAULT_SPIKE_THRESHOLD))
+
+        self._lag_stats = WindowedStats(5)
+        self.spikes: deque[LagSpike] = deque(maxlen=MAX_SPIKES)
+        self._spike_count = 0
+
+        self._heartbeat = QTimer(self)
+        self._heartbeat.setTimerType(Qt.PreciseTimer)
+        self._heartbeat.setInterval(HEARTBEAT_INTERVAL)
+        self._heartbeat.timeout.connect(self._beat)
+        self._display_timer = QTimer(self)
+        self._display_timer.setInterval(DISPLAY_INTERVAL)
+        self._display_timer.timeout.connect(self.stats_changed.emit)
+
+        # Shared with the watchdog thread
+        self._last_beat = 0.
+        self._blocked_stack: tuple[float, str] | None = None     # (last beat before the block, stack)
+        self._main_thread_id = threading.main_thread().ident
+        self._watchdog: threading.Thread | None = None
+        self._watchdog_stop = threading.Event()
+
+        if str(settings.value('performanceOverlay', False)).lower() == 'true':
+            # Start once the event loop runs, so the startup isn't reported as a blocked loop
+            QTimer.singleShot(0, lambda: setattr(self, 'active', True))
+
+    def close(self):
+        # Stop without changing the saved overlay state
+        if self.active:
+            self._stop()
+            self.active_changed.emit(False)
+
+    def _start(self):
+        self._lag_stats.clear()
+        self._last_beat = time.monotonic()
+        self._blocked_stack = None
+        self._heartbeat.start()
+        self._display_timer.start()
+        self._watchdog_stop.clear()
+        self._watchdog = threading.Thread(target=self._watchdog_run, name="LagWatchdog", daemon=True)
+        self._watchdog.start()
+
+    def _stop(self):
+        self._heartbeat.stop()
+        self._display_timer.stop()
+        self._watchdog_stop.set()
+        self._watchdog.join()
+        self._watchdog = None
+
+    #====================#
+    #== QML PROPERTIES ==#
+    #====================#
+    active_changed = Signal(bool)
+    @Property(bool, notify=active_changed)
+    def active(self) -> bool:
+        return self._heartbeat.isActive()
+
+    @active.setter
+    def active(self, value: bool):
+        if value == self.active:
+            return
+        if value:
+            self._start()
+        else:
+            self._stop()
+        QSettings('EV3DriverStation').setValue('performanceOverlay', value)
+        self.active_changed.emit(value)
+
+    spikeThreshold_changed = Signal(int)
+    @Property(int, notify=spikeThreshold_changed)
+    def spikeThreshold(self) -> int:
+        return self._spike_threshold
+
+    @spikeThreshold.setter
+    def spikeThreshold(self, value: int):
+        value = max(HEARTBEAT_INTERVAL * 2, int(value))
+        if value == self._spike_threshold:
+            return
+        self._spike_threshold = value
+        QSettings('EV3DriverStation').setValue('lagSpikeThreshold', value)
+        self.spikeThreshold_changed.emit(value)
+
+    stats_changed = Signal()
+    @Property("QVariantMap", notify=stats_changed)
+    def mainLoopLag(self) -> dict[str, float]:
+        return self._lag_stats.summary(0)
+
+    @Property("QVariantMap", notify=stats_changed)
+    def rates(self) -> dict[str, float]:
+        network = self.network
+        return {
+            'udpListener': network.udp_listener_rate.rate(),
+            'ssh': network.ssh_loop_rate.rate(),
+            'udpSent': network.udp_sent_rate.rate(),
+            'udpReceived': network.udp_received_rate.rate(),
+            'telemetry': self.telemetry.update_rate.rate(),
+        }
+
+    @Property(int, notify=stats_changed)
+    def spikeCount(self) -> int:
+        return self._spike_count
+
+    @Property(str, notify=stats_changed)
+    def lastSpike(self) -> str:
+        if not self.spikes:
+            return ""
+        spike = self.spikes[-1]
+        # Innermost frame of the stack sampled while the main loop was blocked
+        frames = [line.strip() for line in spike.stack.splitlines() if line.lstrip().startswith('File ')]
+        return f"{spike.duration_ms:.0f} ms in {frames[-1] if frames else 'unknown code'}"
+
+    lagSpike = Signal(float)
+
+    @Slot()
+    def clearSpikes(self):
+        self.spikes.clear()
+        self._spike_count = 0
+        self.stats_changed.emit()
+
+    #==================#
+    #== Lag Tracking ==#
+    #==================#
+    def _beat(self):
+        now = time.monotonic()
+        previous_beat, self._last_beat = self._last_beat, now
+        elapsed_ms = (now - previous_beat) * 1000
+        self._lag_stats.put(max(0., elapsed_ms - HEARTBEAT_INTERVAL), now)
+
+        if elapsed_ms > self._spike_threshold:
+            sample, self._blocked_stack = self._blocked_stack, None
+            stack = sample[1] if sample is not None and sample[0] == previous_beat else ''
+            spike = LagSpike(previous_beat, elapsed_ms, stack)
+            self.spikes.append(spike)
+            self._spike_count += 1
+            print(f"Main loop blocked for {elapsed_ms:.0f} ms" +
+                  (f", stack while blocked:\n{stack}" if stack else " (stack not sampled)"))
+            self.lagSpike.emit(elapsed_ms)
+
+    def _watchdog_run(self):
+        sampled_beat = None
+        while not self._watchdog_stop.wait(self._spike_threshold / 4000):
+            last_beat = self._last_beat
+            if last_beat == sampled_beat or (time.monotonic() - last_beat) * 1000 < self._spike_threshold:
+                continue
+            # The main loop is blocked: sample its stack once per spike
+            frame = sys._current_frames().get(self._main_thread_id)
+            if frame is not None:
+                self._blocked_stack = (last_beat, ''.join(traceback.format_stack(frame)))
+            sampled_beat = last_beat
@@ -0,0 +1,555 @@
+from __future__ import annotations
+
+__all__ = ["RobotMode", "RobotStatus", "ProgramStatus", "ControllerState", "DriverStationState", "RobotResponse",
+           "TelemetryStore", "TelemetryVarType", "TelemetryVarTransmissionState"]
+
+import functools
+import re
+import struct
+from enum import Enum
+from typing import NamedTuple
+
+UDP_ROBOT_PORT = 5005
+UDP_RESPONSE_TIMEOUT = 6 # s before program is considered crashed
+HELLO_MESSAGE = b'\x88'    # Sent while no program is running: asks the robot for its full telemetry schema
+FULL_SCHEMA_FLAG = 0x80     # Set on the mode byte to request the full telemetry schema
+STARTING_FLAG = 0x04        # Set on the mode byte of the robot response while its program is starting
+
+SCHEMA_MARKER = 255         # First byte of a robot response carrying the full schema (and of a resync request)
+SCHEMA_DELTA_MARKER = 254   # First byte of a robot response carrying a schema delta
+
+
+#=================#
+#== Robot State ==#
+#=================#
+class RobotMode(str, Enum):
+    AUTO = 'Autonomous'
+    TELEOP = 'Teleoperated'
+    TEST = 'Test'
+
+    @staticmethod
+    def from_index(index: int) -> RobotMode:
+        return {
+            1: RobotMode.AUTO,
+            2: RobotMode.TELEOP,
+            3: RobotMode.TEST
+        }[index]
+
+    @property
+    def index(self) -> int:
+        return {
+            RobotMode.AUTO: 1,
+            RobotMode.TELEOP: 2,
+            RobotMode.TEST: 3
+        }[self]
+
+
+class RobotStatus(str, Enum):
+    ENABLED = 'Enabled'
+    DISABLED = 'Disabled'
+    IDLE = 'Idle'
+
+
+class ProgramStatus(str, Enum):
+    IDLE = 'Idle'
+    STARTING = 'Starting'
+    RUNNING = 'Running'
+
+
+#=================#
+#== Controllers ==#
+#=================#
+AXES = ('leftX', 'leftY', 'rightX', 'rightY', 'leftTrigger', 'rightTrigger')
+AXIS_SCALE = 125    # Axes are transmitted as int8 in [-125, 125]
+NEUTRAL_AXES = (0, 0, 0, 0, -AXIS_SCALE, -AXIS_SCALE)
+# Bit of each button in the transmitted bitfield
+BUTTON_BITS = {
+    'A': 0, 'B': 1, 'X': 2, 'Y': 3,
+    'LeftBumper': 4, 'RightBumper': 5, 'Back': 6, 'Start': 7,
+    'LeftStick': 9, 'RightStick': 10,
+    'Left': 16, 'Right': 17, 'Up': 18, 'Down': 19,
+}
+FIELDS = AXES + tuple(BUTTON_BITS)
+_WIRE_STRUCT = struct.Struct('=6bi')
+
+
+def quantize_axis(value: float) -> int:
+    return max(-AXIS_SCALE, min(AXIS_SCALE, int(value * AXIS_SCALE)))
+
+
+class ControllerState(NamedTuple):
+    """
+    State of a controller as transmitted to the robot: the axes quantized to [-125, 125] and the buttons packed
+    in a bitfield. Axes and buttons are also readable by name (``state.leftX``, ``state.A``...).
+    """
+    axes: tuple[int, ...] = NEUTRAL_AXES     # leftX, leftY, rightX, rightY, leftTrigger, rightTrigger
+    buttons: int = 0                        # Bitfield of the pressed buttons (see BUTTON_BITS)
+
+    @classmethod
+    def from_values(cls, **values: float | bool) -> ControllerState:
+        """
+        Build a state from axes values in [-1, 1] and buttons states given by name (e.g. ``leftY=-.5, A=True``).
+        """
+        return cls().with_values(**values)
+
+    @classmethod
+    def from_fields(cls, fields: list[float | bool]) -> ControllerState:
+        """
+        Build a state from the values of all the fields, in ``FIELDS`` order.
+        """
+        buttons = 0
+        for pressed, bit in zip(fields[6:], BUTTON_BITS.values(), strict=True):
+            if pressed:
+                buttons |= 1 << bit
+        return cls(tuple(quantize_axis(v) for v in fields[:6]), buttons)
+
+    def with_values(self, **values: float | bool) -> ControllerState:
+        axes, buttons = list(self.axes), self.buttons
+        for name, v in values.items():
+            bit = BUTTON_BITS.get(name)
+            if bit is None:
+                axes[AXES.index(name)] = quantize_axis(v)
+            elif v:
+                buttons |= 1 << bit
+            else:
+                buttons &= ~(1 << bit)
+        return ControllerState(tuple(axes), buttons)
+
+    @property
+    def axis(self) -> tuple[float, ...]:
+        return tuple(a / AXIS_SCALE for a in self.axes)
+
+    def buttons_as_int(self) -> int:
+        return self.buttons
+
+    def encode(self) -> bytes:
+        """
+        Encode the state as sent to the robot: the 6 axes (int8) followed by the buttons bitfield (int32).
+        """
+        return _WIRE_STRUCT.pack(*self.axes, self.buttons)
+
+    def is_neutral(self) -> bool:
+        return self.buttons == 0 and self.axes == NEUTRAL_AXES
+
+    def with_deadzone(self, deadzone=.1) -> ControllerState:
+        dz = int(deadzone * AXIS_SCALE)
+        lx, ly, rx, ry, lt, rt = self.axes
+        axes = (lx if abs(lx) > dz else 0, ly if abs(ly) > dz else 0,
+                rx if abs(rx) > dz else 0, ry if abs(ry) > dz else 0,
+                lt if lt > dz - AXIS_SCALE else -AXIS_SCALE, rt if rt > dz - AXIS_SCALE else -AXIS_SCALE)
+        return self if axes == self.axes else ControllerState(axes, self.buttons)
+
+    def is_same(self, other: ControllerState, axis_tolerance=.05) -> bool:
+        if self.buttons != other.buttons:
+            return False
+        if self.axes == other.axes:
+            return True
+        tolerance = axis_tolerance * AXIS_SCALE
+        return all(abs(a - b) <= tolerance for a, b in zip(self.axes, other.axes, strict=True))
+
+    def as_dict(self) -> dict[str, float | bool]:
+        d = {name: a / AXIS_SCALE for name, a in zip(AXES, self.axes, strict=True)}
+        d.update({name: bool(self.buttons >> bit & 1) for name, bit in BUTTON_BITS.items()})
+        return d
+
+
+def _axis_property(i: int) -> property:
+    return property(lambda self: self.axes[i] / AXIS_SCALE)
+
+
+def _button_property(bit: int) -> property:
+    return property(lambda self: bool(self.buttons >> bit & 1))
+
+
+for _i, _name in enumerate(AXES):
+    setattr(ControllerState, _name, _axis_property(_i))
+for _name, _bit in BUTTON_BITS.items():
+    setattr(ControllerState, _name, _button_property(_bit))
+
+
+#=============#
+#== Packets ==#
+#=============#
+class DriverStationState(NamedTuple):
+    controllers: tuple[ControllerState | None, ...] = ()    # State of each pilot slot (None if inactive)
+    enabled: bool = False
+    mode: RobotMode = RobotMode.TELEOP
+
+    def encode_mode(self) -> int:
+        """
+        Mode byte of the packet: 0 when disabled, the index of the robot mode otherwise.
+        """
+        return self.mode.index if self.enabled else 0
+
+    def encode_controllers(self) -> bytes:
+        """
+        Encode the active pilot slots: their count, then the slot index and state of each one.
+        Inactive slots are not transmitted (the robot considers them neutral).
+        """
+        active = [(slot, state) for slot, state in enumerate(self.controllers) if state is not None]
+        return bytes((len(active),)) + b''.join(bytes((slot,)) + state.encode() for slot, state in active)
+
+    def is_same(self, other: DriverStationState, axis_tolerance: float = 0.05) -> bool:
+        if other is None or len(self.controllers) != len(other.controllers):
+            return False
+        for state, other_state in zip(self.controllers, other.controllers, strict=True):
+            if state is None or other_state is None:
+                if state is not other_state:
+                    return False
+            elif not state.is_same(other_state, axis_tolerance):
+                return False
+        return (not self.enabled and not other.enabled) or self.mode == other.mode
+
+
+class RobotResponse(NamedTuple):
+    enabled: bool
+    mode: RobotMode | None      # None when the robot is disabled
+    starting: bool              # The robot program is starting
+    skipped_frames: int
+    frame_exec_time: int
+    telemetry: bytes
+
+    @classmethod
+    def decode(cls, data: bytes) -> RobotResponse:
+        """
+        Decode a robot response: the mode byte, the number of skipped frames, the frame execution time (ms)
+        followed by the telemetry data.
+        """
+        mode = data[0] & 0x03
+        return cls(enabled=mode != 0, mode=RobotMode.from_index(mode) if mode else None,
+                   starting=(data[0] & STARTING_FLAG) != 0, skipped_frames=int(data[1]),
+                   frame_exec_time=int(data[2]), telemetry=bytes(data[3:]))
+
+
+#===============#
+#== Telemetry ==#
+#===============#
+class TelemetryStore:
+    """
+    Schema and values of the telemetry variables, stored as parallel lists indexed by variable ID.
+    """
+    __slots__ = ('names', 'types', 'lengths', 'editable', 'values', 'states', 'ids', 'version')
+    _COLUMNS = ('names', 'types', 'lengths', 'editable', 'values', 'states')
+
+    def __init__(self):
+        self.names: list[str] = []
+        self.types: list[TelemetryVarType] = []
+        self.lengths: list[int] = []    # Number of elements of array variables (0 for scalars)
+        self.editable: list[bool] = []
+        self.values: list[bool|int|float|str] = []
+        self.states: list[TelemetryVarTransmissionState] = []
+        self.ids: dict[str, int] = {}
+        self.version: int | None = None     # Schema version (None if the robot doesn't support targeted resync)
+
+    @classmethod
+    def from_schema(cls, schema: dict[str, bool|int|float|str|list]) -> TelemetryStore:
+        """
+        Build the store from the schema transmitted by the robot: a mapping of variable names (prefixed by ``?``
+        if editable) to their initial value, ordered by variable ID. The optional ``@version`` entry is the schema
+        version.
+
+        The type is inferred from the initial value (lists are arrays) unless it is declared after the name:
+        ``name:int32``, ``name:double`` or ``name:float[3]`` for a fixed-length array.
+        """
+        store = cls()
+        for name, value in schema.items():
+            if name == '@version':
+                store.version = int(value)
+            elif not name.startswith('@'):
+                store._define(len(store), name, value)
+        return store
+
+    def apply_delta(self, delta: dict) -> tuple[TelemetryStore, list[int]]:
+        """
+        Return a copy of the store updated with a schema delta, and the IDs of the variables it redefined.
+
+        The delta maps variable IDs to their new ``{name: value}`` definition. ``@version`` is the new schema version,
+        ``@base`` the version the delta applies to and ``@count`` the new number of variables.
+        Raise ValueError if the delta doesn't apply to this store.
+        """
+        base = delta.get('@base')
+        if base is not None and base != self.version:
+            raise ValueError(f"delta based on version {base}, current version is {self.version}")
+        definitions = {int(varID): d for varID, d in delta.items() if not str(varID).startswith('@')}
+        count = int(delta.get('@count', max(len(self), max(definitions, default=-1) + 1)))
+        if any(varID not in definitions for varID in range(len(self), count)):
+            raise ValueError("the definition of some variables is missing")
+
+        store = TelemetryStore()
+        for attr in self._COLUMNS:
+            setattr(store, attr, getattr(self, attr)[:count])
+        store.ids = {name: varID for name, varID in self.ids.items() if varID < count}
+        store.version = delta.get('@version', self.version)
+
+        redefined = []
+        for varID, definition in sorted(definitions.items()):
+            if varID >= count:
+                continue
+            if not isinstance(definition, dict) or len(definition) != 1:
+                raise ValueError(f"invalid definition of variable {varID}")
+            (name, value), = definition.items()
+            store._define(varID, name, value)
+            redefined.append(varID)
+        return store, redefined
+
+    def _define(self, varID: int, name: str, value):
+        """
+        Define (or redefine) the variable ``varID`` from its schema entry.
+        """
+        editable = name.startswith('?')
+        if editable:
+            name = name[1:]
+        m = _SCHEMA_TYPE_RE.match(name)
+        if m is not None:
+            name = m['name']
+            element_type = TelemetryVarType(m['type'])
+            is_array = m['length'] is not None
+            var_type = TelemetryVarType(element_type.value + '[]') if is_array else element_type
+        else:
+            var_type = TelemetryVarType.from_value(value)
+            is_array = var_type.is_array
+
+        length = 0
+        if is_array:
+            if not isinstance(value, (list, tuple)):
+                value = [value] * int(m['length'] or 1)
+            length = int(m['length']) if m is not None and m['length'] else len(value)
+            if length < 1:
+                raise ValueError(f"Invalid length for telemetry array '{name}'")
+        value, _ = TelemetryVarType.validate(value, var_type, length)
+
+        entry = (name, var_type, length, editable, value, TelemetryVarTransmissionState.TRANSMITTED)
+        if varID == len(self.names):
+            for attr, v in zip(self._COLUMNS, entry, strict=True):
+                getattr(self, attr).append(v)
+        else:
+            previous = self.names[varID]
+            if self.ids.get(previous) == varID:
+                del self.ids[previous]
+            for attr, v in zip(self._COLUMNS, entry, strict=True):
+                getattr(self, attr)[varID] = v
+        self.ids[name] = varID
+
+    def __len__(self):
+        return len(self.names)
+
+
+class TelemetryVarType(str, Enum):
+    BOOL = 'bool'
+    INT = 'int'
+    INT32 = 'int32'
+    INT64 = 'int64'
+    FLOAT = 'float'
+    DOUBLE = 'double'
+    STRING = 'string'
+    INT_ARRAY = 'int[]'
+    INT32_ARRAY = 'int32[]'
+    INT64_ARRAY = 'int64[]'
+    FLOAT_ARRAY = 'float[]'
+    DOUBLE_ARRAY = 'double[]'
+
+    @property
+    def is_array(self) -> bool:
+        return self.value.endswith('[]')
+
+    @property
+    def element_type(self) -> TelemetryVarType:
+        return TelemetryVarType(self.value[:-2]) if self.is_array else self
+
+    @classmethod
+    def from_value(cls, v):
+        if isinstance(v, bool):
+            return cls.BOOL
+        elif isinstance(v, int):
+            return cls.INT
+        elif isinstance(v, float):
+            return cls.FLOAT
+        elif isinstance(v, str):
+            return cls.STRING
+        elif isinstance(v, (list, tuple)) and v and all(isinstance(e, (int, float)) for e in v):
+            return cls.FLOAT_ARRAY if any(isinstance(e, float) for e in v) else cls.INT_ARRAY
+        else:
+            raise ValueError(f"Invalid type {type(v)} for telemetry variable")
+
+    @classmethod
+    def cast_to(cls, v, t: TelemetryVarType):
+        if t == cls.BOOL:
+            if isinstance(v, bool):
+                return v
+            elif isinstance(v, str):
+                return v.lower() in ("true", "1")
+            else:
+                return bool(v)
+        elif t in (cls.INT, cls.INT32, cls.INT64):
+            return int(v)
+        elif t in (cls.FLOAT, cls.DOUBLE):
+            return float(v)
+        elif t == cls.STRING:
+            return str(v)
+        elif t.is_array:
+            if isinstance(v, str):
+                v = _split_array(v)
+            element_type = t.element_type
+            return _array_view(_SCALAR_STRUCTS[element_type].format, [cls.cast_to(e, element_type) for e in v])
+        else:
+            raise ValueError(f"Invalid type {t} for telemetry variable")
+
+    @classmethod
+    def decode(cls, data: bytes, offset: int, t: TelemetryVarType,
+               length: int = 0) -> tuple[bool|int|float|str|memoryview, int]:
+        """
+        Decode a value of type ``t`` at ``offset`` in ``data``. Return the value and the offset following it.
+        Arrays hold ``length`` elements and are decoded as read-only views on ``data`` (NumPy arrays if available).
+        """
+        if t == cls.BOOL:
+            return data[offset] != 0, offset + 1
+        elif t == cls.STRING:
+            size = data[offset]
+            end = offset + 1 + size
+            if end > len(data):
+                raise ValueError("Truncated telemetry string")
+            return data[offset+1:end].decode('ascii'), end
+        elif t.is_array:
+            element = _SCALAR_STRUCTS[t.element_type]
+            end = offset + length * element.size
+            if end > len(data):
+                raise ValueError("Truncated telemetry array")
+            return _buffer_view(data, offset, length, element.format), end
+        else:
+            scalar = _SCALAR_STRUCTS[t]
+            return scalar.unpack_from(data, offset)[0], offset + scalar.size
+
+    @classmethod
+    def encode(cls, v, t: TelemetryVarType) -> bytes:
+        if t == cls.STRING:
+            return struct.pack('B', len(v)) + v.encode('ascii')
+        elif t.is_array:
+            return struct.pack(_SCALAR_STRUCTS[t.element_type].format * len(v), *v)
+        elif t in _SCALAR_STRUCTS:
+            return _SCALAR_STRUCTS[t].pack(v)
+        else:
+            raise ValueError(f"Invalid type {t} for telemetry variable")
+
+    @classmethod
+    def validate(cls, v, t: TelemetryVarType, length: int = 0) -> tuple[bool|int|float|str|memoryview, bool]:
+        """
+        Cast ``v`` to type ``t`` and clamp it to what can be transmitted to the robot.
+        Return the transmittable value and whether it is identical to the requested one.
+        """
+        if t.is_array:
+            if isinstance(v, str):
+                v = _split_array(v)
+            validated = [cls.validate(e, t.element_type) for e in v]
+            valid = len(validated) == length and all(e_valid for _, e_valid in validated)
+            elements = ([e for e, _ in validated] + [0] * length)[:length]
+            return cls.cast_to(elements, t), valid
+
+        v = cls.cast_to(v, t)
+        valid = True
+        if t == cls.STRING:
+            if re.match(r'^[\x00-\x7F]*$', v) is None:
+                valid = False
+                v = re.sub(r'[^\x00-\x7F]', '', v)
+            if len(v) > 255:
+                valid = False
+                v = v[:255]
+        elif t in _INT_LIMITS:
+            limit = _INT_LIMITS[t]
+            if abs(v) > limit:
+                valid = False
+                v = limit if v > 0 else -limit
+        elif t == cls.FLOAT:
+            converted = float(_FLOAT_STRUCT.unpack(_FLOAT_STRUCT.pack(v))[0])
+            valid = cls.format_value(converted, cls.FLOAT) == cls.format_value(v, cls.FLOAT)
+            v = converted
+        return v, valid
+
+    @classmethod
+    def format_value(cls, v, t: TelemetryVarType) -> str:
+        if t == TelemetryVarType.BOOL:
+            return 'true' if v else 'false'
+        elif t in (TelemetryVarType.INT, TelemetryVarType.INT32, TelemetryVarType.INT64):
+            return str(v)
+        elif t in (TelemetryVarType.FLOAT, TelemetryVarType.DOUBLE):
+            if v == float('inf'):
+                return "∞"
+            elif v == float('-inf'):
+                return "-∞"
+            elif abs(v) < 1e-15:
+                return "0.000"
+            else:
+                return f'{v:.3f}' if 1e-3 < abs(v) < 1e3 else f'{v:.3e}'
+        elif t == TelemetryVarType.STRING:
+            return v
+        elif t.is_array:
+            element_type = t.element_type
+            elements = [cls.format_value(e, element_type) for e in v[:ARRAY_FORMAT_MAX_ELEMENTS].tolist()]
+            if len(v) > ARRAY_FORMAT_MAX_ELEMENTS:
+                elements.append('…')
+            return '[' + ', '.join(elements) + ']'
+        return ""
+
+    @classmethod
+    def to_qml(cls, v: bool|int|float|str|memoryview):
+        """
+        Convert a value to a type QML understands (array views are converted to lists).
+        """
+        return v.tolist() if hasattr(v, 'tolist') else v
+
+
+_INT_STRUCT = struct.Struct('h')
+_FLOAT_STRUCT = struct.Struct('f')
+_SCALAR_STRUCTS = {
+    TelemetryVarType.BOOL: struct.Struct('?'),
+    TelemetryVarType.INT: _INT_STRUCT,
+    TelemetryVarType.INT32: struct.Struct('i'),
+    TelemetryVarType.INT64: struct.Struct('q'),
+    TelemetryVarType.FLOAT: _FLOAT_STRUCT,
+    TelemetryVarType.DOUBLE: struct.Struct('d'),
+}
+_INT_LIMITS = {
+    TelemetryVarType.INT: 2**15 - 1,
+    TelemetryVarType.INT32: 2**31 - 1,
+    TelemetryVarType.INT64: 2**63 - 1,
+}
+_SCHEMA_TYPE_RE = re.compile(r'^(?P<name>.+):(?P<type>bool|int|int32|int64|float|double|string)'
+                             r'(?:\[(?P<length>\d*)\])?$')
+ARRAY_FORMAT_MAX_ELEMENTS = 8   # Elements displayed by format_value() before the array is ellipsized
+
+
+@functools.cache
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _buffer_view(data: bytes, offset: int, length: int, fmt: str):
+    """
+    Zero-copy view of ``length`` elements of format ``fmt`` stored at ``offset`` in ``data``.
+    """
+    np = _numpy()
+    if np is not None:
+        return np.frombuffer(data, dtype=fmt, count=length, offset=offset)
+    return memoryview(data)[offset:offset + length * struct.calcsize(fmt)].cast(fmt)
+
+
+def _array_view(fmt: str, values: list):
+    return _buffer_view(struct.pack(f'{len(values)}{fmt}', *values), 0, len(values), fmt)
+
+
+def _array_equal(a, b) -> bool:
+    return len(a) == len(b) and memoryview(a) == memoryview(b)
+
+
+def _split_array(v: str) -> list[str]:
+    return [e for e in re.split(r'[\s,;\[\]]+', v) if e]
+
+
+class TelemetryVarTransmissionState(str, Enum):
+    TRANSMITTED = "transmitted"
+    TRANSMISSION_MISSED = "unknown"
+    IN_TRANSMISSION = "inTransmission"
+    CHANGED = "changed"
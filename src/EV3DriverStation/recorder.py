@@ -0,0 +1,408 @@
+from __future__ import annotations
+
+__all__ = ["TelemetryRecorder", "TelemetryRecording"]
+
+import csv
+import heapq
+import itertools
+import json
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+from array import array
+from datetime import datetime
+
+SCHEMA_FILE = "schema.json"
+SCHEMA_VERSION = 1
+
+CHUNK_SIZE = 512    # Values buffered per column before being written to disk
+QUEUE_SIZE = 4096   # Packets buffered between the receive thread and the writer thread
+
+# Storage typecode of each telemetry type (strings store an offset into a separate heap file)
+COLUMN_DTYPES = {
+    'bool': 'b',
+    'int': 'h',
+    'int32': 'i',
+    'int64': 'q',
+    'float': 'f',
+    'double': 'd',
+    'string': 'Q',
+}
+COLUMN_DTYPES.update({f'{t}[]': dtype for t, dtype in COLUMN_DTYPES.items() if t not in ('bool', 'string')})
+
+
+class TelemetryRecorder:
+    """
+    Stream decoded telemetry values to an on-disk columnar recording.
+
+    Every column (one per variable name and type) is stored as two flat files: ``<column>.t`` holds the float64
+    timestamps and ``<column>.v`` the values using the typecode of ``COLUMN_DTYPES``. Strings are appended to
+    ``<column>.s`` and their column stores the offset of each length-prefixed entry. Arrays store their elements
+    contiguously: the ``length`` of the column in the schema gives the number of elements per record.
+
+    Values are pushed from the receive path with :meth:`record` which never blocks: packets are handed over to a
+    background writer thread through a bounded queue and dropped (and counted) if the writer can't keep up.
+    """
+    def __init__(self, path: str, chunk_size: int = CHUNK_SIZE, queue_size: int = QUEUE_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.dropped_packets = 0
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._columns: dict[tuple[str, str], _ColumnWriter] = {}
+        self._schema_dirty = False
+        self._thread: threading.Thread = None
+
+    @classmethod
+    def in_directory(cls, directory: str, **kwargs) -> TelemetryRecorder:
+        """
+        Create a recorder writing in a new timestamped sub-folder of ``directory``.
+        """
+        return cls(os.path.join(directory, datetime.now().strftime("%Y%m%d-%H%M%S")), **kwargs)
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        self._thread = threading.Thread(target=self._writer_run, name="TelemetryRecorder", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def record(self, values: list[tuple[str, str, bool | int | float | str]], t: float | None = None):
+        """
+        Queue the values decoded from one packet. ``values`` is a list of ``(name, type, value)``.
+        """
+        if self._thread is None or not values:
+            return
+        try:
+            self._queue.put_nowait((time.time() if t is None else t, values))
+        except queue.Full:
+            self.dropped_packets += 1
+
+    #===================#
+    #== Writer Thread ==#
+    #===================#
+    def _writer_run(self):
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=1)
+                except queue.Empty:
+                    self._flush()
+                    continue
+                if item is None:
+                    break
+                t, values = item
+                for name, var_type, value in values:
+                    self._column(name, var_type).append(t, value)
+        finally:
+            self._flush()
+            for column in self._columns.values():
+                column.close()
+
+    def _column(self, name: str, var_type: str) -> _ColumnWriter:
+        key = (name, var_type)
+        column = self._columns.get(key)
+        if column is None:
+            column = _ColumnWriter(self.path, f"{len(self._columns):04d}", var_type, self.chunk_size)
+            self._columns[key] = column
+            self._schema_dirty = True
+        return column
+
+    def _flush(self):
+        for column in self._columns.values():
+            column.flush()
+        if self._schema_dirty:
+            self._write_schema()
+
+    def _write_schema(self):
+        schema = {
+            'version': SCHEMA_VERSION,
+            'columns': [{'name': name, 'type': var_type, 'file': c.file, 'dtype': c.dtype, 'length': c.length}
+                        for (name, var_type), c in self._columns.items()],
+        }
+        tmp_path = os.path.join(self.path, SCHEMA_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(schema, f, indent=1)
+        os.replace(tmp_path, os.path.join(self.path, SCHEMA_FILE))
+        self._schema_dirty = False
+
+
+class _ColumnWriter:
+    def __init__(self, directory: str, file: str, var_type: str, chunk_size: int):
+        self.file = file
+        self.dtype = COLUMN_DTYPES[var_type]
+        self.chunk_size = chunk_size
+        self._is_string = var_type == 'string'
+        self._is_array = var_type.endswith('[]')
+        self.length = 0     # Number of elements per record of array columns, set by the first value
+
+        base = os.path.join(directory, file)
+        self._t_file = open(base + '.t', 'ab')
+        self._v_file = open(base + '.v', 'ab')
+        self._s_file = open(base + '.s', 'ab') if self._is_string else None
+        self._s_offset = self._s_file.tell() if self._is_string else 0
+
+        self._t_chunk = array('d')
+        self._v_chunk = array(self.dtype)
+        self._s_chunk = bytearray()
+
+    def append(self, t: float, value):
+        if self._is_string:
+            encoded = value.encode('ascii', errors='replace')[:255]
+            self._v_chunk.append(self._s_offset + len(self._s_chunk))
+            self._s_chunk.append(len(encoded))
+            self._s_chunk.extend(encoded)
+        elif self._is_array:
+            if not self.length:
+                self.length = len(value)
+            elif len(value) != self.length:
+                return  # The array changed length: keep records aligned by dropping it
+            self._v_chunk.extend(value.tolist())
+        else:
+            self._v_chunk.append(value)
+        self._t_chunk.append(t)
+        if len(self._t_chunk) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self._t_chunk:
+            return
+        if self._is_string:
+            self._s_file.write(self._s_chunk)
+            self._s_file.flush()
+            self._s_offset += len(self._s_chunk)
+            self._s_chunk = bytearray()
+        # Values are written before their timestamps: a record only exists once its timestamp is on disk, so a
+        # crash between the two writes leaves extra values that the reader ignores.
+        self._v_chunk.tofile(self._v_file)
+        self._v_file.flush()
+        self._t_chunk.tofile(self._t_file)
+        self._t_file.flush()
+        self._t_chunk = array('d')
+        self._v_chunk = array(self.dtype)
+
+    def close(self):
+        for f in (self._t_file, self._v_file, self._s_file):
+            if f is not None:
+                f.close()
+
+
+class TelemetryRecording:
+    """
+    Read-only access to a recording written by :class:`TelemetryRecorder`.
+
+    Column files are memory-mapped on first access, so timestamps and values can be indexed randomly without
+    loading the whole recording in memory. A variable whose type changed during the recording is stored in one
+    column per type: the queries by name merge its columns by time.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, SCHEMA_FILE)) as f:
+            schema = json.load(f)
+        if schema.get('version') != SCHEMA_VERSION:
+            raise ValueError(f"Unsupported recording version: {schema.get('version')}")
+        # Columns are keyed by file, as the writer creates one column per (name, type)
+        self._columns: dict[str, dict] = {c['file']: c for c in schema['columns']}
+        self._columns_by_name: dict[str, list[dict]] = {}
+        for column in self._columns.values():
+            self._columns_by_name.setdefault(column['name'], []).append(column)
+        self._maps: dict[str, mmap.mmap] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for m in self._maps.values():
+            try:
+                m.close()
+            except BufferError:
+                pass    # A view on the map is still alive, it will be closed when garbage collected.
+        self._maps.clear()
+
+    @property
+    def names(self) -> list[str]:
+        return list(self._columns_by_name)
+
+    def columns(self, name: str) -> list[dict]:
+        """
+        Schema of the columns of ``name`` (``name``, ``type``, ``file``, ``dtype``, ``length``), one per type.
+        """
+        return list(self._columns_by_name[name])
+
+    def type_of(self, name: str) -> str:
+        """
+        Type of the last value of ``name``.
+        """
+        columns = self._columns_by_name[name]
+        if len(columns) == 1:
+            return columns[0]['type']
+        return max(columns, key=lambda c: self._last_timestamp(c))['type']
+
+    def __len__(self):
+        return len(self._columns_by_name)
+
+    def timestamps(self, name: str) -> memoryview | list[float]:
+        columns = self._columns_by_name[name]
+        if len(columns) == 1:
+            return self._column_timestamps(columns[0])
+        return [t for t, _ in self._merged(columns)]
+
+    def values(self, name: str) -> memoryview | list:
+        columns = self._columns_by_name[name]
+        if len(columns) == 1:
+            return self._column_values(columns[0])
+        return [v for _, v in self._merged(columns)]
+
+    def value_at(self, name: str, t: float) -> bool | int | float | str | None:
+        """
+        Return the last value of ``name`` recorded before or at ``t``.
+        """
+        last_t, last_value = None, None
+        for column in self._columns_by_name[name]:
+            timestamps = self._column_timestamps(column)
+            lo, hi = 0, len(timestamps)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if timestamps[mid] <= t:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            if lo and (last_t is None or timestamps[lo-1] >= last_t):
+                last_t, last_value = timestamps[lo-1], self._column_value(column, lo-1)
+        return last_value
+
+    def to_numpy(self, name: str):
+        """
+        Return ``(timestamps, values)`` as NumPy arrays. Numeric columns are zero-copy views on the mapped files,
+        array columns have one row per record. The columns of a variable whose type changed are concatenated and
+        sorted by time (as an object array if their values can't share a dtype).
+        """
+        import numpy as np
+
+        columns = self._columns_by_name[name]
+        if len(columns) == 1:
+            return self._column_numpy(columns[0])
+        parts = [self._column_numpy(c) for c in columns]
+        t = np.concatenate([p[0] for p in parts])
+        if any(c['type'] == 'string' or c.get('length', 0) for c in columns):
+            v = np.empty(len(t), dtype=object)
+            v[:] = [x for p in parts for x in (p[1].tolist() if p[1].dtype != object else p[1])]
+        else:
+            v = np.concatenate([p[1] for p in parts])
+        order = np.argsort(t, kind='stable')
+        return t[order], v[order]
+
+    def to_csv(self, path: str, names: list[str] | None = None):
+        """
+        Export the recording as a long-format CSV (``time,name,value``) sorted by time.
+        """
+        if names is None:
+            names = self.names
+
+        def rows(column):
+            values = self._column_values(column)
+            if column.get('length', 0):
+                values = (v.tolist() for v in values)
+            return zip(self._column_timestamps(column), itertools.repeat(column['name']), values)
+
+        columns = [c for n in names for c in self._columns_by_name[n]]
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(('time', 'name', 'value'))
+            writer.writerows(heapq.merge(*(rows(c) for c in columns), key=lambda r: r[0]))
+
+    #=============#
+    #== Columns ==#
+    #=============#
+    def _merged(self, columns: list[dict]):
+        def records(column):
+            values = self._column_values(column)
+            return zip(self._column_timestamps(column), values, strict=True)
+        return heapq.merge(*(records(c) for c in columns), key=lambda r: r[0])
+
+    def _record_count(self, column: dict) -> int:
+        # A crash while flushing can leave values without their timestamps: only complete records are read
+        t_count = len(self._view(column['file'] + '.t', 'd'))
+        v_count = len(self._view(column['file'] + '.v', column['dtype'])) // max(column.get('length', 0), 1)
+        return min(t_count, v_count)
+
+    def _last_timestamp(self, column: dict) -> float:
+        n = self._record_count(column)
+        return self._column_timestamps(column)[n-1] if n else float('-inf')
+
+    def _column_timestamps(self, column: dict) -> memoryview:
+        return self._view(column['file'] + '.t', 'd')[:self._record_count(column)]
+
+    def _column_raw_values(self, column: dict) -> memoryview:
+        n = self._record_count(column) * max(column.get('length', 0), 1)
+        return self._view(column['file'] + '.v', column['dtype'])[:n]
+
+    def _column_values(self, column: dict) -> memoryview | list:
+        values = self._column_raw_values(column)
+        length = column.get('length', 0)
+        if length:
+            return [values[i:i+length] for i in range(0, len(values), length)]
+        elif column['type'] == 'string':
+            heap = self._mmap(column['file'] + '.s')
+            return [heap[o+1:o+1+heap[o]].decode('ascii') for o in values]
+        elif column['type'] == 'bool':
+            return [v != 0 for v in values]
+        return values
+
+    def _column_value(self, column: dict, i: int):
+        values = self._column_raw_values(column)
+        length = column.get('length', 0)
+        if length:
+            return values[i*length:(i+1)*length]
+        v = values[i]
+        if column['type'] == 'string':
+            heap = self._mmap(column['file'] + '.s')
+            return heap[v+1:v+1+heap[v]].decode('ascii')
+        elif column['type'] == 'bool':
+            return v != 0
+        return v
+
+    def _column_numpy(self, column: dict):
+        import numpy as np
+
+        t = np.frombuffer(self._column_timestamps(column), dtype=np.float64)
+        if column['type'] == 'string':
+            return t, np.array(self._column_values(column), dtype=object)
+        v = np.frombuffer(self._column_raw_values(column), dtype=np.dtype(column['dtype']))
+        if column['type'] == 'bool':
+            v = v.astype(bool)
+        elif column.get('length', 0):
+            v = v.reshape(-1, column['length'])
+        return t, v
+
+    def _view(self, file: str, dtype: str) -> memoryview:
+        m = self._mmap(file)
+        size = struct.calcsize(dtype)
+        return memoryview(m)[:len(m) - len(m) % size].cast(dtype)
+
+    def _mmap(self, file: str) -> mmap.mmap | bytes:
+        m = self._maps.get(file)
+        if m is None:
+            with open(os.path.join(self.path, file), 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return b''
+                m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[file] = m
+        return m
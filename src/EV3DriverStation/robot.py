@@ -1,14 +1,17 @@
 from __future__ import annotations
 
+import math
 from datetime import datetime
-from enum import Enum
-from time import time
+from time import monotonic
 
-from PySide6.QtCore import Property, QObject, QSettings, Qt, QTimer, Signal, Slot
+from PySide6.QtCore import Property, QMetaObject, QObject, QSettings, Qt, QThread, QTimer, Signal, Slot
 from PySide6.QtGui import QKeyEvent
 
+from .protocol import ProgramStatus, RobotMode, RobotStatus
+
 MAX_TELEOP_TIME = 120
 MAX_AUTO_TIME = 60
+TIME_DISPLAY_INTERVAL = 100     # ms, the timer is displayed with one decimal
 
 class Robot(QObject):
     def __init__(self, keyboard_controller):
@@ -25,9 +28,16 @@ class Robot(QObject):
         self.capture_keyboard = False
         self._capture_keyboard_ref_counter = 0
 
-        self.timer = QTimer()
-        self.timer.setInterval(30)
+        # The match time is computed from a monotonic clock: the display timer only refreshes QML at the resolution
+        # it shows, and the auto-disable instant is armed as a single precise deadline.
+        self.timer = QTimer(self)
+        self.timer.setInterval(TIME_DISPLAY_INTERVAL)
         self.timer.timeout.connect(self.increment_timer)
+        self._auto_disable_timer = QTimer(self)
+        self._auto_disable_timer.setSingleShot(True)
+        self._auto_disable_timer.setTimerType(Qt.PreciseTimer)
+        self._auto_disable_timer.timeout.connect(self._auto_disable_deadline_reached)
+        self._auto_disable_suspended = False
 
     #====================#
     #== QML PROPERTIES ==#
@@ -129,43 +139,79 @@ class Robot(QObject):
         self._auto_disable = value
         self.auto_disable_changed.emit(self._auto_disable)
         QSettings('EV3DriverStation').setValue("auto_disable_on_timer", value)
+        self._sync_timers()
 
     # --- Timer --- #
     time_changed = Signal(float)
     @Property(float, notify=time_changed)
     def time(self) -> float:
-        return self._time + (time() - self._timer_start_t if self._timer_start_t else 0)
+        return self._time + (monotonic() - self._timer_start_t if self._timer_start_t is not None else 0)
+
+    @property
+    def time_limit(self) -> float | None:
+        """
+        Duration after which the robot is disabled in the current mode when ``auto_disable`` is set.
+        """
+        return {RobotMode.AUTO: MAX_AUTO_TIME, RobotMode.TELEOP: MAX_TELEOP_TIME}.get(self._mode)
 
     @Slot()
     def reset_timer(self):
         self._time = 0
         if self._timer_start_t is not None:
-            self._timer_start_t = time()
+            self._timer_start_t = monotonic()
+            self._sync_timers()
         self.time_changed.emit(self._time)
 
     @Slot()
     def start_timer(self):
-        self._timer_start_t = time()
-        self.timer.start()
+        self._timer_start_t = monotonic()
+        self._sync_timers()
 
     @Slot()
     def stop_timer(self):
-        self.timer.stop()
         if self._timer_start_t is not None:
-            self._time += time() - self._timer_start_t
+            self._time += monotonic() - self._timer_start_t
         self._timer_start_t = None
+        self._sync_timers()
+        self.time_changed.emit(self._time)
 
     def increment_timer(self):
-        self.time_changed.emit(self._time)
+        self.time_changed.emit(self.time)
+
+    @Slot()
+    def _sync_timers(self):
+        # The robot status is also set from the UDP listener thread, where QTimers can't be started or stopped:
+        # the timers are then updated from the robot's thread. The deadline is computed from the monotonic match
+        # time when it is armed, so the delay of the queued call doesn't shift it.
+        if QThread.currentThread() != self.thread():
+            QMetaObject.invokeMethod(self, '_sync_timers', Qt.QueuedConnection)
+            return
+        if self._timer_start_t is None:
+            self.timer.stop()
+        elif not self.timer.isActive():
+            self.timer.start()
 
         # Auto disable robot after 60 seconds in auto and 120 seconds in teleop
-        if self.auto_disable:
-            time = self.time
-            if self.mode == RobotMode.AUTO and time >= MAX_AUTO_TIME:
-                self.enabled = False
-            elif self.mode == RobotMode.TELEOP and time >= MAX_TELEOP_TIME:
-                self.enabled = False
-                self._time = MAX_TELEOP_TIME
+        self._auto_disable_timer.stop()
+        limit = self.time_limit
+        if self._timer_start_t is None or not self.auto_disable or self._auto_disable_suspended or limit is None:
+            return
+        self._auto_disable_timer.start(max(0, math.ceil((limit - self.time) * 1000)))
+
+    def suspend_auto_disable(self, suspended: bool):
+        """
+        Ignore the auto-disable deadline (without changing the setting) while a match sequencer drives the robot.
+        """
+        self._auto_disable_suspended = suspended
+        self._sync_timers()
+
+    def _auto_disable_deadline_reached(self):
+        limit = self.time_limit
+        self.enabled = False
+        if limit is not None and self._mode == RobotMode.TELEOP:
+            # Show the exact limit rather than the few microseconds after it
+            self._time = limit
+            self.time_changed.emit(self._time)
 
     # --- Program date --- #
     programLastUpdate_changed = Signal(str)
@@ -228,29 +274,3 @@ class Robot(QObject):
             return True
 
         return False
-
-
-class RobotMode(str, Enum):
-    AUTO = 'Autonomous'
-    TELEOP = 'Teleoperated'
-    TEST = 'Test'
-
-    @staticmethod
-    def from_index(index: int) -> RobotMode:
-        return {
-            1: RobotMode.AUTO,
-            2: RobotMode.TELEOP,
-            3: RobotMode.TEST
-        }[index]
-
-
-class RobotStatus(str, Enum):
-    ENABLED = 'Enabled'
-    DISABLED = 'Disabled'
-    IDLE = 'Idle'
-
-
-class ProgramStatus(str, Enum):
-    IDLE = 'Idle'
-    STARTING = 'Starting'
-    RUNNING = 'Running'
\ No newline at end of file
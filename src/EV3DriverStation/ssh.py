@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+__all__ = ["RobotSSH", "RobotConnectionError", "ConnectionStatus", "ConnectionFailedReason", "signal_strength"]
+
+import socket
+import time
+import traceback
+from enum import Enum
+from os import path
+from typing import TYPE_CHECKING, Callable
+
+from .protocol import ProgramStatus
+
+if TYPE_CHECKING:
+    from fabric import Connection as SSHConnection
+
+
+WINDOWS_LINE_ENDING = b'\r\n'
+UNIX_LINE_ENDING = b'\n'
+LOCK_PATH = "robot.lock"
+SCRIPT_CWD = "/run/user/1000/"
+MAX_LOCK_AGE = 10   # s after which the lock of a silent Driver Station is ignored
+
+PING_TIMEOUT = 5 # s before robot is considered disconnected
+
+PROGRAM_STATUS_CODES = {'0': ProgramStatus.IDLE, '1': ProgramStatus.STARTING, '2': ProgramStatus.RUNNING}
+
+
+class RobotConnectionError(Exception):
+    def __init__(self, reason: ConnectionFailedReason, message: str):
+        super().__init__(message)
+        self.reason = reason
+        self.message = message
+
+
+class RobotSSH:
+    """
+    SSH link with the robot, shared by the GUI :class:`RobotNetwork` and the :class:`DriverStationCore`.
+
+    :meth:`connect` pings the robot, opens the SSH connection, waits for the lock of another Driver Station to expire,
+    locks the robot and pushes the DS.sh script. :meth:`refresh_status` must then be called every few seconds: DS.sh
+    refreshes the lock and reports the program status and the battery and CPU load. :meth:`close` releases the lock.
+
+    The address is ``[user[:password]@]host[:port]`` (``robot:maker`` and port 22 by default).
+    """
+    def __init__(self, address: str, on_status: Callable[[ConnectionStatus], None] | None = None):
+        self.address = address
+        self.on_status = on_status
+        self._ssh: SSHConnection | None = None
+
+        if '@' in address:
+            username, host = address.split('@', 1)
+            if ':' in username:
+                username, password = username.split(':', 1)
+            else:
+                password = ''
+        else:
+            username, password, host = 'robot', 'maker', address
+        if ':' in host:
+            host, port = host.split(':', 1)
+        else:
+            port = '22'
+        self.username, self.password, self.host, self.port = username, password, host, port
+
+    @property
+    def is_connected(self) -> bool:
+        return self._ssh is not None and self._ssh.is_connected
+
+    def _set_status(self, status: ConnectionStatus):
+        if self.on_status is not None:
+            self.on_status(status)
+
+    def run(self, cmd: str):
+        return self._ssh.run(cmd, hide=True, warn=True, timeout=5)
+
+    def connect(self) -> tuple[int, float]:
+        """
+        Connect to the robot and lock it. Return the signal strength and the average ping (ms).
+        Raise :class:`RobotConnectionError` on failure.
+        """
+        # The SSH stack (fabric, invoke, paramiko) is only loaded on the first connection attempt
+        from fabric import Config as SSHConfig
+        from fabric import Connection as SSHConnection
+        from paramiko.ssh_exception import AuthenticationException, NoValidConnectionsError
+
+        host, port, username, password = self.host, self.port, self.username, self.password
+
+        # === Ping robot ===
+        self._set_status(ConnectionStatus.PING)
+        strength, avg_ping = signal_strength(host)
+        if strength <= 0:
+            raise RobotConnectionError(ConnectionFailedReason.UNREACHABLE,
+                                       f"Address <i>{host}</i> doesn't respond to ping. "
+                                       "Check robot address and network quality.")
+
+        # === Initiate SSH Connection ===
+        self._set_status(ConnectionStatus.AUTH)
+        try:
+            config = SSHConfig(overrides={'sudo': {'password': password}})
+            ssh = SSHConnection(f"{username}@{host}:{port}", connect_timeout=30,
+                                connect_kwargs=dict(password= password),
+                                config=config)
+            ssh.open()
+        except TimeoutError:
+            raise RobotConnectionError(ConnectionFailedReason.UNREACHABLE,
+                f"Connection to <i>{host}</i> timed-out. (Robot might be to busy to respond...)") from None
+        except NoValidConnectionsError:
+            raise RobotConnectionError(ConnectionFailedReason.UNREACHABLE,
+                                       f'<i>{host}:{port}</i> is not a EV3 robot. (Or ssh is disabled.)') from None
+        except AuthenticationException:
+            raise RobotConnectionError(ConnectionFailedReason.AUTH, f'Invalid authentication with credentials:'
+                                                                    f'"{username}:{password}".') from None
+        except Exception as e:
+            msg = f'Error when connecting to the robot at <i>{username}:{password}@{host}:{port}</i>.'
+            print(msg)
+            traceback.print_exc()
+            raise RobotConnectionError(ConnectionFailedReason.AUTH,
+                                       msg+"\nCheck the console for more details.") from e
+        self._ssh = ssh
+
+        try:
+            self._lock()
+
+            # === Push DS.py script to the robot ===
+            self._set_status(ConnectionStatus.SETUP)
+            self.push_ds_script()
+        except RobotConnectionError:
+            self.close(unlock=False)
+            raise
+        except BaseException as e:
+            self.close(unlock=False)
+            if isinstance(e, Exception):
+                print("An error occured when connecting to the robot.")
+                traceback.print_exc()
+                raise RobotConnectionError(ConnectionFailedReason.RUNTIME, str(e)) from e
+            raise
+        return strength, avg_ping
+
+    def _lock(self):
+        """
+        Wait until no other Driver Station refreshed the lock file for ``MAX_LOCK_AGE`` seconds, then lock the robot.
+        """
+        # === Check if robot is already connected to another Driver Station ===
+        self._set_status(ConnectionStatus.CHECK_AVAILABLE)
+
+        def get_lock_date():
+            """
+            Read the date of the last modification of the lock file on the robot.
+            """
+            lock_stat = self.run(f'stat {SCRIPT_CWD+LOCK_PATH} -c %Y')
+            if lock_stat.exited != 0:
+                return 0
+            return float(lock_stat.stdout)
+
+        # Read lock file and system date on the robot
+        lock_date = get_lock_date()
+        robot_date = float(self.run("date +%s").stdout)
+
+        # If the lock file is not older than MAX_LOCK_AGE...
+        if robot_date - lock_date <= MAX_LOCK_AGE:
+            self._set_status(ConnectionStatus.WAIT_AVAILABLE)
+            time.sleep(MAX_LOCK_AGE)            # ...wait for MAX_LOCK_AGE seconds...
+            new_lock_date = get_lock_date()     # ...and check again the lock file date.
+            if new_lock_date != lock_date and new_lock_date != 0:
+                # If the lock file has been modified, it means that another Driver Station is using the robot.
+                # then read the hostname of the computer that locked the robot.
+                lock_host = self.run("cat "+SCRIPT_CWD+LOCK_PATH).stdout.strip()
+                if lock_host == '':
+                    lock_host = 'an unknown device'
+                elif lock_host == socket.gethostname():
+                    lock_host = 'this computer. Another instance of EV3DriverStation is probably already started.'
+                else:
+                    lock_host = f'<i>{lock_host}</i>'
+                raise RobotConnectionError(ConnectionFailedReason.LOCKED,
+                                           f"The robot is already used by {lock_host}.")
+
+        # === Write lock file ===
+        self.run(f'echo "{socket.gethostname()}" > '+SCRIPT_CWD+LOCK_PATH)
+
+    def push_ds_script(self):
+        local_path = path.join(path.abspath(path.dirname(__file__)), 'DS.sh')
+        # Ensure linux end of line
+        with open(local_path, 'rb') as f:
+            content = f.read()
+        content = content.replace(WINDOWS_LINE_ENDING, UNIX_LINE_ENDING)
+        with open(local_path, 'wb') as f:
+            f.write(content)
+
+        self._ssh.put(local_path, SCRIPT_CWD + 'DS.sh')
+        self.run("chmod +x " + SCRIPT_CWD + 'DS.sh')
+
+    def refresh_status(self) -> tuple[ProgramStatus | None, dict[str, str]]:
+        """
+        Run DS.sh on the robot, which also refreshes the lock. Return the program status (None if not reported) and
+        the other status lines by code (``V``: EV3 voltage, ``A``: aux voltage, ``C``: current, ``L``: CPU load).
+        Raise :class:`RobotConnectionError` if the link is lost, TimeoutError if the robot didn't answer in time.
+        """
+        from invoke.exceptions import CommandTimedOut
+
+        if not self.is_connected:
+            raise RobotConnectionError(ConnectionFailedReason.RUNTIME, "SSH connection with the robot has been lost.")
+        try:
+            status = self.run(SCRIPT_CWD+'DS.sh')
+        except CommandTimedOut:
+            raise TimeoutError("Timeout when running the SSH script.") from None
+        if status.stderr:
+            print("Error when running the SSH script:")
+            print(status.stderr)
+            raise RobotConnectionError(ConnectionFailedReason.RUNTIME, "SSH script returned an error.")
+
+        program_status = None
+        robot_status = {}
+        for line in status.stdout.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            line_code, line_content = line[0], line[1:]
+            if line_code == 'S':
+                program_status = PROGRAM_STATUS_CODES.get(line_content, program_status)
+            robot_status[line_code] = line_content
+        return program_status, robot_status
+
+    def read_program_date(self) -> str:
+        return self.run('cat version.txt 2>/dev/null').stdout.strip()
+
+    def check_java_running(self) -> bool:
+        return self.is_connected and self.run('pgrep java').stdout != ''
+
+    def close(self, unlock: bool = True):
+        ssh, self._ssh = self._ssh, None
+        if ssh is None:
+            return
+        if unlock:
+            try:
+                ssh.run('rm -f ' + SCRIPT_CWD + LOCK_PATH, hide=True, warn=True, timeout=5)
+            except Exception:
+                pass
+        ssh.close()
+
+
+def signal_strength(host: str) -> tuple[int, float]:
+    """
+    Ping ``host`` and rate the link from 0 (unreachable) to 5. Return the rating and the average ping (ms).
+    """
+    from icmplib import ping
+
+    ping_result = ping(host, count=3, interval=.1, timeout=PING_TIMEOUT)
+
+    if not ping_result.is_alive:
+        strength = 0
+    elif ping_result.max_rtt <= 30 and ping_result.packet_loss == 0:
+        strength = 5    # No packet loss and max ping < 30ms
+    elif ping_result.avg_rtt <= 30 and ping_result.packet_loss == 0:
+        strength = 4    # No packet loss and mean ping < 30ms
+    elif ping_result.avg_rtt <= 120 and ping_result.packet_loss <= 1:
+        strength = 3    # Packet loss <= 1/3 and mean ping < 120ms
+    elif ping_result.avg_rtt <= 500:
+        strength = 2    # Packet loss <= 2/3 and mean ping < 500ms
+    else:
+        strength = 1    # Packet loss <= 2/3 and mean ping >= 500ms
+    return strength, ping_result.avg_rtt
+
+
+class ConnectionStatus(str, Enum):
+    CONNECTED = 'Connected'
+    PING = 'Pinging'
+    AUTH = 'Authenticating'
+    CHECK_AVAILABLE = 'Check Available'
+    WAIT_AVAILABLE = 'Wait Available'
+    SETUP = 'Setuping'
+    DISCONNECTED = 'Disconnected'
+
+    @classmethod
+    def __contains__(cls, item):
+        return item in cls.__members__.values()
+
+
+class ConnectionFailedReason(str, Enum):
+    UNREACHABLE = 'Unreachable'
+    AUTH = 'Authentication'
+    LOCKED = 'Locked'
+    SETUP = 'Setup'
+    RUNTIME = 'Runtime'
+
+    @classmethod
+    def __contains__(cls, item):
+        return item in cls.__members__.values()
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+__all__ = ["measure_imports", "measure_first_frame", "run_benchmark"]
+
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+FIRST_FRAME_BUDGET_MS = 2000    # Time from the process start to the first frame of the main window
+IMPORT_BUDGET_MS = 1000         # Cumulative import time of EV3DriverStation.app
+# Modules that must only be loaded on first use: the SSH and ICMP stacks on connection, YAML with the first schema
+DEFERRED_MODULES = ('fabric', 'invoke', 'paramiko', 'icmplib', 'yaml')
+
+_IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$')
+_SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run_python(*args: str, timeout: float = 60) -> subprocess.CompletedProcess:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(p for p in (_SRC_DIR, env.get('PYTHONPATH')) if p)
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, env=env, timeout=timeout)
+
+
+def measure_imports(module: str = 'EV3DriverStation.app') -> list[tuple[str, float, float, int]]:
+    """
+    Import ``module`` in a fresh interpreter with ``-X importtime``. Return the ``(name, self_ms, cumulative_ms,
+    depth)`` of every imported module, in import order.
+    """
+    result = _run_python('-X', 'importtime', '-c', f'import {module}')
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+    imports = []
+    for line in result.stderr.splitlines():
+        m = _IMPORTTIME_RE.match(line)
+        if m is not None:
+            imports.append((m[4], int(m[1]) / 1000, int(m[2]) / 1000, len(m[3]) // 2))
+    return imports
+
+
+def measure_first_frame(timeout: float = 60) -> dict:
+    """
+    Start the GUI in a fresh interpreter and measure the time (ms) to import the app, to load the QML and to render
+    the first frame of the main window. ``process`` is measured from the process creation (interpreter start
+    included). ``deferred`` lists the :data:`DEFERRED_MODULES` loaded when the first frame was rendered.
+    """
+    t0 = time.perf_counter()
+    result = _run_python('-m', 'EV3DriverStation.startup', '--first-frame-child', timeout=timeout)
+    process_ms = (time.perf_counter() - t0) * 1000
+    for line in result.stdout.splitlines():
+        if line.startswith('{'):
+            timings = json.loads(line)
+            if 'first_frame' not in timings:
+                break
+            timings['process'] = process_ms - timings.pop('exit')
+            return timings
+    raise RuntimeError(f"The GUI didn't render its first frame:\n{result.stderr}")
+
+
+def _first_frame_child():
+    t0 = time.perf_counter()
+    from PySide6.QtQuick import QQuickWindow
+
+    from .app import GuiApp
+    timings = {'import': (time.perf_counter() - t0) * 1000}
+
+    app = GuiApp()
+
+    def object_created(obj, url):
+        timings['qml'] = (time.perf_counter() - t0) * 1000
+        if isinstance(obj, QQuickWindow):
+            obj.frameSwapped.connect(first_frame)
+
+    def first_frame():
+        if 'first_frame' not in timings:
+            timings['first_frame'] = (time.perf_counter() - t0) * 1000
+            # Modules loaded by the app construction and the QML too, not only by the import of the app module
+            timings['deferred'] = [m for m in DEFERRED_MODULES if m in sys.modules]
+            app.quit()
+
+    app.engine.objectCreated.connect(object_created)
+    app.exec()
+    # Time spent closing the app, subtracted from the process time measured by the parent
+    timings['exit'] = (time.perf_counter() - t0) * 1000 - timings.get('first_frame', 0)
+    print(json.dumps(timings), flush=True)
+
+
+def run_benchmark(runs: int = 3, check: bool = False, top: int = 12) -> bool:
+    """
+    Print the import time of the station modules (and the slowest third-party ones) and the median time to first
+    frame over ``runs`` starts. If ``check`` is set, return False when a budget is exceeded or a deferred module is
+    imported at startup.
+    """
+    imports = measure_imports()
+    total_ms = next(cumulative for name, _, cumulative, depth in reversed(imports) if depth == 0
+                    and name == 'EV3DriverStation.app')
+    print(f"{'Import time (ms)':<46} self cumulative")
+    for name, self_ms, cumulative_ms, _ in imports:
+        if name.startswith('EV3DriverStation'):
+            print(f"  {name:<44} {self_ms:6.1f} {cumulative_ms:10.1f}")
+    print("Slowest third-party modules (self time)")
+    others = sorted((i for i in imports if not i[0].startswith('EV3DriverStation')), key=lambda i: -i[1])
+    for name, self_ms, cumulative_ms, _ in others[:top]:
+        print(f"  {name:<44} {self_ms:6.1f} {cumulative_ms:10.1f}")
+
+    frames = sorted((measure_first_frame() for _ in range(runs)), key=lambda t: t['first_frame'])
+    median = frames[len(frames) // 2]
+    print(f"First frame (median of {runs}): import {median['import']:.0f} ms, QML loaded {median['qml']:.0f} ms, "
+          f"first frame {median['first_frame']:.0f} ms, from process start {median['process']:.0f} ms")
+
+    imported = {name.split('.')[0] for name, *_ in imports}
+    imported.update(m for frame in frames for m in frame['deferred'])
+    deferred = [m for m in DEFERRED_MODULES if m in imported]
+    ok = True
+    if deferred:
+        print(f"FAIL: {', '.join(deferred)} loaded before the first frame")
+        ok = False
+    if total_ms > IMPORT_BUDGET_MS:
+        print(f"FAIL: import time {total_ms:.0f} ms > {IMPORT_BUDGET_MS} ms")
+        ok = False
+    if median['process'] > FIRST_FRAME_BUDGET_MS:
+        print(f"FAIL: first frame after {median['process']:.0f} ms > {FIRST_FRAME_BUDGET_MS} ms")
+        ok = False
+    if check and ok:
+        print("Startup within budget")
+    return ok or not check
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure the startup time of the driver station.")
+    parser.add_argument('--runs', type=int, default=3, help="Number of GUI starts to measure the first frame")
+    parser.add_argument('--check', action='store_true', help="Exit with an error if a startup budget is exceeded")
+    parser.add_argument('--first-frame-child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.first_frame_child:
+        _first_frame_child()
+    else:
+        sys.exit(0 if run_benchmark(args.runs, args.check) else 1)
@@ -0,0 +1,589 @@
+from __future__ import annotations
+
+__all__ = ["TelemetryServer"]
+
+import asyncio
+import base64
+import fnmatch
+import hashlib
+import json
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 5810
+
+INBOX_SIZE = 1024       # Telemetry packets buffered between the receive thread and the server loop
+MAX_CLIENT_RATE = 100   # Hz
+DEFAULT_CLIENT_RATE = 20
+SEND_TIMEOUT = 2        # s before a client that doesn't read its socket is disconnected
+MAX_FRAME_SIZE = 64 * 1024  # Bytes of the largest message accepted from a client (subscription updates are small)
+
+WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+WS_TEXT, WS_BINARY, WS_CLOSE, WS_PING, WS_PONG = 0x1, 0x2, 0x8, 0x9, 0xA
+WS_CLOSE_TOO_BIG = 1009
+
+# Binary frames: kind (B), timestamp (d), count (H) then count x [variable index (H), value]
+# (strings are length-prefixed (B), arrays are prefixed by their number of elements (H))
+BINARY_HEADER = struct.Struct('<BdH')
+BINARY_VALUES = 1
+BINARY_VALUE_FORMATS = {
+    'bool': struct.Struct('<?'),
+    'int': struct.Struct('<h'),
+    'int32': struct.Struct('<i'),
+    'int64': struct.Struct('<q'),
+    'float': struct.Struct('<f'),
+    'double': struct.Struct('<d'),
+}
+
+
+class TelemetryServer:
+    """
+    Embedded HTTP/WebSocket server streaming decoded telemetry to local subscribers.
+
+    Endpoints:
+        - ``GET /schema``: JSON list of the current variables (``name``, ``type``, ``index``).
+        - ``GET /values``: JSON snapshot of the last known values.
+        - ``GET /stream`` (WebSocket): ``?vars=<glob>,<glob>&rate=<Hz>&format=json|binary``. A schema frame (JSON text)
+          is sent on connection and on every schema change, followed by value frames. Clients may send
+          ``{"vars": [...], "rate": ...}`` text messages to change their subscription.
+
+    :meth:`publish` is called from the UDP receive thread and never blocks: packets are appended to a bounded inbox
+    drained by the server loop. Each client conflates the values it hasn't been sent yet (keeping only the latest one
+    per variable) and is sent at most ``rate`` frames per second, so a slow client only ever receives fresher data
+    and never stalls the others or the receive path.
+    """
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self.host = host
+        self.port = port
+
+        self._inbox: deque[tuple] = deque(maxlen=INBOX_SIZE)
+        self._inbox_scheduled = False
+        self._inbox_lock = threading.Lock()
+
+        self._schema: list[tuple[str, str]] = []
+        self._schema_index: dict[str, int] = {}
+        self._values: dict[str, bool | int | float | str] = {}
+        self._clients: set[_Client] = set()
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._server: asyncio.base_events.Server | None = None
+        self._thread: threading.Thread | None = None
+        self._started = threading.Event()
+        self._start_error: BaseException | None = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/stream"
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None
+
+    @property
+    def client_count(self) -> int:
+        return len(self._clients)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._started.clear()
+        self._start_error = None
+        self._thread = threading.Thread(target=self._run, name="TelemetryServer", daemon=True)
+        self._thread.start()
+        self._started.wait()
+        if self._start_error is not None:
+            self._thread.join()
+            self._thread = None
+            raise self._start_error
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+
+    #================#
+    #== Publishing ==#
+    #================#
+    def publish(self, values: list[tuple[str, str, bool | int | float | str]], t: float | None = None):
+        """
+        Publish the values decoded from one packet. ``values`` is a list of ``(name, type, value)``.
+        """
+        if self._loop is None or not values:
+            return
+        self._push(('values', time.time() if t is None else t, values))
+
+    def publish_schema(self, schema: list[tuple[str, str]]):
+        """
+        Publish a new telemetry schema: the list of ``(name, type)`` ordered by variable ID.
+        """
+        if self._loop is None:
+            return
+        self._push(('schema', list(schema)))
+
+    def _push(self, item: tuple):
+        # The inbox is bounded: if the loop lags behind, the oldest packets are dropped
+        self._inbox.append(item)
+        with self._inbox_lock:
+            if self._inbox_scheduled:
+                return
+            self._inbox_scheduled = True
+        try:
+            self._loop.call_soon_threadsafe(self._drain_inbox)
+        except RuntimeError:
+            pass    # Loop closed
+
+    #=================#
+    #== Server Loop ==#
+    #=================#
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            self._server = loop.run_until_complete(asyncio.start_server(self._handle_connection, self.host, self.port))
+            self.port = self._server.sockets[0].getsockname()[1]
+        except BaseException as e:
+            self._start_error = e
+            self._started.set()
+            loop.close()
+            return
+
+        self._loop = loop
+        self._started.set()
+        try:
+            loop.run_forever()
+        finally:
+            self._loop = None
+            self._server.close()
+            for client in list(self._clients):
+                client.close()
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.run_until_complete(self._server.wait_closed())
+            loop.close()
+            self._clients.clear()
+
+    def _drain_inbox(self):
+        with self._inbox_lock:
+            self._inbox_scheduled = False
+        inbox = self._inbox
+        while inbox:
+            item = inbox.popleft()
+            if item[0] == 'values':
+                _, t, values = item
+                for name, _type, value in values:
+                    self._values[name] = value
+                for client in self._clients:
+                    client.push_values(t, values)
+            else:
+                self._set_schema(item[1])
+
+    def _set_schema(self, schema: list[tuple[str, str]]):
+        self._schema = schema
+        self._schema_index = {name: i for i, (name, _) in enumerate(schema)}
+        self._values = {name: v for name, v in self._values.items() if name in self._schema_index}
+        for client in self._clients:
+            client.push_schema()
+
+    def schema_frame(self) -> str:
+        return json.dumps({'type': 'schema', 'variables': self.schema_json()})
+
+    def schema_json(self) -> list[dict]:
+        return [{'name': name, 'type': t, 'index': i} for i, (name, t) in enumerate(self._schema)]
+
+    #====================#
+    #== HTTP/WebSocket ==#
+    #====================#
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), SEND_TIMEOUT)
+            headers = {}
+            while True:
+                line = await asyncio.wait_for(reader.readline(), SEND_TIMEOUT)
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                key, _, value = line.decode('latin-1').partition(':')
+                headers[key.strip().lower()] = value.strip()
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+        except (asyncio.TimeoutError, ValueError, ConnectionError):
+            writer.close()
+            return
+
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            if method != 'GET':
+                await _http_response(writer, 405, 'Method Not Allowed')
+            elif url.path == '/schema':
+                await _http_response(writer, 200, json.dumps(self.schema_json()), 'application/json')
+            elif url.path == '/values':
+                await _http_response(writer, 200, json.dumps(self._values, default=_json_default), 'application/json')
+            elif url.path == '/stream' and headers.get('upgrade', '').lower() == 'websocket':
+                await self._handle_websocket(reader, writer, headers, query)
+            else:
+                await _http_response(writer, 404, 'Not Found')
+        except (ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_websocket(self, reader, writer, headers, query):
+        key = headers.get('sec-websocket-key')
+        if key is None:
+            await _http_response(writer, 400, 'Bad Request')
+            return
+        accept = base64.b64encode(hashlib.sha1(key.encode('ascii') + WS_GUID).digest()).decode('ascii')
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode('ascii'))
+        await writer.drain()
+
+        client = _Client(self, writer, binary=query.get('format') == 'binary')
+        client.configure(query.get('vars'), query.get('rate'))
+        self._clients.add(client)
+        sender = asyncio.ensure_future(client.send_loop())
+        try:
+            while True:
+                try:
+                    opcode, payload = await _ws_read_frame(reader)
+                except _FrameTooLarge:
+                    writer.write(_ws_frame(WS_CLOSE, struct.pack('!H', WS_CLOSE_TOO_BIG)))
+                    await asyncio.wait_for(writer.drain(), SEND_TIMEOUT)
+                    break
+                if opcode == WS_CLOSE:
+                    break
+                elif opcode == WS_PING:
+                    writer.write(_ws_frame(WS_PONG, payload))
+                elif opcode == WS_TEXT:
+                    try:
+                        message = json.loads(payload)
+                    except ValueError:
+                        continue
+                    if isinstance(message, dict):
+                        client.configure(message.get('vars'), message.get('rate'))
+        finally:
+            self._clients.discard(client)
+            client.close()
+            sender.cancel()
+
+
+class _Client:
+    def __init__(self, server: TelemetryServer, writer: asyncio.StreamWriter, binary: bool):
+        self.server = server
+        self.writer = writer
+        self.binary = binary
+        self.dropped_values = 0
+
+        self._patterns: list[str] | None = None
+        self._subscribed: dict[str, bool] = {}  # Cache of the filter result per variable name
+        self._min_interval = 1 / DEFAULT_CLIENT_RATE
+        self._pending: dict[str, tuple[str, bool | int | float | str]] = {}
+        self._pending_t = 0.0
+        self._schema_pending = True
+        self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        self._closed = False
+
+    def configure(self, patterns: str | list[str] | None, rate: str | float | None):
+        if patterns is not None:
+            if isinstance(patterns, str):
+                patterns = [p for p in patterns.split(',') if p]
+            self._patterns = list(patterns) or None
+            self._subscribed.clear()
+        if rate is not None:
+            try:
+                rate = min(max(float(rate), 0.1), MAX_CLIENT_RATE)
+            except (TypeError, ValueError):
+                return
+            self._min_interval = 1 / rate
+
+    def is_subscribed(self, name: str) -> bool:
+        subscribed = self._subscribed.get(name)
+        if subscribed is None:
+            subscribed = self._patterns is None or any(fnmatch.fnmatchcase(name, p) for p in self._patterns)
+            self._subscribed[name] = subscribed
+        return subscribed
+
+    def push_values(self, t: float, values: list[tuple[str, str, bool | int | float | str]]):
+        pending = self._pending
+        for name, var_type, value in values:
+            if self.is_subscribed(name):
+                if name in pending:
+                    self.dropped_values += 1    # Stale value replaced before being sent
+                pending[name] = (var_type, value)
+        self._pending_t = t
+        if pending:
+            self._wakeup.set()
+
+    def push_schema(self):
+        self._schema_pending = True
+        self._pending.clear()
+        self._wakeup.set()
+
+    async def send_loop(self):
+        loop = asyncio.get_running_loop()
+        next_send = 0.0
+        while not self._closed:
+            await self._wakeup.wait()
+            delay = next_send - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)  # Rate limit: values keep being conflated meanwhile
+            self._wakeup.clear()
+            next_send = loop.time() + self._min_interval
+
+            if self._schema_pending:
+                self._schema_pending = False
+                self.writer.write(_ws_frame(WS_TEXT, self.server.schema_frame().encode()))
+            if self._pending:
+                pending, self._pending = self._pending, {}
+                self.writer.write(self._encode_values(self._pending_t, pending))
+            try:
+                await asyncio.wait_for(self.writer.drain(), SEND_TIMEOUT)
+            except (asyncio.TimeoutError, ConnectionError):
+                self.close()
+
+    def _encode_values(self, t: float, values: dict[str, tuple[str, bool | int | float | str]]) -> bytes:
+        if not self.binary:
+            payload = json.dumps({'type': 'values', 't': t, 'values': {k: v for k, (_, v) in values.items()}},
+                                 default=_json_default)
+            return _ws_frame(WS_TEXT, payload.encode())
+
+        index = self.server._schema_index
+        body = bytearray()
+        count = 0
+        for name, (var_type, value) in values.items():
+            i = index.get(name)
+            if i is None:
+                continue
+            body += struct.pack('<H', i)
+            fmt = BINARY_VALUE_FORMATS.get(var_type)
+            if fmt is not None:
+                body += fmt.pack(value)
+            elif var_type.endswith('[]'):
+                element_fmt = BINARY_VALUE_FORMATS[var_type[:-2]].format
+                body += struct.pack(f'<H{len(value)}{element_fmt[1:]}', len(value), *value.tolist())
+            else:
+                encoded = str(value).encode('ascii', errors='replace')[:255]
+                body += bytes((len(encoded),)) + encoded
+            count += 1
+        return _ws_frame(WS_BINARY, BINARY_HEADER.pack(BINARY_VALUES, t, count) + body)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self.writer.close()
+
+
+#=============#
+#== Helpers ==#
+#=============#
+def _json_default(o):
+    # Array values are buffer views (NumPy arrays or memoryviews)
+    if hasattr(o, 'tolist'):
+        return o.tolist()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+async def _http_response(writer: asyncio.StreamWriter, status: int, body: str, content_type: str = 'text/plain'):
+    data = body.encode()
+    writer.write((f"HTTP/1.1 {status} {body if status >= 400 else 'OK'}\r\nContent-Type: {content_type}\r\n"
+                  f"Content-Length: {len(data)}\r\nAccess-Control-Allow-Origin: *\r\nConnection: close\r\n\r\n"
+                  ).encode('latin-1') + data)
+    await asyncio.wait_for(writer.drain(), SEND_TIMEOUT)
+
+
+def _ws_frame(opcode: int, payload: bytes) -> bytes:
+    size = len(payload)
+    if size < 126:
+        header = struct.pack('!BB', 0x80 | opcode, size)
+    elif size < 1 << 16:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, size)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, size)
+    return header + payload
+
+
+class _FrameTooLarge(ValueError):
+    pass
+
+
+async def _ws_read_frame(reader: asyncio.StreamReader, max_size: int | None = MAX_FRAME_SIZE) -> tuple[int, bytes]:
+    """
+    Read a (possibly fragmented) message sent by a client and return its opcode and unmasked payload.
+    Raise :class:`_FrameTooLarge` before reading a payload that would make the message exceed ``max_size`` bytes.
+    """
+    message_opcode, message = None, bytearray()
+    while True:
+        b0, b1 = await reader.readexactly(2)
+        opcode, fin = b0 & 0x0F, b0 & 0x80
+        size = b1 & 0x7F
+        if size == 126:
+            size = struct.unpack('!H', await reader.readexactly(2))[0]
+        elif size == 127:
+            size = struct.unpack('!Q', await reader.readexactly(8))[0]
+        if max_size is not None and len(message) + size > max_size:
+            raise _FrameTooLarge(f"WebSocket message larger than {max_size} bytes")
+        mask = await reader.readexactly(4) if b1 & 0x80 else None
+        payload = await reader.readexactly(size)
+        if mask is not None:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+        if opcode >= 0x8:
+            return opcode, payload   # Control frames are never fragmented
+        if opcode != 0:
+            message_opcode = opcode
+        message += payload
+        if fin:
+            return message_opcode, bytes(message)
+
+
+#===============#
+#== Load Test ==#
+#===============#
+RATE_TOLERANCE = .2             # Relative error allowed between the frame rate of a reading client and its target
+PUBLISH_P99_BUDGET_US = 2000    # publish() is called from the UDP receive thread (the GIL is shared with the clients)
+MAX_BUFFERED_BYTES = 256 * 1024  # Bytes queued on the socket of a client that never reads
+
+
+def load_test(clients: int = 20, duration: float = 5, packet_rate: float = 200, variables: int = 300,
+              slow_clients: int = 1, check: bool = False) -> bool:
+    """
+    Stream synthetic telemetry to ``clients`` local WebSocket subscribers (``slow_clients`` of which never read their
+    socket) and report the publishing cost and the frames received by each client.
+
+    If ``check`` is set, return False if a reading client isn't served at its target rate, if ``publish()`` is too
+    slow, or if the slow clients aren't conflated: every subscriber must drop stale values instead of queueing them,
+    and the data queued for a client that never reads must stay bounded.
+    """
+    server = TelemetryServer(port=0)
+    server.start()
+    schema = [(f"var{i}", 'float' if i % 2 else 'int') for i in range(variables)]
+    server.publish_schema(schema)
+
+    received = [0] * clients
+    stop = threading.Event()
+
+    async def subscriber(i: int, binary: bool, read: bool):
+        if read:
+            reader, writer = await asyncio.open_connection(server.host, server.port)
+            rate = 10 + 10 * (i % 5)
+        else:
+            # Clients never reading subscribe at the maximum rate with a small receive buffer, to fill their socket
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+            sock.setblocking(False)
+            await asyncio.get_running_loop().sock_connect(sock, (server.host, server.port))
+            reader, writer = await asyncio.open_connection(sock=sock)
+            rate = MAX_CLIENT_RATE
+        key = base64.b64encode(bytes(16)).decode()
+        writer.write((f"GET /stream?rate={rate}&format={'binary' if binary else 'json'} HTTP/1.1\r\n"
+                      f"Host: {server.host}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        await writer.drain()
+        await reader.readuntil(b'\r\n\r\n')
+        try:
+            while not stop.is_set():
+                if read:
+                    await asyncio.wait_for(_ws_read_frame(reader, max_size=None), 1)
+                    received[i] += 1
+                else:
+                    await asyncio.sleep(.1)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def subscribers():
+        await asyncio.gather(*(subscriber(i, i % 2 == 1, i >= slow_clients) for i in range(clients)))
+
+    client_thread = threading.Thread(target=asyncio.run, args=(subscribers(),))
+    client_thread.start()
+    time.sleep(.5)
+    received_before = list(received)
+
+    publish_times = []
+    t_start = time.monotonic()
+    t_end = t_start + duration
+    n = 0
+    while time.monotonic() < t_end:
+        values = [(name, t, float(n) if t == 'float' else n % 32767) for name, t in schema[n % 10::10]]
+        t0 = time.perf_counter()
+        server.publish(values)
+        publish_times.append(time.perf_counter() - t0)
+        n += 1
+        time.sleep(1 / packet_rate)
+    elapsed = time.monotonic() - t_start
+    rates = [(count - before) / elapsed for count, before in zip(received, received_before, strict=True)]
+
+    # Server side state of the subscribers still connected (the ones never reading may have been disconnected)
+    served = list(server._clients)
+    dropped = [c.dropped_values for c in served]
+    buffered = max((c.writer.transport.get_write_buffer_size() for c in served), default=0)
+
+    stop.set()
+    client_thread.join()
+    server.stop()
+
+    publish_times.sort()
+    publish_p99 = publish_times[int(len(publish_times)*.99)] * 1e6
+    print(f"Published {n} packets to {clients} clients ({slow_clients} never reading) in {duration}s.")
+    print(f"publish(): p50={publish_times[len(publish_times)//2]*1e6:.1f}us "
+          f"p99={publish_p99:.1f}us max={publish_times[-1]*1e6:.1f}us")
+    ok = True
+    conflating = 0      # Reading clients slower than the update rate of each variable: they must drop stale values
+    for i, rate in enumerate(rates):
+        kind = 'slow' if i < slow_clients else ('binary' if i % 2 else 'json')
+        target = 10 + 10 * (i % 5)
+        line = f"  client {i:2d} ({kind:6s}, {target:2d} Hz): {rate:6.1f} frames/s"
+        if i < slow_clients:
+            target = MAX_CLIENT_RATE
+            line = f"  client {i:2d} ({kind:6s}, {target:2d} Hz): {rate:6.1f} frames/s"
+        elif abs(rate - target) > target * RATE_TOLERANCE:
+            if check:
+                line += "  FAIL: off target rate"
+            ok = False
+        elif target < packet_rate / 10:
+            conflating += 1
+        print(line)
+    print(f"{len(served)} clients connected at the end ({clients - len(served)} disconnected), "
+          f"{sum(1 for d in dropped if d)} conflating, max {buffered // 1024} kB queued for a client")
+
+    if not check:
+        return True
+    if publish_p99 > PUBLISH_P99_BUDGET_US:
+        print(f"FAIL: publish() p99 {publish_p99:.0f} us > {PUBLISH_P99_BUDGET_US} us")
+        ok = False
+    if len(served) < clients - slow_clients:
+        print("FAIL: a reading client was disconnected")
+        ok = False
+    if sum(1 for d in dropped if d) < conflating:
+        print("FAIL: a client slower than the telemetry didn't conflate its pending values")
+        ok = False
+    if buffered > MAX_BUFFERED_BYTES:
+        print(f"FAIL: {buffered // 1024} kB queued for a client > {MAX_BUFFERED_BYTES // 1024} kB")
+        ok = False
+    if ok:
+        print("Streaming load test passed")
+    return ok
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Stream synthetic telemetry to local WebSocket subscribers.")
+    parser.add_argument('--clients', type=int, default=20, help="Number of subscribers")
+    parser.add_argument('--slow-clients', type=int, default=1, help="Subscribers that never read their socket")
+    parser.add_argument('--duration', type=float, default=5, help="Duration of the test (s)")
+    parser.add_argument('--check', action='store_true', help="Exit with an error if the test fails")
+    args = parser.parse_args()
+    sys.exit(0 if load_test(args.clients, args.duration, slow_clients=args.slow_clients, check=args.check) else 1)
@@ -1,32 +1,56 @@
 from __future__ import annotations
 
-import re
-import struct
+import difflib
+import os
 import threading
+import time
 import traceback
-from enum import Enum
 
-import yaml
-from PySide6.QtCore import Property, QObject, Signal, Slot
+from PySide6.QtCore import Property, QAbstractListModel, QModelIndex, QObject, QSettings, Qt, Signal, Slot
+
+from .alerts import AlertAction, AlertEngine, AlertRule
+from .link import TelemetryLink, TelemetryRetryPolicy
+from .protocol import SCHEMA_DELTA_MARKER, SCHEMA_MARKER, TelemetryStore, TelemetryVarType
+from .recorder import TelemetryRecorder
+from .streaming import DEFAULT_HOST as DEFAULT_SERVER_HOST
+from .streaming import DEFAULT_PORT as DEFAULT_SERVER_PORT
+from .streaming import TelemetryServer
+from .utils import RateCounter, WindowedStats
+
+DEFAULT_RECORDINGS_DIR = os.path.join(os.path.expanduser('~'), 'EV3DriverStation', 'recordings')
+DEFAULT_ALERT_RULES = os.path.join(os.path.expanduser('~'), 'EV3DriverStation', 'alerts.yaml')
 
-from .utils import AverageOverTime
 
 
 class Telemetry(QObject):
-    def __init__(self):
+    def __init__(self, retry_policy: TelemetryRetryPolicy | None = None):
         super().__init__()
         self._ev3_voltage = 0
         self._aux_voltage = 0
         self._ev3_current = 0
         self._cpu_load = 0
-        self._avg_skipped_frames = AverageOverTime(5)
-        self._avg_frame_exec_time = AverageOverTime(5)
+        self._avg_skipped_frames = WindowedStats(5)
+        self._avg_frame_exec_time = WindowedStats(5)
+        self.update_rate = RateCounter()     # Telemetry values received per second
 
-        self._telemetry_data = []
+        self._telemetry_model = TelemetryModel(self)
         self._telemetry_transmitted = False
         self.newTelemetryData.connect(self.parse_new_telemetry_data)
+        self.newTelemetryDelta.connect(self.parse_telemetry_delta)
+
+        # QML facades are only created for the variables requested by name, and reused across schema reloads
+        self._facades: dict[str, TelemetryVariable] = {}
+        # The store and its facades by varID are swapped as one reference, read once by the receive thread
+        self._schema: tuple[TelemetryStore, list[TelemetryVariable | None]] = (TelemetryStore(), [])
+
+        self._recorder: TelemetryRecorder | None = None
+        self._server: TelemetryServer | None = None
+        self._alerts = AlertEngine(on_fire=self._on_alert_fired)
+        self.load_alert_rules()
+
+        # Edits and resync requests exchanged with the robot, shared with the DriverStationCore
+        self.link = TelemetryLink(retry_policy)
 
-        
     @Slot()
     def clear(self):
         self.set_ev3_voltage(0)
@@ -35,7 +59,8 @@ class Telemetry(QObject):
         self.clear_program_data()
 
     def clear_program_data(self):
-        self.set_telemetry_data([])
+        self._alerts.clear()
+        self.set_telemetry_store(TelemetryStore())
         self.set_telemetry_transmitted(False)
         self._avg_skipped_frames.clear()
         self._avg_frame_exec_time.clear()
@@ -61,44 +86,96 @@ class Telemetry(QObject):
         """
         Parse the UDP response from the robot and update the telemetry data.
         """
-        if telemetry_data[0] == 255:
+        if telemetry_data[0] == SCHEMA_MARKER:
             if len(telemetry_data) > 1:
                 telemetry_data_str = telemetry_data[1:].decode('ascii')
             else:
                 telemetry_data_str = ''
             self.newTelemetryData.emit(telemetry_data_str) # Use signal to avoid threading issues
+        elif telemetry_data[0] == SCHEMA_DELTA_MARKER:
+            self.newTelemetryDelta.emit(telemetry_data[1:].decode('ascii'))
         else:
+            store, facades = self._schema
+            alerts = self._alerts if self._alerts.is_active else None
             try:
-                telemetry_data = bytearray(telemetry_data)
-                while len(telemetry_data) > 0 and telemetry_data[0] < 255:
-                    varID = telemetry_data.pop(0)
-                    telemetry_data = self._telemetry_data[varID].from_bytes(telemetry_data)
+                received = self.link.receive_values(telemetry_data, store)
             except Exception:
                 print("Error while parsing UDP telemetry data")
                 traceback.print_exc()
-                return False
-        self.telemetryData_changed.emit()
-
-        for var in self._telemetry_data:
-            if var.editable:
-                if var.transmissionState is TelemetryVarTransmissionState.IN_TRANSMISSION:
-                    var.set_transmission_state(TelemetryVarTransmissionState.TRANSMISSION_MISSED)
-                elif var.transmissionState is TelemetryVarTransmissionState.TRANSMISSION_MISSED:
-                    var.set_transmission_state(TelemetryVarTransmissionState.CHANGED)
-        return True
+                self.link.request_full_schema()
+                return
+            for varID in received.changed:
+                if facades[varID] is not None:
+                    facades[varID].valueChanged.emit()
+            self._notify_transmission_states(received.states, store, facades)
+            if received.values:
+                self._telemetry_model.mark_rows_dirty([varID for varID, _ in received.values])
+                self.update_rate.tick(len(received.values))
+
+            recorder, server = self._recorder, self._server
+            if received.values and (recorder is not None or server is not None or alerts is not None):
+                names, types = store.names, store.types
+                recorded = [(names[varID], types[varID], value) for varID, value in received.values]
+                t = time.time()
+                if recorder is not None:
+                    recorder.record(recorded, t)
+                if server is not None:
+                    server.publish(recorded, t)
+                if alerts is not None:
+                    alerts.update([(name, value) for name, t, value in recorded if not t.is_array])
+            if alerts is not None:
+                alerts.tick()
+
+        if self.link.has_pending_edits:
+            store, facades = self._schema
+            aged = self.link.age_edits(store)
+            self._notify_transmission_states(aged, store, facades)
+            self._telemetry_model.mark_rows_dirty(aged)
 
     def generate_udp_telemetry_update(self) -> bytes:
         """
-        Generate the UDP telemetry update packet to send to the robot.
+        Generate the UDP telemetry update packet to send to the robot: the pending edits, followed by a resync
+        request if some variables received from the robot are unknown.
+        """
+        store, facades = self._schema
+        packet, sent = self.link.encode_update(store)
+        self._notify_transmission_states(sent, store, facades)
+        self._telemetry_model.mark_rows_dirty(sent)
+        return packet
+
+    def clear_pending_edits(self):
+        self.link.clear_edits()
+
+    @property
+    def _store(self) -> TelemetryStore:
+        return self._schema[0]
+
+    @property
+    def _facades_by_id(self) -> list[TelemetryVariable | None]:
+        return self._schema[1]
+
+    @staticmethod
+    def _notify_transmission_states(varIDs: list[int], store: TelemetryStore,
+                                    facades: list[TelemetryVariable | None]):
+        for varID in varIDs:
+            facade = facades[varID]
+            if facade is not None:
+                facade.transmissionStateSignal.emit(store.states[varID])
+
+    def send_value(self, varID: int, value: bool|int|float|str) -> bool:
         """
-        packet = bytearray()
-        for i, var in enumerate(self._telemetry_data):
-            if var.editable:
-                if var.transmissionState is TelemetryVarTransmissionState.CHANGED:
-                    packet.append(i)
-                    packet.extend(var.to_bytes())
-                    var.set_transmission_state(TelemetryVarTransmissionState.IN_TRANSMISSION)
-        return bytes(packet)
+        Edit the value of the telemetry variable ``varID`` and schedule its transmission to the robot.
+        Return False if the value was invalid (in which case the closest valid value is used if any).
+        """
+        store, facades = self._schema
+        changed, valid = self.link.edit(varID, value, store)
+        if changed:
+            facade = facades[varID]
+            if facade is not None:
+                facade.valueChanged.emit()
+                facade.transmissionStateSignal.emit(store.states[varID])
+            self._telemetry_model.mark_rows_dirty((varID,))
+        return valid
 
 
     #====================#
@@ -114,6 +191,7 @@ class Telemetry(QObject):
         if voltage != self._ev3_voltage:
             self._ev3_voltage = voltage
             self.ev3Voltage_changed.emit(self._ev3_voltage)
+            self._update_alerts('ev3Voltage', voltage)
 
     # --- Aux voltage --- #
     auxVoltage_changed = Signal(float)
@@ -125,6 +203,7 @@ class Telemetry(QObject):
         if voltage != self._aux_voltage:
             self._aux_voltage = voltage
             self.auxVoltage_changed.emit(self._aux_voltage)
+            self._update_alerts('auxVoltage', voltage)
 
     # --- EV3 current --- #
     ev3Current_changed = Signal(float)
@@ -136,6 +215,7 @@ class Telemetry(QObject):
         if current != self._ev3_current:
             self._ev3_current = current
             self.ev3Current_changed.emit(self._ev3_current)
+            self._update_alerts('ev3Current', current)
 
     # --- CPU usage --- #
     cpu_changed = Signal(float)
@@ -147,6 +227,7 @@ class Telemetry(QObject):
         if cpu != self._cpu_load:
             self._cpu_load = cpu
             self.cpu_changed.emit(self._cpu_load)
+            self._update_alerts('cpu', cpu)
 
     # --- Skipped frames --- #
     skippedFrames_changed = Signal(float)
@@ -157,6 +238,11 @@ class Telemetry(QObject):
     def put_skipped_frame(self, skipped: float):
         self._avg_skipped_frames.put(skipped)
         self.skippedFrames_changed.emit(self._avg_skipped_frames.get())
+        self._update_alerts('skippedFrames', skipped)
+
+    @Property("QVariantMap", notify=skippedFrames_changed)
+    def skippedFramesStats(self) -> dict[str, float]:
+        return self._avg_skipped_frames.summary(-1)
 
     # --- Frame execution time --- #
     frameExecTime_changed = Signal(float)
@@ -167,34 +253,206 @@ class Telemetry(QObject):
     def put_frame_exec_time(self, exec_time: float):
         self._avg_frame_exec_time.put(exec_time)
         self.frameExecTime_changed.emit(self._avg_frame_exec_time.get())
+        self._update_alerts('frameExecTime', exec_time)
+
+    @Property("QVariantMap", notify=frameExecTime_changed)
+    def frameExecTimeStats(self) -> dict[str, float]:
+        return self._avg_frame_exec_time.summary(-1)
 
     # --- Telemetry data --- #
     telemetryData_changed = Signal()
-    @Property("QVariantList", notify=telemetryData_changed)
-    def telemetryData(self) -> list:
-        return self._telemetry_data
+    @Property("QStringList", notify=telemetryData_changed)
+    def telemetryNames(self) -> list[str]:
+        return self._store.names
 
-    def set_telemetry_data(self, data: list[TelemetryVariable]):
-        self._telemetry_data = data
+    def set_telemetry_store(self, store: TelemetryStore, redefined: list[int] | None = None):
+        """
+        Replace the telemetry schema. If ``redefined`` is given, ``store`` is an update of the current schema where
+        only these variables changed: the pending edits and resync requests of the other variables are kept.
+        """
+        self.link.set_store(store, redefined)
+        facades_by_id = [None] * len(store)
+        for name, facade in self._facades.items():
+            varID = store.ids.get(name)
+            if varID is not None:
+                facades_by_id[varID] = facade
+        self._schema = (store, facades_by_id)
+        self._telemetry_model.set_store(store)
+        if self._server is not None:
+            self._server.publish_schema(list(zip(store.names, store.types, strict=True)))
+        for facade in self._facades.values():
+            facade.notify_schema_changed()
         self.telemetryData_changed.emit()
         self.set_telemetry_transmitted(True)
 
+    @Property(QObject, constant=True)
+    def telemetryModel(self) -> TelemetryModel:
+        return self._telemetry_model
+
+    @Slot(str, result=QObject)
+    def variable(self, name: str) -> TelemetryVariable:
+        """
+        Return the QML facade of the telemetry variable ``name``, creating it on first request.
+        The same facade is returned (and kept up to date) across schema reloads.
+        """
+        facade = self._facades.get(name)
+        if facade is None:
+            facade = TelemetryVariable(self, name)
+            self._facades[name] = facade
+            store, facades_by_id = self._schema
+            varID = store.ids.get(name)
+            if varID is not None:
+                facades_by_id[varID] = facade
+        return facade
+
+    @Slot(int, "QVariant", result=bool)
+    def sendValue(self, varID: int, value: bool|int|float|str) -> bool:
+        return self.send_value(varID, value)
+
     newTelemetryData = Signal(str)
     @Slot(str)
     def parse_new_telemetry_data(self, telemetry_data: str):
-        if len(telemetry_data) > 0:
-            data = yaml.safe_load(telemetry_data)
-            if data is not None:
-                telemetry_data = []
-                for name, value in data.items():
-                    editable = name.startswith('?')
-                    if editable:
-                        name = name[1:]
-                    telemetry_data.append(TelemetryVariable(name, editable, value))
-                self.set_telemetry_data(telemetry_data)
+        store = TelemetryLink.parse_schema(telemetry_data)
+        if store is not None:
+            self.set_telemetry_store(store)
 
+    newTelemetryDelta = Signal(str)
+    @Slot(str)
+    def parse_telemetry_delta(self, delta_data: str):
+        """
+        Apply a schema delta sent by the robot in answer to a resync request.
+        If it doesn't apply to the current schema version, the full schema is requested instead.
+        """
+        update = self.link.parse_delta(delta_data)
+        if update is not None:
+            self.set_telemetry_store(*update)
+
+    # --- Recording --- #
+    recording_changed = Signal(bool)
+    @Property(bool, notify=recording_changed)
+    def recording(self) -> bool:
+        return self._recorder is not None
+
+    @recording.setter
+    def recording(self, value: bool):
+        if value:
+            self.start_recording()
+        else:
+            self.stop_recording()
+
+    def start_recording(self, path: str | None = None):
+        """
+        Start streaming every decoded telemetry value to disk. If ``path`` is not provided, a new timestamped
+        recording is created in the directory saved in the settings.
+        """
+        if self._recorder is not None:
+            return
+        if path is None:
+            directory = QSettings('EV3DriverStation').value('recordingsDirectory', DEFAULT_RECORDINGS_DIR)
+            recorder = TelemetryRecorder.in_directory(directory)
+        else:
+            recorder = TelemetryRecorder(path)
+        recorder.start()
+        self._recorder = recorder
+        self.recording_changed.emit(True)
+
+    def stop_recording(self):
+        recorder, self._recorder = self._recorder, None
+        if recorder is None:
+            return
+        recorder.stop()
+        if recorder.dropped_packets:
+            print(f"Telemetry recording: {recorder.dropped_packets} packets were dropped.")
+        self.recording_changed.emit(False)
+
+    # --- Streaming server --- #
+    streaming_changed = Signal(bool)
+    @Property(bool, notify=streaming_changed)
+    def streaming(self) -> bool:
+        return self._server is not None
+
+    @streaming.setter
+    def streaming(self, value: bool):
+        if value:
+            self.start_streaming()
         else:
-            self.set_telemetry_data([])
+            self.stop_streaming()
+
+    @Property(str, notify=streaming_changed)
+    def streamingUrl(self) -> str:
+        return self._server.url if self._server is not None else ""
+
+    def start_streaming(self, host: str | None = None, port: int | None = None) -> bool:
+        """
+        Start the telemetry streaming server. If ``host`` and ``port`` are not provided, the interface saved in the
+        settings is used (local loopback by default).
+        """
+        if self._server is not None:
+            return True
+        settings = QSettings('EV3DriverStation')
+        if host is None:
+            host = settings.value('telemetryServer/host', DEFAULT_SERVER_HOST)
+        if port is None:
+            port = int(settings.value('telemetryServer/port', DEFAULT_SERVER_PORT))
+        server = TelemetryServer(host, port)
+        try:
+            server.start()
+        except OSError as e:
+            print(f"Impossible to start the telemetry server on {host}:{port}: {e}")
+            return False
+        server.publish_schema(list(zip(self._store.names, self._store.types, strict=True)))
+        self._server = server
+        self.streaming_changed.emit(True)
+        return True
+
+    def stop_streaming(self):
+        server, self._server = self._server, None
+        if server is None:
+            return
+        server.stop()
+        self.streaming_changed.emit(False)
+
+    # --- Alerts --- #
+    alertRaised = Signal(str, str)
+    rumbleRequested = Signal(float, int)
+
+    def load_alert_rules(self, path: str | None = None) -> bool:
+        """
+        Load the alert rules from a YAML file (by default the one saved in the settings, if it exists).
+        """
+        if path is None:
+            path = QSettings('EV3DriverStation').value('alertRules', DEFAULT_ALERT_RULES)
+            if not os.path.exists(path):
+                return False
+        import yaml
+
+        try:
+            rules = AlertEngine.load(path).rules
+        except (OSError, ValueError, KeyError, TypeError, yaml.YAMLError):
+            print(f"Impossible to load the alert rules from {path}.")
+            traceback.print_exc()
+            return False
+        self._alerts.set_rules(rules)
+        return True
+
+    def set_alert_rules(self, rules: list[AlertRule]):
+        self._alerts.set_rules(rules)
+
+    def _update_alerts(self, name: str, value: float):
+        if self._alerts.is_active:
+            self._alerts.update([(name, value)])
+
+    def _on_alert_fired(self, rule: AlertRule):
+        message = rule.message or rule.when
+        if AlertAction.NOTIFY in rule.actions:
+            self.alertRaised.emit(rule.name, message)
+        if AlertAction.RUMBLE in rule.actions:
+            self.rumbleRequested.emit(1., 500)
+        if AlertAction.LOG in rule.actions:
+            print(f"[Alert] {rule.name}: {message}")
+            recorder = self._recorder
+            if recorder is not None:
+                recorder.record([('@alerts', TelemetryVarType.STRING, rule.name)])
 
     # --- Telemetry unknown --- #
     telemetryTransmitted_changed = Signal(bool)
@@ -208,48 +466,142 @@ class Telemetry(QObject):
             self.telemetryTransmitted_changed.emit(self._telemetry_transmitted)
 
 
+class TelemetryModel(QAbstractListModel):
+    """
+    List model of the telemetry variables, indexed by variable ID.
+
+    Value updates only emit ``dataChanged`` for the rows that were touched. Rows can be marked dirty from any thread:
+    they are accumulated and flushed once on the GUI thread, so the view is refreshed at most once per event loop
+    iteration whatever the packet rate. Schema changes are applied as a minimal set of row insertions and removals.
+    """
+    NameRole = Qt.UserRole + 1
+    ValueRole = Qt.UserRole + 2
+    FormattedValueRole = Qt.UserRole + 3
+    ValueTypeRole = Qt.UserRole + 4
+    EditableRole = Qt.UserRole + 5
+    TransmissionStateRole = Qt.UserRole + 6
+
+    ROLE_NAMES = {
+        NameRole: b'name',
+        ValueRole: b'value',
+        FormattedValueRole: b'formattedValue',
+        ValueTypeRole: b'valueType',
+        EditableRole: b'editable',
+        TransmissionStateRole: b'transmissionState',
+    }
+
+    def __init__(self, parent: QObject | None = None):
+        super().__init__(parent)
+        # (store, varID) of each row. Once a schema update is applied every row points to the same store, but rows
+        # are kept coherent while the update is performed row range by row range.
+        self._rows: list[tuple[TelemetryStore, int]] = []
+        self._dirty_rows: set[int] = set()
+        self._dirty_lock = threading.Lock()
+        self._flushDirtyRows.connect(self.flush_dirty_rows, Qt.QueuedConnection)
+
+    def rowCount(self, parent: QModelIndex | None = None) -> int:
+        return 0 if parent is not None and parent.isValid() else len(self._rows)
+
+    def roleNames(self) -> dict[int, bytes]:
+        return self.ROLE_NAMES
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid() or not (0 <= index.row() < len(self._rows)):
+            return None
+        store, varID = self._rows[index.row()]
+        if role == self.NameRole or role == Qt.DisplayRole:
+            return store.names[varID]
+        elif role == self.ValueRole:
+            return TelemetryVarType.to_qml(store.values[varID])
+        elif role == self.FormattedValueRole:
+            return TelemetryVarType.format_value(store.values[varID], store.types[varID])
+        elif role == self.ValueTypeRole:
+            return store.types[varID].value
+        elif role == self.EditableRole:
+            return store.editable[varID]
+        elif role == self.TransmissionStateRole:
+            return store.states[varID].value
+        return None
+
+    # --- Value updates --- #
+    _flushDirtyRows = Signal()
+    def mark_rows_dirty(self, rows):
+        """
+        Schedule a ``dataChanged`` notification for ``rows``. Thread-safe.
+        """
+        if not rows:
+            return
+        with self._dirty_lock:
+            schedule_flush = not self._dirty_rows
+            self._dirty_rows.update(rows)
+        if schedule_flush:
+            self._flushDirtyRows.emit()
+
+    @Slot()
+    def flush_dirty_rows(self):
+        with self._dirty_lock:
+            rows, self._dirty_rows = sorted(self._dirty_rows), set()
+        n = len(self._rows)
+
+        # Emit one dataChanged per contiguous range of rows
+        start = prev = None
+        for row in rows:
+            if row >= n:
+                break
+            if start is not None and row == prev + 1:
+                prev = row
+                continue
+            if start is not None:
+                self.dataChanged.emit(self.index(start), self.index(prev))
+            start = prev = row
+        if start is not None:
+            self.dataChanged.emit(self.index(start), self.index(prev))
+
+    # --- Schema updates --- #
+    def set_store(self, store: TelemetryStore):
+        """
+        Replace the model content, inserting and removing only the rows whose variable name changed.
+        """
+        old_names = [s.names[i] for s, i in self._rows]
+        opcodes = difflib.SequenceMatcher(a=old_names, b=store.names, autojunk=False).get_opcodes()
+        new_rows = [(store, i) for i in range(len(store))]
+
+        # Apply the edits from the end so the indexes of the remaining opcodes stay valid
+        for tag, i1, i2, j1, j2 in reversed(opcodes):
+            if tag == 'equal':
+                self._rows[i1:i2] = new_rows[j1:j2]
+                self.dataChanged.emit(self.index(i1), self.index(i2 - 1))
+                continue
+            if tag in ('delete', 'replace'):
+                self.beginRemoveRows(QModelIndex(), i1, i2 - 1)
+                del self._rows[i1:i2]
+                self.endRemoveRows()
+            if tag in ('insert', 'replace'):
+                self.beginInsertRows(QModelIndex(), i1, i1 + j2 - j1 - 1)
+                self._rows[i1:i1] = new_rows[j1:j2]
+                self.endInsertRows()
+
+
 class TelemetryVariable(QObject):
-    def __init__(self, name: str, editable: bool, value: bool|int|float|str):
-        super().__init__()
+    """
+    QML facade of a telemetry variable, bound by name to the current :class:`TelemetryStore` of its telemetry.
+    """
+    def __init__(self, telemetry: Telemetry, name: str):
+        super().__init__(telemetry)
+        self._telemetry = telemetry
         self._name = name
-        self._editable = editable
-        self._value = value
-        self._type = TelemetryVarType.from_value(value)
-        self._transmitionState: TelemetryVarTransmissionState = TelemetryVarTransmissionState.TRANSMITTED
 
     def __repr__(self):
-        return f"TelemetryVariable({self.name}, {self._type}, {self.value})"
-    
-    def from_bytes(self, data: bytearray):
-        if self._type == TelemetryVarType.BOOL:
-            value = data.pop(0) != 0
-        elif self._type == TelemetryVarType.INT:
-            value = struct.unpack('h', data[:2])[0]
-            del data[:2]
-        elif self._type == TelemetryVarType.FLOAT:
-            value = struct.unpack('f', data[:4])[0]
-            del data[:4]
-        elif self._type == TelemetryVarType.STRING:
-            size = int(data.pop(0))
-            value = data[:size].decode('ascii')
-            del data[:size]
-        else:
-            return
-        if value != self.value:
-            self._value = value
-            self.valueChanged.emit()
-        self.set_transmission_state(TelemetryVarTransmissionState.TRANSMITTED)
-        return data
-
-    def to_bytes(self) -> bytes:
-        if self._type == TelemetryVarType.BOOL:
-            return struct.pack('?', self.value)
-        elif self._type == TelemetryVarType.INT:
-            return struct.pack('h', self.value)
-        elif self._type == TelemetryVarType.FLOAT:
-            return struct.pack('f', self.value)
-        elif self._type == TelemetryVarType.STRING:
-            return struct.pack('B', len(self.value)) + self.value.encode('ascii')
+        return f"TelemetryVariable({self.name}, {self.valueType}, {self.value})"
+
+    @property
+    def varID(self) -> int | None:
+        return self._telemetry._store.ids.get(self._name)
+
+    def notify_schema_changed(self):
+        self.schemaChanged.emit()
+        self.valueChanged.emit()
+        self.transmissionStateSignal.emit(self.transmissionState)
 
     #====================#
     #== QML PROPERTIES ==#
@@ -260,132 +612,46 @@ class TelemetryVariable(QObject):
     def name(self) -> str:
         return self._name
 
-    # --- Editable --- #
-    @Property(bool, constant=True)
+    # --- Schema --- #
+    schemaChanged = Signal()
+    @Property(bool, notify=schemaChanged)
+    def defined(self) -> bool:
+        return self.varID is not None
+
+    @Property(bool, notify=schemaChanged)
     def editable(self) -> bool:
-        return self._editable
+        varID = self.varID
+        return varID is not None and self._telemetry._store.editable[varID]
 
-    # --- Type --- #
-    @Property(str, constant=True)
+    @Property(str, notify=schemaChanged)
     def valueType(self) -> str:
-        return self._type
+        varID = self.varID
+        return "" if varID is None else self._telemetry._store.types[varID].value
 
     # --- Value --- #
     valueChanged = Signal()
-    valueTransmitted = Signal()
-    @Property("QVariant", notify=valueChanged) 
-    def value(self) -> bool|int|float|str:
-        return self._value
+    @Property("QVariant", notify=valueChanged)
+    def value(self) -> bool|int|float|str|None:
+        varID = self.varID
+        return None if varID is None else TelemetryVarType.to_qml(self._telemetry._store.values[varID])
 
     @Property(str, notify=valueChanged)
     def formattedValue(self) -> str:
-        return TelemetryVarType.format_value(self.value, self.valueType)
+        varID = self.varID
+        if varID is None:
+            return ""
+        store = self._telemetry._store
+        return TelemetryVarType.format_value(store.values[varID], store.types[varID])
 
     @Slot("QVariant", result=bool)
     def sendValue(self, value: bool|int|float|str) -> bool:
-        if not self.editable:
-            return False
-        try:
-            value = TelemetryVarType.cast_to(value, self._type)
-        except ValueError:
-            return False
+        varID = self.varID
+        return varID is not None and self._telemetry.send_value(varID, value)
 
-        validValue = True
-        if self._type == TelemetryVarType.STRING:
-            if re.match(r'^[\x00-\x7F]*$', value) is None:
-                validValue = False
-                value = re.sub(r'[^\x00-\x7F]', '', value)
-            if len(value) > 255:
-                validValue = False
-                value = value[:255]
-        elif self._type == TelemetryVarType.INT:
-            if abs(value) > 32767:
-                validValue = False
-                value = 32767 if value > 0 else -32767
-        elif self._type == TelemetryVarType.FLOAT:
-            convertedValue = float(struct.unpack('f', struct.pack('f', value))[0])
-            validValue = (TelemetryVarType.format_value(convertedValue, TelemetryVarType.FLOAT) 
-                         == TelemetryVarType.format_value(value, TelemetryVarType.FLOAT))
-            value = convertedValue
-            
-        if value == self.value:
-            return validValue
-            
-        self._value = value
-        self.valueChanged.emit()
-        self.set_transmission_state(TelemetryVarTransmissionState.CHANGED)
-        return validValue
-        
     # --- Transmission state --- #
     transmissionStateSignal = Signal(str)
     @Property(str, notify=transmissionStateSignal)
     def transmissionState(self) -> str:
-        return self._transmitionState
-
-    def set_transmission_state(self, state: TelemetryVarTransmissionState):
-        if state != self._transmitionState:
-            self._transmitionState = state
-            self.transmissionStateSignal.emit(self._transmitionState)
-
-class TelemetryVarType(str, Enum):
-    BOOL = 'bool'
-    INT = 'int'
-    FLOAT = 'float'
-    STRING = 'string'
-
-    @classmethod
-    def from_value(cls, v):
-        if isinstance(v, bool):
-            return cls.BOOL
-        elif isinstance(v, int):
-            return cls.INT
-        elif isinstance(v, float):
-            return cls.FLOAT
-        elif isinstance(v, str):
-            return cls.STRING
-        else:
-            raise ValueError(f"Invalid type {type(v)} for telemetry variable")
-
-    @classmethod
-    def cast_to(cls, v, t: TelemetryVarType):
-        if t == cls.BOOL:
-            if isinstance(v, bool):
-                return v
-            elif isinstance(v, str):
-                return v.lower() in ("true", "1")
-            else:
-                return bool(v)
-        elif t == cls.INT:
-            return int(v)
-        elif t == cls.FLOAT:
-            return float(v)
-        elif t == cls.STRING:
-            return str(v)
-        else:
-            raise ValueError(f"Invalid type {t} for telemetry variable")
-
-    @classmethod
-    def format_value(cls, v, t: TelemetryVarType) -> str:
-        if t == TelemetryVarType.BOOL:
-            return 'true' if v else 'false'
-        elif t == TelemetryVarType.INT:
-            return str(v)
-        elif t == TelemetryVarType.FLOAT:
-            if v == float('inf'):
-                return "∞"
-            elif v == float('-inf'):
-                return "-∞"
-            elif abs(v) < 1e-15:
-                return "0.000"
-            else:
-                return f'{v:.3f}' if 1e-3 < abs(v) < 1e3 else f'{v:.3e}'
-        elif t == TelemetryVarType.STRING:
-            return v
-        return ""
-
+        varID = self.varID
+        return "" if varID is None else self._telemetry._store.states[varID].value
 
-class TelemetryVarTransmissionState(str, Enum):
-    TRANSMITTED = "transmitted"
-    TRANSMISSION_MISSED = "unknown"
-    IN_TRANSMISSION = "unknown"
-    CHANGED = "changed"
\ No newline at end of file
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+__all__ = ["InputTimeline", "InputRecorder", "TimelineEvent"]
+
+import csv
+import threading
+from typing import NamedTuple
+
+from .protocol import AXES, ControllerState
+
+
+class TimelineEvent(NamedTuple):
+    t: float                # Seconds since the start of the timeline
+    state: ControllerState
+
+
+class InputTimeline:
+    """
+    Sequence of controller states to apply at given times, either scripted::
+
+        InputTimeline().hold(2, leftY=-1).hold(.5, rightX=.7, A=True).neutral()
+
+    or recorded from a pilot with an :class:`InputRecorder`. Timelines are saved as CSV files of quantized states.
+    """
+    def __init__(self, events: list[TimelineEvent] | None = None):
+        self.events: list[TimelineEvent] = events if events is not None else []
+
+    def __len__(self):
+        return len(self.events)
+
+    def __iter__(self):
+        return iter(self.events)
+
+    @property
+    def duration(self) -> float:
+        return self.events[-1].t if self.events else 0.
+
+    # --- Scripting --- #
+    def at(self, t: float, state: ControllerState | None = None, **values: float | bool) -> InputTimeline:
+        """
+        Apply ``state`` (or a neutral state updated with ``values``) at ``t`` seconds.
+        """
+        if state is None:
+            state = ControllerState.from_values(**values)
+        self.events.append(TimelineEvent(t, state))
+        self.events.sort(key=lambda e: e.t)
+        return self
+
+    def hold(self, duration: float, **values: float | bool) -> InputTimeline:
+        """
+        Apply a neutral state updated with ``values`` at the end of the timeline, and keep it for ``duration`` seconds.
+        """
+        t = self.duration
+        if self.events and self.events[-1].state == ControllerState():
+            # Replace the trailing neutral state of the previous step
+            self.events.pop()
+        self.events.append(TimelineEvent(t, ControllerState.from_values(**values)))
+        return self.neutral(t + duration)
+
+    def neutral(self, t: float | None = None) -> InputTimeline:
+        self.events.append(TimelineEvent(self.duration if t is None else t, ControllerState()))
+        return self
+
+    # --- Files --- #
+    @classmethod
+    def load(cls, path: str) -> InputTimeline:
+        with open(path, newline='') as f:
+            reader = csv.reader(f)
+            next(reader)
+            return cls([TimelineEvent(float(t), ControllerState(tuple(int(a) for a in axes), int(buttons)))
+                        for t, *axes, buttons in reader])
+
+    def save(self, path: str):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(('t', *AXES, 'buttons'))
+            writer.writerows((f"{e.t:.6f}", *e.state.axes, e.state.buttons) for e in self.events)
+
+
+class InputRecorder:
+    """
+    Record the inputs of the controller of a pilot slot (before its response curves) as an :class:`InputTimeline`.
+    Install it as ``ControllersManager.input_recorder``: states are timestamped when their input event is received.
+    """
+    def __init__(self, pilot: int = 0):
+        self.pilot = pilot
+        self._t0: float | None = None
+        self._events: list[TimelineEvent] = []
+        self._lock = threading.Lock()
+
+    def input_changed(self, pilot: int, state: ControllerState, t: float):
+        if pilot != self.pilot:
+            return
+        with self._lock:
+            if self._t0 is None:
+                self._t0 = t
+            self._events.append(TimelineEvent(t - self._t0, state))
+
+    def timeline(self) -> InputTimeline:
+        with self._lock:
+            return InputTimeline(list(self._events))
@@ -24,30 +24,29 @@ Rectangle {
 
         Label {
             anchors.left: parent.left
-            anchors.right: b1.left
+            anchors.right: pilotButtons.left
             anchors.top: parent.top
             anchors.bottom: parent.bottom
             verticalAlignment: Text.AlignVCenter
             text: controllerName
         }
 
-        RadioButton {
-            id: b1
-            checked: controllerId === controllers.pilot1ControllerId
-            width: 35
-            anchors.right: b2.left
-            anchors.rightMargin: 10
-            anchors.verticalCenter: parent.verticalCenter
-            onClicked: controllers.set_pilot_controllerId(0, controllerId)
-        }
-
-        RadioButton {
-            id: b2
-            checked: controllerId === controllers.pilot2ControllerId
-            width: 35
+        Row {
+            id: pilotButtons
             anchors.right: parent.right
             anchors.verticalCenter: parent.verticalCenter
-            onClicked: controllers.set_pilot_controllerId(1, controllerId)
+            spacing: 10
+
+            Repeater {
+                model: controllers.pilots
+                delegate: RadioButton {
+                    required property int index
+                    required property int controllerId
+                    checked: controllerSelector.controllerId === controllerId
+                    width: 35
+                    onClicked: controllers.set_pilot_controllerId(index, controllerSelector.controllerId)
+                }
+            }
         }
     }
 
@@ -124,26 +123,18 @@ Rectangle {
                             font.bold: true
                         }
 
-                        Label {
-                            id: labelP1
-                            text: "P1"
-                            Layout.fillHeight: true
-                            Layout.minimumWidth: 35
-                            Layout.maximumWidth: 35
-                            horizontalAlignment: Text.AlignHCenter
-                            verticalAlignment: Text.AlignVCenter
-                            font.bold: true
-                        }
-
-                        Label {
-                            id: labelP2
-                            text: "P2"
-                            Layout.fillHeight: true
-                            Layout.minimumWidth: 35
-                            Layout.maximumWidth: 35
-                            horizontalAlignment: Text.AlignHCenter
-                            verticalAlignment: Text.AlignVCenter
-                            font.bold: true
+                        Repeater {
+                            model: controllers.pilots
+                            delegate: Label {
+                                required property int index
+                                text: "P" + (index + 1)
+                                Layout.fillHeight: true
+                                Layout.minimumWidth: 35
+                                Layout.maximumWidth: 35
+                                horizontalAlignment: Text.AlignHCenter
+                                verticalAlignment: Text.AlignVCenter
+                                font.bold: true
+                            }
                         }
                     }
                 }
@@ -192,35 +183,27 @@ Rectangle {
             Layout.fillHeight: true
         }
 
-        Item {
+        ColumnLayout {
             Layout.fillHeight: true
             Layout.fillWidth: true
             Layout.horizontalStretchFactor: 5
+            spacing: 10
 
-            ControllerView {
-                anchors.left: parent.left
-                anchors.right: parent.right
-                anchors.top: parent.top
-                anchors.bottom: parent.verticalCenter
-                anchors.bottomMargin: 5
-
-                pilotId: 0
-                joystickState: controllers.pilot1State
-                controllerEnabled: controllers.pilot1ControllerId !== -1
-                isKeyboard: controllers.pilot1ControllerId === 0
-            }
+            Repeater {
+                model: controllers.pilots
+
+                delegate: ControllerView {
+                    required property int index
+                    required property var model
 
-            ControllerView {
-                anchors.left: parent.left
-                anchors.right: parent.right
-                anchors.bottom: parent.bottom
-                anchors.top: parent.verticalCenter
-                anchors.topMargin: 5
-
-                pilotId: 1
-                joystickState: controllers.pilot2State
-                controllerEnabled: controllers.pilot2ControllerId !== -1
-                isKeyboard: controllers.pilot2ControllerId === 0
+                    Layout.fillWidth: true
+                    Layout.fillHeight: true
+
+                    pilotId: index
+                    joystickState: model.state
+                    controllerEnabled: model.controllerId !== -1
+                    isKeyboard: model.isKeyboard
+                }
             }
         }
     }
@@ -13,16 +13,6 @@ Control {
     readonly property color passiveColor: Material.foreground
     readonly property color disabledColor: Material.color(Material.Grey, Material.Shade600)
 
-    readonly property color controller1Color: {
-        if (controllers.pilot1ControllerId<0) return disabledColor
-        else if (controllers.isPilot1ControllerActive) return activeColor
-        else return passiveColor 
-    }
-    readonly property color controller2Color: {
-        if (controllers.pilot2ControllerId<0) return disabledColor
-        else if (controllers.isPilot2ControllerActive) return activeColor
-        else return passiveColor 
-    }
 
     component IconSource: Image {
         source: "assets/controllerStatus.svg"
@@ -40,25 +30,23 @@ Control {
     } 
 
 
-    IconComponent {
-        source: key1
-        visible: controllers.pilot1ControllerId==0
-        color: controller1Color
-    }
-    IconComponent{
-        source: key2
-        visible: controllers.pilot2ControllerId==0
-        color: controller2Color
-    }
-    IconComponent{
-        source: con1
-        visible: controllers.pilot1ControllerId!=0
-        color: controller1Color
-    }
-    IconComponent{
-        source: con2
-        visible: controllers.pilot2ControllerId!=0
-        color: controller2Color
+    // The icon shows the first two pilots
+    Repeater {
+        model: controllers.pilots
+
+        delegate: IconComponent {
+            required property int index
+            required property int controllerId
+            required property bool active
+
+            source: index === 0 ? (controllerId === 0 ? key1 : con1) : (controllerId === 0 ? key2 : con2)
+            visible: index < 2
+            color: {
+                if (controllerId < 0) return disabledColor
+                else if (active) return activeColor
+                else return passiveColor
+            }
+        }
     }
     IconComponent{
         source: slash
@@ -287,12 +287,43 @@ Rectangle {
 
                     Entry {
                         name: qsTr("Average time between UDP sends")
-                        tooltip: qsTr("Time between two messages sent to the robot. If he robot doesn't skip messages, this is the time between two refresh of the robot state.")
+                        tooltip: {
+                            const description = qsTr("Time between two messages sent to the robot. If he robot doesn't skip messages, this is the time between two refresh of the robot state.")
+                            if (!hovered || network.udpAvgDt === 0) return description
+                            const stats = network.udpDtStats
+                            return description + "\n" + qsTr("p50: %1ms   p95: %2ms   p99: %3ms")
+                                .arg(stats.p50.toFixed(0)).arg(stats.p95.toFixed(0)).arg(stats.p99.toFixed(0))
+                        }
                         value: network.udpAvgDt
                         isNA: network.udpAvgDt===0
                         suffix: " ms"
                     }
 
+                    Entry {
+                        name: qsTr("Input latency")
+                        tooltip: {
+                            const description = qsTr("Time between a controller input and the first UDP message carrying it. Click to start or stop the measure (the report is saved with the recordings).")
+                            if (!hovered || network.inputLatency === 0) return description
+                            const stats = network.inputLatencyStats
+                            return description + "\n" + qsTr("p50: %1ms   p95: %2ms   p99: %3ms")
+                                .arg(stats.p50.toFixed(1)).arg(stats.p95.toFixed(1)).arg(stats.p99.toFixed(1))
+                                + "\n\n" + network.inputLatencyHistogram
+                        }
+                        value: network.inputLatencyProbe ? network.inputLatency : qsTr("Off")
+                        isNA: network.inputLatencyProbe && network.inputLatency === 0
+                        suffix: network.inputLatencyProbe ? " ms" : ""
+                        valueBold: network.inputLatencyProbe
+                        onClicked: network.inputLatencyProbe = !network.inputLatencyProbe
+                    }
+
+                    Entry {
+                        name: qsTr("Telemetry server")
+                        tooltip: qsTr("Stream the telemetry to other applications through a local WebSocket server. Click to start or stop.")
+                        value: telemetry.streaming ? telemetry.streamingUrl : qsTr("Off")
+                        valueBold: telemetry.streaming
+                        onClicked: telemetry.streaming = !telemetry.streaming
+                    }
+
                     Item {
                         width: parent.width
                         height: 20
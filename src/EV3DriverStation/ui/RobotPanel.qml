@@ -200,10 +200,30 @@ Rectangle {
                 }
             }
 
-            // === Spacer ===
+            // === Practice match ===
             Item {
                 Layout.fillWidth: true
                 height: 20
+
+                Label {
+                    anchors.left: parent.left
+                    anchors.verticalCenter: parent.verticalCenter
+                    text: match.running ? qsTr("Match: ") + match.phase : ""
+                    font.pixelSize: 12
+                }
+                Button {
+                    anchors.right: parent.right
+                    anchors.verticalCenter: parent.verticalCenter
+                    height: 20
+                    flat: true
+                    padding: 0
+                    topInset: 0
+                    bottomInset: 0
+                    font.pixelSize: 12
+                    text: match.running ? qsTr("Stop match") : qsTr("Start practice match")
+                    enabled: match.running || robot.robotStatus !== "Idle"
+                    onClicked: match.running ? match.stopMatch() : match.startMatch()
+                }
             }
 
             // === Robot Enable/Disable frame ===
@@ -234,7 +254,7 @@ Rectangle {
 
                 // Timer
                 Label {
-                    text: Qt.formatTime(new Date(robot.time*1000), 'mm:ss:') + (robot.time).toFixed(2).slice(-2)
+                    text: Qt.formatTime(new Date(robot.time*1000), 'mm:ss.') + Math.floor(robot.time * 10) % 10
                     font.pixelSize: 30
                     horizontalAlignment: Qt.AlignHCenter
                     verticalAlignment: Qt.AlignVCenter
@@ -302,6 +322,12 @@ Rectangle {
 
             Header {
                 text: qsTr("Telemetry")
+
+                HeaderButton {
+                    text: telemetry.recording ? "■" : "●"
+                    tooltip: telemetry.recording ? qsTr("Stop Recording Telemetry") : qsTr("Record Telemetry")
+                    onClicked: telemetry.recording = !telemetry.recording
+                }
             }
 
             // === Spacer ===
@@ -317,17 +343,20 @@ Rectangle {
                 Layout.fillWidth: true
                 Layout.fillHeight: true
 
-                model: telemetry.telemetryData
+                model: telemetry.telemetryModel
 
                 delegate: Entry {
+                    required property int index
+                    required property var model
+
                     width: telemetryList.width
-                    name: modelData.name
-                    value: modelData.formattedValue
-                    valueType: modelData.valueType
-                    editable: modelData.editable
-                    valueBold: modelData.transmissionState === 'transmitted'
+                    name: model.name
+                    value: model.formattedValue
+                    valueType: model.valueType
+                    editable: model.editable
+                    valueBold: model.transmissionState === 'transmitted'
                     onValueEdited: (v) => {
-                        if(!modelData.sendValue(v))
+                        if(!telemetry.sendValue(index, v))
                             invalidValue()
                     }
                 }
@@ -335,7 +364,7 @@ Rectangle {
                 Label{
                     anchors.centerIn: parent
                     anchors.verticalCenterOffset: -30
-                    visible: telemetry.telemetryTransmitted && telemetry.telemetryData.length === 0 
+                    visible: telemetry.telemetryTransmitted && telemetryList.count === 0
                     text: {
                         if (robot.programStatus !== "Running") return qsTr("Waiting for the robot program to start.")
                         else return qsTr('  No telemetry data received.\n\nTo send data to the driver station use: \n  Telemetry.putNumber("name", value); \n  Telemetry.putData("name", "value");')
@@ -408,7 +437,13 @@ Rectangle {
 
                 Entry {
                     name: qsTr("Skipped Frame:")
-                    tooltip: qsTr("Average number of frames skipped.")
+                    tooltip: {
+                        const description = qsTr("Average number of frames skipped.")
+                        if (!hovered || telemetry.skippedFrames === -1) return description
+                        const stats = telemetry.skippedFramesStats
+                        return description + "\n" + qsTr("p95: %1   p99: %2   max: %3")
+                            .arg(stats.p95.toFixed(1)).arg(stats.p99.toFixed(1)).arg(stats.max.toFixed(0))
+                    }
                     value: (telemetry.skippedFrames).toFixed(1)
                     isNA: telemetry.skippedFrames === -1
                     color: {
@@ -423,7 +458,13 @@ Rectangle {
 
                 Entry {
                     name: qsTr("Compute Time:")
-                    tooltip: qsTr("Average time to execute one frame.")
+                    tooltip: {
+                        const description = qsTr("Average time to execute one frame.")
+                        if (!hovered || telemetry.frameExecTime < 0) return description
+                        const stats = telemetry.frameExecTimeStats
+                        return description + "\n" + qsTr("p50: %1ms   p95: %2ms   p99: %3ms   max: %4ms")
+                            .arg(stats.p50.toFixed(0)).arg(stats.p95.toFixed(0)).arg(stats.p99.toFixed(0)).arg(stats.max.toFixed(0))
+                    }
                     value: (telemetry.frameExecTime).toFixed(0)
                     suffix: "ms"
                     isNA: telemetry.frameExecTime < 0
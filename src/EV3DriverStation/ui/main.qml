@@ -13,7 +13,18 @@ ApplicationWindow  {
 
     title: "EV3 Driver Station"
     Component.onCompleted: robot.install_event_filter(window)
-    
+
+    // The selected panel is created with the window, the others in the background once the first frame is shown
+    property bool firstFrameShown: false
+    onFrameSwapped: if (!firstFrameShown) firstFrameShown = true
+
+    component PanelLoader: Loader {
+        property string panel: ""
+        anchors.fill: parent
+        visible: app.panel === panel
+        asynchronous: !visible
+        active: visible || window.firstFrameShown
+    }
 
     Item {
         id: sidePanel
@@ -38,20 +49,116 @@ ApplicationWindow  {
         anchors.left: sidePanel.right;
         anchors.margins: 10;
 
-        RobotPanel {
-            anchors.fill: parent;
-            visible: app.panel==="Robot";
+        PanelLoader { panel: "Robot"; source: "RobotPanel.qml" }
+        PanelLoader { panel: "Controllers"; source: "ControllersPanel.qml" }
+        PanelLoader { panel: "Network"; source: "NetworkPanel.qml" }
+    }
+
+    // === Performance overlay (F12) ===
+    Shortcut {
+        sequence: "F12"
+        onActivated: performance.active = !performance.active
+    }
+
+    Rectangle {
+        id: performanceOverlay
+        anchors.right: parent.right
+        anchors.top: parent.top
+        anchors.margins: 5
+        width: performanceColumn.implicitWidth + 20
+        height: performanceColumn.implicitHeight + 14
+        radius: 5
+        z: 10
+
+        color: "#D0101010"
+        border.color: performance.spikeCount > 0 ? Material.color(Material.Orange) : Material.frameColor
+        visible: performance.active
+
+        Column {
+            id: performanceColumn
+            anchors.centerIn: parent
+            spacing: 2
+
+            property var lag: performance.mainLoopLag
+            property var rates: performance.rates
+
+            Label {
+                text: "Main loop lag: " + performanceColumn.lag.p50.toFixed(1) + " ms (p99 "
+                      + performanceColumn.lag.p99.toFixed(1) + ", max " + performanceColumn.lag.max.toFixed(0) + ")"
+            }
+            Label {
+                text: "Threads: UDP listener " + performanceColumn.rates.udpListener.toFixed(0) + " Hz, SSH "
+                      + performanceColumn.rates.ssh.toFixed(2) + " Hz"
+            }
+            Label {
+                text: "UDP: " + network.udpAvgDt + " ms avg dt, " + performanceColumn.rates.udpSent.toFixed(0)
+                      + " sent/s, " + performanceColumn.rates.udpReceived.toFixed(0) + " received/s"
+            }
+            Label {
+                text: "Telemetry: " + performanceColumn.rates.telemetry.toFixed(0) + " values/s"
+            }
+            Label {
+                text: "Spikes > " + performance.spikeThreshold + " ms: " + performance.spikeCount
+                      + (performance.lastSpike ? "  (last: " + performance.lastSpike + ")" : "")
+                color: performance.spikeCount > 0 ? Material.color(Material.Orange) : Material.foreground
+                elide: Text.ElideMiddle
+                width: Math.min(implicitWidth, window.width - 40)
+
+                MouseArea {
+                    anchors.fill: parent
+                    onClicked: performance.clearSpikes()
+                }
+            }
         }
+    }
 
-        ControllersPanel {
-            anchors.fill: parent;
-            visible: app.panel==="Controllers";
+    // === Alerts notifications ===
+    Rectangle {
+        id: alertBanner
+        property string title: ""
+        property string message: ""
+
+        anchors.horizontalCenter: parent.horizontalCenter
+        anchors.bottom: parent.bottom
+        anchors.bottomMargin: 15
+        width: alertLabel.implicitWidth + 40
+        height: 30
+        radius: 15
+
+        color: Material.color(Material.Red, Material.Shade500)
+        opacity: 0
+        visible: opacity > 0
+
+        Label {
+            id: alertLabel
+            anchors.centerIn: parent
+            text: "<b>" + alertBanner.title + "</b>   " + alertBanner.message
+            font.pixelSize: 15
+            color: Material.foreground
         }
 
-        NetworkPanel {
-            anchors.fill: parent;
-            visible: app.panel==="Network";
+        SequentialAnimation {
+            id: alertAnimation
+            PropertyAnimation { target: alertBanner; property: "opacity"; to: 1; duration: 200 }
+            PauseAnimation { duration: 4000 }
+            PropertyAnimation { target: alertBanner; property: "opacity"; to: 0; duration: 500 }
         }
 
+        Connections {
+            target: telemetry
+            function onAlertRaised(name, message) {
+                alertBanner.title = name
+                alertBanner.message = message
+                alertAnimation.restart()
+            }
+        }
+        Connections {
+            target: match
+            function onAlertRaised(name, message) {
+                alertBanner.title = name
+                alertBanner.message = message
+                alertAnimation.restart()
+            }
+        }
     }
 }
@@ -1,4 +1,9 @@
+import ctypes
+import math
+import sys
+import threading
 import time
+from collections import deque
 
 
 def get_or_default(iterable, index, default=None):
@@ -17,27 +22,212 @@ def index_or_default(iterable, value, default=None):
         return default
 
 
-class AverageOverTime:
-    def __init__(self, t):
-        self.t = t
-        self.data_values = []
-        self.data_t = []
+_bool_refcounts_protected = False
 
-    def put(self, value):
-        self.clean_old_values()
-        self.data_values.append(value)
-        self.data_t.append(time.time())
 
-    def clean_old_values(self):
-        while len(self.data_t) and time.time() - self.data_t[0] > self.t:
-            self.data_t.pop(0)
-            self.data_values.pop(0)
+def protect_bool_refcounts():
+    """
+    Work around PySide6 releases whose ``SignalInstance.emit`` returns ``True`` without a new reference: each emit
+    releases a reference it doesn't own, and before Python 3.12 (where bools are immortal) the interpreter aborts
+    with ``bool_dealloc`` once the count reaches zero. If the bug is detected, the bools are made practically
+    immortal, as Python 3.12 does. Must be called before emitting signals.
+    """
+    global _bool_refcounts_protected
+    if _bool_refcounts_protected or sys.version_info >= (3, 12) or sys.implementation.name != 'cpython':
+        return
+    from PySide6.QtCore import QObject, Signal
+
+    class _EmitProbe(QObject):
+        probe = Signal()
+
+    emitter = _EmitProbe()
+    before = sys.getrefcount(True)
+    emitter.probe.emit()
+    if sys.getrefcount(True) < before:
+        for value in (True, False):
+            ctypes.c_ssize_t.from_address(id(value)).value += 1 << 40
+    _bool_refcounts_protected = True
+
+
+class WindowedStats:
+    """
+    Statistics over the values received during the last ``window`` seconds (monotonic clock).
+
+    Values are kept in a ring buffer with a running sum, so :meth:`put` and :meth:`mean` are O(1) (amortized).
+    Min and max are maintained with monotonic deques. Percentiles are estimated with a log-bucketed histogram whose
+    counts are decremented on eviction, with a relative error bounded by ``relative_accuracy``.
+    """
+    def __init__(self, window: float, relative_accuracy: float = 0.01, clock=time.monotonic):
+        self.window = window
+        self.clock = clock
+        self._lock = threading.Lock()
+
+        self._values: deque[tuple[float, float]] = deque()
+        self._sum = 0.0
+        self._min: deque[tuple[float, float]] = deque()     # Increasing values
+        self._max: deque[tuple[float, float]] = deque()     # Decreasing values
+
+        gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(gamma)
+        self._gamma = gamma
+        self._buckets: dict[int, int] = {}
+        self._sorted_keys: list[int] | None = None
+
+    def put(self, value: float, t: float | None = None):
+        if t is None:
+            t = self.clock()
+        with self._lock:
+            self._evict(t)
+            self._values.append((t, value))
+            self._sum += value
+            while self._min and self._min[-1][1] >= value:
+                self._min.pop()
+            self._min.append((t, value))
+            while self._max and self._max[-1][1] <= value:
+                self._max.pop()
+            self._max.append((t, value))
+
+            key = self._bucket_key(value)
+            count = self._buckets.get(key, 0)
+            if count == 0:
+                self._sorted_keys = None
+            self._buckets[key] = count + 1
 
     def clear(self):
-        self.data_values.clear()
-        self.data_t.clear()
+        with self._lock:
+            self._values.clear()
+            self._sum = 0.0
+            self._min.clear()
+            self._max.clear()
+            self._buckets.clear()
+            self._sorted_keys = None
+
+    def _evict(self, now: float):
+        limit = now - self.window
+        values = self._values
+        while values and values[0][0] < limit:
+            t, value = values.popleft()
+            self._sum -= value
+            key = self._bucket_key(value)
+            count = self._buckets[key] - 1
+            if count:
+                self._buckets[key] = count
+            else:
+                del self._buckets[key]
+                self._sorted_keys = None
+        while self._min and self._min[0][0] < limit:
+            self._min.popleft()
+        while self._max and self._max[0][0] < limit:
+            self._max.popleft()
+        if not values:
+            self._sum = 0.0     # Reset accumulated rounding errors
+
+    def _bucket_key(self, value: float) -> int:
+        # Bucket 0 holds (near) zero values, positive keys positive values and negative keys negative values
+        magnitude = abs(value)
+        if magnitude < 1e-9:
+            return 0
+        key = math.ceil(math.log(magnitude) / self._log_gamma) + 1_000_000
+        return key if value > 0 else -key
+
+    def _bucket_value(self, key: int) -> float:
+        if key == 0:
+            return 0.0
+        magnitude = 2 * self._gamma ** (abs(key) - 1_000_000) / (self._gamma + 1)
+        return magnitude if key > 0 else -magnitude
+
+    #=============#
+    #== Queries ==#
+    #=============#
+    def __len__(self):
+        with self._lock:
+            self._evict(self.clock())
+            return len(self._values)
+
+    def get(self, default=-1) -> float:
+        return self.mean(default)
+
+    def mean(self, default=-1) -> float:
+        with self._lock:
+            self._evict(self.clock())
+            if not self._values:
+                return default
+            return self._sum / len(self._values)
+
+    def min(self, default=-1) -> float:
+        with self._lock:
+            self._evict(self.clock())
+            return self._min[0][1] if self._min else default
+
+    def max(self, default=-1) -> float:
+        with self._lock:
+            self._evict(self.clock())
+            return self._max[0][1] if self._max else default
+
+    def percentile(self, q: float, default=-1) -> float:
+        """
+        Estimate the ``q``-th percentile (0 <= q <= 100) of the values in the window, using the nearest-rank
+        definition: the smallest value greater than or equal to ``q`` percent of the values.
+        """
+        with self._lock:
+            self._evict(self.clock())
+            n = len(self._values)
+            if n == 0:
+                return default
+            if self._sorted_keys is None:
+                self._sorted_keys = sorted(self._buckets)
+            rank = max(1, math.ceil(q * n / 100))
+            seen = 0
+            for key in self._sorted_keys:
+                seen += self._buckets[key]
+                if seen >= rank:
+                    # Clamp the bucket estimate to the exact extrema
+                    return min(max(self._bucket_value(key), self._min[0][1]), self._max[0][1])
+            return self._max[0][1]
+
+    def summary(self, default=-1) -> dict[str, float]:
+        return {
+            'mean': self.mean(default),
+            'min': self.min(default),
+            'max': self.max(default),
+            'p50': self.percentile(50, default),
+            'p95': self.percentile(95, default),
+            'p99': self.percentile(99, default),
+        }
+
+
+class RateCounter:
+    """
+    Rate (events per second) of the events counted during the last ``window`` seconds (monotonic clock). Events can
+    be counted from any thread.
+    """
+    def __init__(self, window: float = 2, clock=time.monotonic):
+        self.window = window
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._events: deque[tuple[float, int]] = deque()
+        self._count = 0
+
+    def tick(self, n: int = 1, t: float | None = None):
+        if t is None:
+            t = self.clock()
+        with self._lock:
+            self._evict(t)
+            self._events.append((t, n))
+            self._count += n
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+            self._count = 0
+
+    def _evict(self, now: float):
+        limit = now - self.window
+        events = self._events
+        while events and events[0][0] < limit:
+            self._count -= events.popleft()[1]
 
-    def get(self, default=-1):
-        if len(self.data_values) == 0:
-            return default
-        return sum(self.data_values) / len(self.data_values)
+    def rate(self) -> float:
+        with self._lock:
+            self._evict(self.clock())
+            return self._count / self.window
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+__all__ = ["InputTimeline", "InputRecorder", "VirtualController"]
+
+import itertools
+import threading
+import time
+
+from .controllers import Controller
+from .protocol import ControllerState
+from .timeline import InputRecorder, InputTimeline
+
+SPIN_THRESHOLD = .001   # The player busy-waits the last millisecond before an event instead of sleeping
+
+_instance_ids = itertools.count(-1000, -1)     # Negative IDs never collide with SDL instance IDs
+
+
+class VirtualController(Controller):
+    """
+    Controller driven by software instead of a joystick: its state is set directly or played from an
+    :class:`InputTimeline` by a dedicated thread, scheduled on ``time.perf_counter`` with sub-millisecond accuracy.
+    Attach it with ``ControllersManager.attach_controller()`` to use it as a pilot controller.
+    """
+    def __init__(self, name: str = "Virtual Controller"):
+        super().__init__(None)
+        self._name = name
+        self.instance_id = next(_instance_ids)
+        self.state = ControllerState()
+        self.on_state_changed = None
+        self.lateness: list[float] = []     # Delay (s) between the scheduled and actual time of each played event
+        self._player: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def guid(self) -> str:
+        return "VIRTUAL"
+
+    def rumble(self, strength: float, duration_ms: int):
+        pass
+
+    def close(self):
+        self.stop()
+
+    def get_state(self) -> ControllerState:
+        return self.state
+
+    def set_state(self, state: ControllerState):
+        if state != self.state:
+            self.state = state
+            self.last_event_t = time.monotonic()
+            if self.on_state_changed is not None:
+                self.on_state_changed(self)
+
+    # --- Playback --- #
+    @property
+    def is_playing(self) -> bool:
+        return self._player is not None and self._player.is_alive()
+
+    def play(self, timeline: InputTimeline, loop: bool = False):
+        """
+        Play ``timeline`` from now (the current playback is stopped).
+        """
+        self.stop()
+        self._stop.clear()
+        self.lateness = []
+        self._player = threading.Thread(target=self._play_run, args=(timeline, loop), name="VirtualController",
+                                        daemon=True)
+        self._player.start()
+
+    def stop(self):
+        player = self._player
+        if player is None:
+            return
+        self._stop.set()
+        if player is not threading.current_thread():
+            player.join()
+        self._player = None
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+        Wait for the end of the playback. Return False if it is still playing after ``timeout`` seconds.
+        """
+        player = self._player
+        if player is not None:
+            player.join(timeout)
+        return not self.is_playing
+
+    def _play_run(self, timeline: InputTimeline, loop: bool):
+        clock = time.perf_counter
+        stop = self._stop
+        while True:
+            t0 = clock()
+            for event in timeline:
+                deadline = t0 + event.t
+                remaining = deadline - clock()
+                if remaining > SPIN_THRESHOLD and stop.wait(remaining - SPIN_THRESHOLD):
+                    return
+                while clock() < deadline:
+                    pass
+                if stop.is_set():
+                    return
+                self.lateness.append(clock() - deadline)
+                self.set_state(event.state)
+            if not loop or not timeline.events or timeline.duration <= 0:
+                return
@@ -0,0 +1,99 @@
+import pytest
+
+from EV3DriverStation.alerts import AlertAction, AlertEngine, AlertRule, parse_condition
+
+
+def make_engine(*rules: AlertRule) -> tuple[AlertEngine, list[str]]:
+    fired = []
+    return AlertEngine(list(rules), on_fire=lambda rule: fired.append(rule.name)), fired
+
+
+def test_rules_are_edge_triggered():
+    engine, fired = make_engine(AlertRule('hot', 'temp > 50', cooldown=0))
+    engine.update([('temp', 60)], t=0)
+    engine.update([('temp', 70)], t=1)
+    assert fired == ['hot']
+    engine.update([('temp', 40)], t=2)
+    engine.update([('temp', 60)], t=3)
+    assert fired == ['hot', 'hot']
+
+
+def test_cooldown():
+    engine, fired = make_engine(AlertRule('hot', 'temp > 50', cooldown=5))
+    for t, temp in enumerate((60, 40, 60, 40, 60, 40)):
+        engine.update([('temp', temp)], t=t)
+    assert fired == ['hot']
+    engine.update([('temp', 60)], t=6)
+    assert fired == ['hot', 'hot']
+
+
+def test_threshold_is_exclusive():
+    engine, fired = make_engine(AlertRule('low', 'battery < 7'), AlertRule('eq', 'mode == 2'))
+    engine.update([('battery', 7), ('mode', 2.0)], t=0)
+    assert fired == ['eq']
+
+
+def test_and_binds_tighter_than_or():
+    engine, fired = make_engine(AlertRule('r', 'a > 0 and b > 0 or c > 0', cooldown=0))
+    engine.update([('a', 1), ('b', 0), ('c', 0)], t=0)
+    assert fired == []
+    engine.update([('c', 1)], t=1)
+    assert fired == ['r']
+
+
+def test_abs_and_rate():
+    engine, fired = make_engine(AlertRule('abs', 'abs(x) >= 10'), AlertRule('fast', 'rate(x) > 100'))
+    engine.update([('x', -10)], t=0)
+    assert fired == ['abs']
+    engine.update([('x', -10)], t=0)    # Same timestamp: no rate
+    engine.update([('x', 50)], t=.5)
+    assert fired == ['abs', 'fast']
+
+
+def test_stuck_fires_from_tick_without_updates():
+    engine, fired = make_engine(AlertRule('stuck', 'stuck(encoder, 2)'))
+    engine.update([('encoder', 1)], t=0)
+    engine.update([('encoder', 1)], t=1)    # Unchanged value doesn't reset the deadline
+    engine.tick(t=1.9)
+    assert fired == []
+    engine.tick(t=2)
+    assert fired == ['stuck']
+
+
+def test_stuck_deadline_moves_with_changes():
+    engine, fired = make_engine(AlertRule('stuck', 'stuck(encoder, 2)'))
+    engine.update([('encoder', 1)], t=0)
+    engine.update([('encoder', 2)], t=1.5)
+    engine.tick(t=2.5)
+    assert fired == []
+    engine.tick(t=3.5)
+    assert fired == ['stuck']
+
+
+def test_type_mismatch_and_unknown_variables_are_ignored():
+    engine, fired = make_engine(AlertRule('r', 'x > 1'))
+    engine.update([('x', 'text'), ('unrelated', 5)], t=0)
+    assert fired == []
+
+
+def test_clear_forgets_state():
+    engine, fired = make_engine(AlertRule('stuck', 'stuck(x, 1)'), AlertRule('fast', 'rate(x) > 1'))
+    engine.update([('x', 0)], t=0)
+    engine.clear()
+    engine.tick(t=5)
+    engine.update([('x', 10)], t=6)
+    assert fired == []
+
+
+def test_invalid_conditions():
+    with pytest.raises(ValueError):
+        parse_condition('x >')
+    with pytest.raises(ValueError):
+        parse_condition('stuck(x)')
+    _, deps = parse_condition('abs(a.b) < 1 or stuck(c, .5)')
+    assert deps == {'a.b', 'c'}
+
+
+def test_rule_from_dict():
+    rule = AlertRule.from_dict({'when': 'x > 1', 'action': 'rumble', 'cooldown': '2'})
+    assert rule == AlertRule('x > 1', 'x > 1', (AlertAction.RUMBLE,), '', 2.0)
@@ -0,0 +1,94 @@
+import asyncio
+import socket
+import struct
+import threading
+
+import pytest
+
+from EV3DriverStation.core import DriverStationCore
+from EV3DriverStation.protocol import HELLO_MESSAGE, ControllerState, RobotMode
+from EV3DriverStation.protocol import TelemetryVarTransmissionState as State
+
+SCHEMA = b"{'@version': 1, speed: 0, '?target': 10}"
+
+
+class RobotStub(threading.Thread):
+    """
+    Robot program on localhost: sends its schema, reports ``speed`` and ``target`` and drops the first edit.
+    """
+    def __init__(self):
+        super().__init__(name="RobotStub", daemon=True)
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(('127.0.0.1', 0))
+        self.socket.settimeout(.05)
+        self.port = self.socket.getsockname()[1]
+        self.running = True
+        self.values = {0: 0, 1: 10}
+        self.dropped_edits = 1
+        self.packets: list[bytes] = []
+
+    def run(self):
+        while self.running:
+            try:
+                data, addr = self.socket.recvfrom(2048)
+            except socket.timeout:
+                continue
+            self.packets.append(data)
+            if data == HELLO_MESSAGE or data[0] & 0x80:
+                self.socket.sendto(b'\x00\x00\x00\xff' + SCHEMA, addr)
+                continue
+            pos = 2 + data[1] * 11
+            while pos < len(data):
+                varID, value = data[pos], struct.unpack_from('h', data, pos + 1)[0]
+                pos += 3
+                if self.dropped_edits:
+                    self.dropped_edits -= 1
+                else:
+                    self.values[varID] = value
+            self.values[0] += 1
+            telemetry = b''.join(bytes((varID,)) + struct.pack('h', v) for varID, v in self.values.items())
+            self.socket.sendto(bytes((data[0] & 0x03, 0, 0)) + telemetry, addr)
+
+    def stop(self):
+        self.running = False
+        self.join()
+        self.socket.close()
+
+
+@pytest.fixture
+def robot():
+    stub = RobotStub()
+    stub.start()
+    yield stub
+    stub.stop()
+
+
+def test_core_drives_the_robot(robot):
+    async def drive():
+        async with DriverStationCore('localhost', port=robot.port, refresh_period=.02) as ds:
+            ds.mode = RobotMode.TELEOP
+            ds.enabled = True
+            ds.set_pilot_state(0, ControllerState.from_values(leftY=-1))
+            await ds.wait_until('speed', lambda v: v > 5, timeout=2)
+
+            # The first transmission of the edit is lost: it is sent again until the robot reports it
+            assert ds.send_value('target', 42)
+            await ds.wait_until('speed', lambda v: v > 20, timeout=2)
+            assert robot.values[1] == 42 and ds.telemetry.states[1] is State.TRANSMITTED
+        return robot.packets[-1]
+
+    last_packet = asyncio.run(drive())
+    assert any(p[0] == RobotMode.TELEOP.index and p[4] == 131 for p in robot.packets)
+    assert last_packet[0] == 0 and last_packet[3:] == ControllerState().encode()   # Disabled on close
+
+
+def test_core_connect_timeout():
+    async def connect():
+        ds = DriverStationCore('localhost', port=9, lock=False)
+        try:
+            await ds.connect(timeout=.2)
+        finally:
+            await ds.close()
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(connect())
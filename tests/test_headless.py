@@ -0,0 +1,43 @@
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+
+def run_module(module: str, *args: str, timeout: float = 60) -> str:
+    """
+    Run a headless entry point in a fresh interpreter (they own the Qt application and the robot stub port).
+    """
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen', SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy')
+    env['PYTHONPATH'] = os.pathsep.join(p for p in (SRC_DIR, env.get('PYTHONPATH')) if p)
+    result = subprocess.run([sys.executable, '-m', module, *args], capture_output=True, text=True, env=env,
+                            timeout=timeout)
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def test_headless_latency():
+    stdout = run_module('EV3DriverStation.latency', '--duration', '2')
+    p50, p95 = (float(v) for v in re.search(r'p50: ([\d.]+)ms\s+p95: ([\d.]+)ms', stdout).groups())
+    # Teleop packets carry the changes 30 ms after the previous packet at the latest
+    assert p50 < 35 and p95 < 60
+
+
+def test_headless_match():
+    stdout = run_module('EV3DriverStation.match', '--scale', '0.02')
+    lateness = [float(v) for v in re.findall(r'lateness ([-+][\d.]+) ms', stdout)]
+    wire = [float(v) for v in re.findall(r'on the wire after ([\d.]+) ms', stdout)]
+    assert 'End' in stdout and lateness and wire
+    assert max(lateness) < 50 and max(wire) < 50
+
+
+def test_controller_loop_cost():
+    pytest.importorskip('pygame')
+    from EV3DriverStation.controllers import benchmark_state_loop
+
+    duration = 5
+    assert benchmark_state_loop(duration) / duration < .01     # Less than 1% of one core
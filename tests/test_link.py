@@ -0,0 +1,131 @@
+import struct
+
+from EV3DriverStation.link import RefreshRates, SendSchedule, TelemetryLink, TelemetryRetryPolicy
+from EV3DriverStation.protocol import SCHEMA_MARKER, RobotMode, RobotStatus, TelemetryStore
+from EV3DriverStation.protocol import TelemetryVarTransmissionState as State
+
+
+def make_link(**policy) -> TelemetryLink:
+    link = TelemetryLink(TelemetryRetryPolicy(**policy))
+    link.set_store(TelemetryStore.from_schema({'@version': 1, 'speed': 0, '?target': 10}))
+    return link
+
+
+def values(*pairs) -> bytes:
+    return b''.join(bytes((varID,)) + struct.pack('h', v) for varID, v in pairs)
+
+
+#===============#
+#== Telemetry ==#
+#===============#
+def test_receive_values():
+    link = make_link()
+    received = link.receive_values(values((0, 5), (1, 10)))
+    assert received.values == [(0, 5), (1, 10)]
+    assert received.changed == [0] and received.states == []
+    assert link.store.values == [5, 10]
+
+
+def test_edit_is_acknowledged():
+    link = make_link()
+    assert link.edit(1, 42) == (True, True)
+    assert link.edit(0, 1) == (False, False)    # Not editable
+    packet, sent = link.encode_update()
+    assert packet == values((1, 42)) and sent == [1]
+    assert link.store.states[1] is State.IN_TRANSMISSION
+    # The value the robot had before receiving the edit doesn't overwrite it
+    assert link.receive_values(values((1, 10))).values == []
+    received = link.receive_values(values((1, 42)))
+    assert received.states == [1] and received.changed == []
+    assert link.store.states[1] is State.TRANSMITTED and not link.has_pending_edits
+
+
+def test_edit_retry_policy():
+    link = make_link(retry_after=2, max_attempts=2)
+    link.edit(1, 42)
+    link.encode_update()
+    assert link.age_edits() == []
+    assert link.age_edits() == [1]
+    assert link.store.states[1] is State.CHANGED
+    assert link.encode_update()[0] == values((1, 42))
+    link.age_edits()
+    assert link.age_edits() == [1]
+    assert link.store.states[1] is State.TRANSMISSION_MISSED
+    assert link.encode_update() == (b'', [])
+    link.receive_values(values((1, 10)))
+    assert link.store.values[1] == 10 and link.store.states[1] is State.TRANSMITTED
+
+
+def test_unknown_variable_requests_resync():
+    link = make_link()
+    received = link.receive_values(values((0, 1), (3, 7)))
+    assert received.values == [(0, 1)]
+    packet, _ = link.encode_update()
+    assert packet == bytes((SCHEMA_MARKER,)) + struct.pack('<HB', 1, 2) + bytes((2, 3))
+    assert link.encode_update() == (b'', [])  # Throttled
+    assert not link.take_full_schema_request()
+
+    link.set_store(*link.parse_delta("{'@version': 2, '@base': 1, '@count': 4, 2: {a: 0}, 3: {b: 0}}"))
+    assert link.store.names == ['speed', 'target', 'a', 'b']
+    assert link.receive_values(values((3, 7))).changed == [3]
+
+
+def test_unversioned_schema_requests_full_schema():
+    link = TelemetryLink()
+    link.set_store(TelemetryStore.from_schema({'speed': 0}))
+    link.receive_values(values((1, 0)))
+    assert link.take_full_schema_request()
+    assert not link.take_full_schema_request()
+    assert link.encode_update() == (b'', [])
+
+
+def test_invalid_delta_requests_full_schema():
+    link = make_link()
+    assert link.parse_delta("{'@base': 5, 2: {a: 0}}") is None
+    assert link.take_full_schema_request()
+
+
+def test_redefinition_keeps_other_edits():
+    link = make_link()
+    link.edit(1, 42)
+    store, redefined = link.store.apply_delta({'@version': 2, 0: {'?speed': 0}})
+    link.set_store(store, redefined)
+    assert link.encode_update()[1] == [1]
+    link.set_store(TelemetryStore())
+    assert not link.has_pending_edits
+
+
+#=====================#
+#== Send Scheduling ==#
+#=====================#
+def test_refresh_rates_mode():
+    assert RefreshRates.mode_of(RobotStatus.ENABLED, RobotMode.AUTO) == 'auto'
+    assert RefreshRates.mode_of(RobotStatus.ENABLED, RobotMode.TEST) == 'teleop'
+    assert RefreshRates.mode_of(RobotStatus.DISABLED, RobotMode.AUTO) == 'disabled'
+    rates = RefreshRates().set('teleop', max=20)
+    assert rates.teleop == (20, 30) and RefreshRates.from_dict(rates.to_dict()) == rates
+
+
+def test_heartbeat_skips_missed_deadlines():
+    schedule = SendSchedule()
+    assert schedule.heartbeat_deadline(5) == 5
+    schedule.sent(10)
+    assert schedule.heartbeat_deadline(10.5) == 11
+    assert schedule.heartbeat_deadline(13.2) == 14
+    assert schedule.update_mode(RobotStatus.ENABLED, RobotMode.AUTO)
+    assert not schedule.update_mode(RobotStatus.ENABLED, RobotMode.AUTO)
+    assert schedule.heartbeat_deadline(10) == 10.04
+    schedule.rates = schedule.rates.set('auto', max=0)
+    assert schedule.heartbeat_deadline(10) is None
+
+
+def test_change_deadline():
+    schedule = SendSchedule()
+    schedule.update_mode(RobotStatus.ENABLED, RobotMode.TELEOP)
+    schedule.sent(10)
+    assert schedule.change_deadline(10.01) == 10.03
+    assert schedule.change_deadline(10.04) == 10.04
+    schedule.update_mode(RobotStatus.ENABLED, RobotMode.AUTO)   # min = 0: changes wait for the periodic packet
+    assert schedule.change_deadline(10.01) is None
+    schedule.update_mode(RobotStatus.DISABLED, RobotMode.AUTO)  # min = max
+    assert schedule.change_deadline(10.01) is None
@@ -0,0 +1,118 @@
+import struct
+
+import pytest
+
+from EV3DriverStation.protocol import (
+    AXIS_SCALE,
+    ControllerState,
+    DriverStationState,
+    RobotMode,
+    RobotResponse,
+    TelemetryStore,
+    TelemetryVarType,
+    _array_equal,
+)
+
+
+#=================#
+#== Controllers ==#
+#=================#
+def test_controller_state_round_trip():
+    state = ControllerState.from_values(leftX=.5, rightY=-1, rightTrigger=1, A=True, Down=True)
+    *axes, buttons = struct.unpack('=6bi', state.encode())
+    assert tuple(axes) == state.axes == (62, 0, 0, -AXIS_SCALE, -AXIS_SCALE, AXIS_SCALE)
+    assert ControllerState(tuple(axes), buttons) == state
+    assert state.A and state.Down and not state.B
+    assert ControllerState.from_fields([state.as_dict()[name] for name in state.as_dict()]) == state
+
+
+def test_controller_state_clamps_axes():
+    assert ControllerState.from_values(leftY=3).leftY == 1
+    assert ControllerState.from_values(leftY=-3).axes[1] == -AXIS_SCALE
+
+
+def test_driver_station_state_encoding():
+    state = DriverStationState((ControllerState(), None, ControllerState.from_values(B=True)), True, RobotMode.AUTO)
+    assert state.encode_mode() == RobotMode.AUTO.index
+    assert state._replace(enabled=False).encode_mode() == 0
+    encoded = state.encode_controllers()
+    assert encoded[0] == 2
+    assert encoded[1] == 0 and encoded[12] == 2
+    assert encoded[13:] == ControllerState.from_values(B=True).encode()
+
+
+def test_robot_response_decoding():
+    response = RobotResponse.decode(bytes((RobotMode.TELEOP.index, 3, 12)) + b'\x00\x01')
+    assert response.enabled and response.mode == RobotMode.TELEOP and not response.starting
+    assert (response.skipped_frames, response.frame_exec_time, response.telemetry) == (3, 12, b'\x00\x01')
+    starting = RobotResponse.decode(b'\x04\x00\x00')
+    assert starting.starting and not starting.enabled and starting.mode is None
+
+
+#===============#
+#== Telemetry ==#
+#===============#
+# Types are given by name: pytest can't build test ids from str enums overriding encode()
+@pytest.mark.parametrize('type_name, value', [
+    ('bool', True),
+    ('int', -1234),
+    ('int32', 2**31 - 1),
+    ('int64', -2**40),
+    ('float', 1.5),
+    ('double', 3.141592653589793),
+    ('string', 'hello'),
+])
+def test_scalar_round_trip(type_name, value):
+    var_type = TelemetryVarType(type_name)
+    data = b'\x07' + TelemetryVarType.encode(value, var_type)
+    decoded, end = TelemetryVarType.decode(data, 1, var_type)
+    assert decoded == value and end == len(data)
+
+
+@pytest.mark.parametrize('type_name', ['int[]', 'int64[]', 'float[]', 'double[]'])
+def test_array_round_trip(type_name):
+    var_type = TelemetryVarType(type_name)
+    value, valid = TelemetryVarType.validate([1, -2, 3], var_type, 3)
+    assert valid
+    data = TelemetryVarType.encode(value, var_type)
+    decoded, end = TelemetryVarType.decode(data, 0, var_type, 3)
+    assert _array_equal(decoded, value) and end == len(data)
+
+
+def test_truncated_values_raise():
+    with pytest.raises(ValueError):
+        TelemetryVarType.decode(b'\x05ab', 0, TelemetryVarType.STRING)
+    with pytest.raises(ValueError):
+        TelemetryVarType.decode(b'\x00' * 7, 0, TelemetryVarType.DOUBLE_ARRAY, 1)
+
+
+def test_validate_clamps_to_transmittable_values():
+    assert TelemetryVarType.validate(40000, TelemetryVarType.INT) == (2**15 - 1, False)
+    assert TelemetryVarType.validate('é-ok', TelemetryVarType.STRING) == ('-ok', False)
+    value, valid = TelemetryVarType.validate([1, 2], TelemetryVarType.INT_ARRAY, 3)
+    assert list(value) == [1, 2, 0] and not valid
+
+
+def test_store_from_schema():
+    store = TelemetryStore.from_schema({'@version': 4, 'speed': 0, '?target': 1.5, 'pose:double[3]': 0,
+                                        'name': 'ev3', 'flags': [1, 2]})
+    assert store.version == 4
+    assert store.names == ['speed', 'target', 'pose', 'name', 'flags']
+    assert store.types == [TelemetryVarType.INT, TelemetryVarType.FLOAT, TelemetryVarType.DOUBLE_ARRAY,
+                           TelemetryVarType.STRING, TelemetryVarType.INT_ARRAY]
+    assert store.lengths == [0, 0, 3, 0, 2]
+    assert store.editable == [False, True, False, False, False]
+    assert store.ids['pose'] == 2
+
+
+def test_store_delta():
+    store = TelemetryStore.from_schema({'@version': 1, 'a': 0, 'b': 1})
+    updated, redefined = store.apply_delta({'@version': 2, '@base': 1, '@count': 3, 1: {'c': 2.5}, 2: {'?d': 1}})
+    assert redefined == [1, 2]
+    assert updated.names == ['a', 'c', 'd'] and updated.version == 2
+    assert 'b' not in updated.ids and updated.editable[2]
+    assert store.names == ['a', 'b']    # The original store is not modified
+    with pytest.raises(ValueError):
+        updated.apply_delta({'@base': 1, 3: {'e': 0}})
+    with pytest.raises(ValueError):
+        updated.apply_delta({'@count': 5, 3: {'e': 0}})
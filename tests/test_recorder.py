@@ -0,0 +1,49 @@
+import pytest
+
+from EV3DriverStation.protocol import TelemetryVarType
+from EV3DriverStation.recorder import TelemetryRecorder, TelemetryRecording
+
+
+@pytest.fixture
+def recording(tmp_path):
+    recorder = TelemetryRecorder(str(tmp_path / 'rec'), chunk_size=4)
+    recorder.start()
+    pose, _ = TelemetryVarType.validate([1, 2, 3], TelemetryVarType.DOUBLE_ARRAY, 3)
+    for i in range(10):
+        recorder.record([('speed', 'int', i), ('enabled', 'bool', i % 2 == 0), ('state', 'string', f'step{i}')],
+                        t=100 + i)
+    recorder.record([('pose', 'double[]', pose), ('speed', 'float', 0.5)], t=110)
+    recorder.stop()
+    assert recorder.dropped_packets == 0
+    with TelemetryRecording(str(tmp_path / 'rec')) as rec:
+        yield rec
+
+
+def test_round_trip(recording):
+    assert sorted(recording.names) == ['enabled', 'pose', 'speed', 'state']
+    assert list(recording.timestamps('state')) == [100 + i for i in range(10)]
+    assert list(recording.values('state')) == [f'step{i}' for i in range(10)]
+    assert list(recording.values('enabled')) == [i % 2 == 0 for i in range(10)]
+    assert list(recording.to_numpy('pose')[1][0]) == [1, 2, 3]
+
+
+def test_type_change_is_merged_by_time(recording):
+    assert [c['type'] for c in recording.columns('speed')] == ['int', 'float']
+    assert recording.type_of('speed') == 'float'
+    assert list(recording.values('speed')) == list(range(10)) + [0.5]
+
+
+def test_value_at(recording):
+    assert recording.value_at('speed', 99) is None
+    assert recording.value_at('speed', 104.5) == 4
+    assert recording.value_at('speed', 200) == 0.5
+    assert recording.value_at('state', 109) == 'step9'
+
+
+def test_csv_export(recording, tmp_path):
+    path = tmp_path / 'out.csv'
+    recording.to_csv(str(path), ['speed', 'state'])
+    lines = path.read_text().splitlines()
+    assert lines[0] == 'time,name,value'
+    assert lines[1:3] == ['100.0,speed,0', '100.0,state,step0']
+    assert lines[-1] == '110.0,speed,0.5' and len(lines) == 22
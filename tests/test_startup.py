@@ -0,0 +1,25 @@
+import importlib.util
+
+import pytest
+
+from EV3DriverStation.startup import DEFERRED_MODULES, measure_first_frame, measure_imports
+
+
+def test_core_imports_neither_qt_nor_deferred_modules():
+    imported = {name.split('.')[0] for name, *_ in measure_imports('EV3DriverStation.core')}
+    assert 'EV3DriverStation' in imported
+    assert imported.isdisjoint(('PySide6', 'pygame') + DEFERRED_MODULES)
+
+
+def test_app_import_defers_modules():
+    imported = {name.split('.')[0] for name, *_ in measure_imports()}
+    assert imported.isdisjoint(DEFERRED_MODULES)
+
+
+@pytest.mark.skipif(importlib.util.find_spec('PySide6.QtQuick') is None, reason="Qt Quick not available")
+def test_first_frame_defers_modules(monkeypatch):
+    monkeypatch.setenv('QT_QPA_PLATFORM', 'offscreen')
+    monkeypatch.setenv('SDL_VIDEODRIVER', 'dummy')
+    timings = measure_first_frame()
+    assert timings['deferred'] == []
+    assert timings['first_frame'] >= timings['qml'] >= timings['import'] > 0
@@ -0,0 +1,88 @@
+import asyncio
+import base64
+import json
+import os
+import struct
+
+import pytest
+
+from EV3DriverStation.streaming import (
+    MAX_FRAME_SIZE,
+    WS_CLOSE,
+    WS_CLOSE_TOO_BIG,
+    TelemetryServer,
+    _ws_read_frame,
+    load_test,
+)
+
+
+@pytest.fixture
+def server():
+    server = TelemetryServer(port=0)
+    server.start()
+    server.publish_schema([('x', 'float'), ('y', 'int')])
+    yield server
+    server.stop()
+
+
+def client_frame(opcode: int, payload: bytes) -> bytes:
+    """
+    Masked frame, as sent by a browser (the mask is left to zero).
+    """
+    size = len(payload)
+    if size < 126:
+        header = struct.pack('!BB', 0x80 | opcode, 0x80 | size)
+    elif size < 1 << 16:
+        header = struct.pack('!BBH', 0x80 | opcode, 0x80 | 126, size)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 0x80 | 127, size)
+    return header + bytes(4) + payload
+
+
+async def open_stream(server: TelemetryServer):
+    reader, writer = await asyncio.open_connection(server.host, server.port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write((f"GET /stream HTTP/1.1\r\nHost: {server.host}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                  f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+    await writer.drain()
+    assert (await reader.readuntil(b'\r\n\r\n')).startswith(b'HTTP/1.1 101')
+    return reader, writer
+
+
+def test_oversized_frame_closes_connection(server):
+    async def run():
+        reader, writer = await open_stream(server)
+        writer.write(client_frame(0x1, json.dumps({'rate': 10}).encode()))
+        # Only the header of the oversized frame is sent: the server must not wait for its payload
+        writer.write(struct.pack('!BBQ', 0x81, 0x80 | 127, MAX_FRAME_SIZE + 1) + bytes(4))
+        await writer.drain()
+        while True:
+            opcode, payload = await asyncio.wait_for(_ws_read_frame(reader, max_size=None), 2)
+            if opcode == WS_CLOSE:
+                break
+        assert struct.unpack('!H', payload[:2])[0] == WS_CLOSE_TOO_BIG
+        assert await asyncio.wait_for(reader.read(), 2) == b''
+        writer.close()
+
+    asyncio.run(run())
+
+
+def test_fragmented_message_is_capped(server):
+    async def run():
+        reader, writer = await open_stream(server)
+        half = MAX_FRAME_SIZE // 2 + 1
+        writer.write(struct.pack('!BBH', 0x01, 0x80 | 126, half) + bytes(4) + b' ' * half)
+        writer.write(struct.pack('!BBH', 0x80, 0x80 | 126, half) + bytes(4))
+        await writer.drain()
+        while True:
+            opcode, payload = await asyncio.wait_for(_ws_read_frame(reader, max_size=None), 2)
+            if opcode == WS_CLOSE:
+                break
+        assert struct.unpack('!H', payload[:2])[0] == WS_CLOSE_TOO_BIG
+        writer.close()
+
+    asyncio.run(run())
+
+
+def test_load():
+    assert load_test(clients=6, duration=1.5, variables=100, slow_clients=1, check=True)
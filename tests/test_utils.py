@@ -0,0 +1,60 @@
+import pytest
+
+from EV3DriverStation.utils import RateCounter, WindowedStats
+
+
+class Clock:
+    def __init__(self, t: float = 0):
+        self.t = t
+
+    def __call__(self) -> float:
+        return self.t
+
+
+def test_percentiles_use_nearest_rank():
+    stats = WindowedStats(10, clock=Clock())
+    for v in (-3, 0, 5):
+        stats.put(v)
+    # Estimated within the relative accuracy (1% by default)
+    assert stats.percentile(0) == pytest.approx(-3, rel=.01)
+    assert stats.percentile(33) == pytest.approx(-3, rel=.01)
+    assert stats.percentile(34) == 0
+    assert stats.percentile(50) == 0
+    assert stats.percentile(95) == pytest.approx(5, rel=.01)
+    assert stats.percentile(99) == pytest.approx(5, rel=.01)
+    assert stats.percentile(100) == pytest.approx(5, rel=.01)
+
+
+def test_percentiles_relative_accuracy():
+    stats = WindowedStats(10, relative_accuracy=.01, clock=Clock())
+    for v in range(1, 1001):
+        stats.put(v)
+    for q in (50, 90, 99):
+        assert stats.percentile(q) == pytest.approx(q * 10, rel=.01)
+
+
+def test_window_eviction():
+    clock = Clock()
+    stats = WindowedStats(5, clock=clock)
+    stats.put(100, 0)
+    stats.put(1, 3)
+    stats.put(2, 4)
+    assert stats.summary()['max'] == 100 and len(stats) == 3
+    clock.t = 5.5
+    assert stats.max() == 2 and stats.min() == 1
+    assert stats.mean() == 1.5 and stats.percentile(99) == pytest.approx(2, rel=.01)
+    clock.t = 20
+    assert len(stats) == 0
+    assert stats.summary(0) == dict(mean=0, min=0, max=0, p50=0, p95=0, p99=0)
+
+
+def test_rate_counter():
+    clock = Clock()
+    rate = RateCounter(window=2, clock=clock)
+    for i in range(10):
+        rate.tick(t=i * .1)
+    rate.tick(5, t=1)
+    clock.t = 1
+    assert rate.rate() == 7.5
+    clock.t = 10
+    assert rate.rate() == 0